@@ -8,7 +8,8 @@ from airport.models import (
     AirplaneType,
     Ticket,
     Order,
-    Airplane
+    Airplane,
+    SeatHold,
 )
 
 admin.site.register(Airport)
@@ -19,3 +20,4 @@ admin.site.register(AirplaneType)
 admin.site.register(Ticket)
 admin.site.register(Order)
 admin.site.register(Airplane)
+admin.site.register(SeatHold)
@@ -0,0 +1,226 @@
+"""
+Async versions of the read-heavy endpoints for ASGI deployments.
+
+DRF views are synchronous, so AsyncGenericAPIView runs authentication,
+permissions and throttling through sync_to_async and awaits its GET
+handler. Querysets are evaluated with Django's async ORM; serializers run
+on rows that are already loaded (select_related/prefetch_related), so
+they never touch the database from the event loop. Response bodies
+match the synchronous endpoints, and flight list and detail send the
+same Last-Modified and answer If-None-Match/If-Modified-Since with 304
+(see AsyncConditionalGetMixin). ETags differ, as they cover the URL.
+"""
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from drf_spectacular.utils import extend_schema
+
+from rest_framework import mixins
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+
+from django.db.models import Count, Max
+
+from airport.cache import CachedListMixin, ConditionalGetMixin
+from airport.models import Airport, Route, Flight, FlightSearchIndex
+from airport.pagination import (
+    AsyncLimitOffsetPagination,
+    LimitOffsetOrCursorPagination,
+)
+from airport.serializers import (
+    AirportSerializer,
+    RouteListSerializer,
+    FlightListSerializer,
+    FlightListRowSerializer,
+    FlightDetailSerializer,
+)
+from airport.views import (
+    FLIGHT_SEARCH_PARAMETERS,
+    FlightViewSet,
+    search_flight_index,
+    search_flights,
+    with_tickets_available,
+)
+from airport_api_service.db_router import read_primary
+from airport_api_service.metrics import SerializerTimingMixin
+
+
+class AsyncGenericAPIView(SerializerTimingMixin, GenericAPIView):
+    """GenericAPIView whose handlers are coroutines"""
+
+    pagination_class = AsyncLimitOffsetPagination
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication and throttling may query the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(
+                self, request.method.lower(), self.http_method_not_allowed
+            )
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
+
+    async def alist(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(
+            [item async for item in queryset], many=True
+        )
+        return Response(serializer.data)
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the "
+                f"given query."
+            )
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aretrieve(self, request):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+
+class AsyncConditionalGetMixin(ConditionalGetMixin):
+    """ConditionalGetMixin for the alist/aretrieve handlers"""
+
+    async def aconditional(self, request, respond, last_modified, *state):
+        """Return the 304 or awaited respond() response with validators"""
+        etag, timestamp, response = await sync_to_async(
+            self.check_conditional
+        )(request, last_modified, *state)
+        if response is None:
+            response = await respond()
+        return self.set_validators(response, etag, timestamp)
+
+    async def alist(self, request):
+        if not self.validates_list(request):
+            return await super().alist(request)
+        state = await (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aaggregate(last_modified=Max("updated_at"), count=Count("pk"))
+        )
+        self.queryset_count = state["count"]
+        return await self.aconditional(
+            request,
+            lambda: super(AsyncConditionalGetMixin, self).alist(request),
+            state["last_modified"],
+            state["count"],
+        )
+
+    async def aretrieve(self, request):
+        if "retrieve" not in self.conditional_actions:
+            return await super().aretrieve(request)
+        instance = await self.aget_object()
+
+        async def respond():
+            return Response(self.get_serializer(instance).data)
+
+        return await self.aconditional(
+            request,
+            respond,
+            self.get_last_modified(instance),
+            instance.pk,
+        )
+
+
+class AsyncCachedListAPIView(
+    CachedListMixin, mixins.ListModelMixin, AsyncGenericAPIView
+):
+    """Cached list endpoint, ListModelMixin only documents it as a list"""
+
+    async def get(self, request, *args, **kwargs):
+        cache_key, etag, response = await sync_to_async(
+            self.get_cached_list
+        )(request)
+        if response is None:
+            # See CachedListMixin
+            with read_primary():
+                response = await self.alist(request)
+            await sync_to_async(self.set_cached_list)(cache_key, response)
+        return self.finalize_cached_response(response, etag)
+
+
+class AsyncAirportListView(AsyncCachedListAPIView):
+    queryset = Airport.objects.all()
+    serializer_class = AirportSerializer
+
+
+class AsyncRouteListView(AsyncCachedListAPIView):
+    queryset = Route.objects.select_related("source", "destination").all()
+    serializer_class = RouteListSerializer
+    cache_models = (Route, Airport)
+
+
+class AsyncFlightListView(
+    AsyncConditionalGetMixin, mixins.ListModelMixin, AsyncGenericAPIView
+):
+    queryset = FlightSearchIndex.objects.all()
+    serializer_class = FlightListRowSerializer
+    pagination_class = LimitOffsetOrCursorPagination
+    cursor_ordering = FlightViewSet.cursor_ordering
+    throttle_scope = FlightViewSet.throttle_scope
+
+    def get_queryset(self):
+        return search_flight_index(self.request.query_params)
+
+    def get_serializer_class(self):
+        if getattr(self, "swagger_fake_view", False):
+            return FlightListSerializer
+        return self.serializer_class
+
+    @extend_schema(parameters=FLIGHT_SEARCH_PARAMETERS)
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request)
+
+
+class AsyncFlightDetailView(AsyncConditionalGetMixin, AsyncGenericAPIView):
+    queryset = Flight.objects.select_related(
+        "route__destination", "route__source", "search_index"
+    ).prefetch_related("crews", "tickets")
+    serializer_class = FlightDetailSerializer
+    throttle_scope = FlightViewSet.throttle_scope
+
+    def get_queryset(self):
+        return search_flights(
+            with_tickets_available(self.queryset), self.request.query_params
+        )
+
+    def get_last_modified(self, flight):
+        return FlightViewSet.get_last_modified(self, flight)
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aretrieve(request)
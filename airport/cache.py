@@ -0,0 +1,210 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport_api_service.db_router import read_primary
+
+
+def get_reference_cache():
+    return caches[getattr(settings, "REFERENCE_CACHE_ALIAS", "default")]
+
+
+def model_version_key(model):
+    return f"airport:version:{model._meta.label_lower}"
+
+
+def initial_version():
+    # Evicted version keys must not fall back to a value used before
+    return int(time.time() * 1000)
+
+
+def get_model_versions(models):
+    cache = get_reference_cache()
+    keys = [model_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: initial_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    cache = get_reference_cache()
+    key = model_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, initial_version(), timeout=None)
+
+
+class CachedListMixin:
+    """
+    Serve list responses from the reference cache.
+
+    Keys include a version per model in cache_models, which is bumped on
+    every save/delete of those models (see airport.signals), so a changed
+    row never serves a stale list. Responses carry an ETag derived from
+    the key and a Cache-Control max-age for browsers and CDNs. Misses are
+    filled from the primary: right after a bump, a lagging replica would
+    have its old rows cached under the new version for every user.
+    """
+
+    cache_models = ()
+
+    def get_list_cache_key(self, request):
+        versions = get_model_versions(
+            self.cache_models or (self.queryset.model,)
+        )
+        raw_key = (
+            f"{type(self).__name__}:{versions}:"
+            f"{request.build_absolute_uri()}:{request.accepted_media_type}"
+        )
+        return (
+            f"airport:list:{hashlib.md5(raw_key.encode()).hexdigest()}"
+        )
+
+    def finalize_cached_response(self, response, etag):
+        response["ETag"] = etag
+        patch_cache_control(
+            response,
+            max_age=getattr(settings, "REFERENCE_CACHE_MAX_AGE", 60),
+        )
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+    def get_cached_list(self, request):
+        """Return (cache_key, etag, response), response is None on a miss"""
+        cache_key = self.get_list_cache_key(request)
+        etag = quote_etag(cache_key.rsplit(":", 1)[-1])
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return cache_key, etag, Response(
+                status=status.HTTP_304_NOT_MODIFIED
+            )
+
+        data = get_reference_cache().get(cache_key)
+        return cache_key, etag, None if data is None else Response(data)
+
+    def set_cached_list(self, cache_key, response):
+        get_reference_cache().set(
+            cache_key,
+            response.data,
+            getattr(settings, "REFERENCE_CACHE_TIMEOUT", 300),
+        )
+
+    def list(self, request, *args, **kwargs):
+        cache_key, etag, response = self.get_cached_list(request)
+        if response is None:
+            with read_primary():
+                response = super().list(request, *args, **kwargs)
+            self.set_cached_list(cache_key, response)
+        return self.finalize_cached_response(response, etag)
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve requests with ETag and Last-Modified
+    validators, and with 304 Not Modified when the client's match,
+    without serializing the response.
+
+    List validators come from one aggregate of max(updated_at) and the
+    row count of the filtered queryset, which the pagination reuses as
+    its total count; keyset pages are not validated. Retrieve validators
+    come from the fetched object (see get_last_modified). Views showing
+    related models list them in conditional_models: their versions are
+    part of the ETag, and no Last-Modified is sent, as their edits do
+    not move it.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    conditional_models = ()
+
+    def get_last_modified(self, instance):
+        return instance.updated_at
+
+    def get_conditional_etag(self, request, *state):
+        versions = get_model_versions(self.conditional_models)
+        raw_key = (
+            f"{type(self).__name__}:{getattr(self, 'action', None)}:"
+            f"{state}:{versions}:"
+            f"{request.user.pk}:{request.build_absolute_uri()}:"
+            f"{request.accepted_media_type}"
+        )
+        return quote_etag(hashlib.md5(raw_key.encode()).hexdigest())
+
+    def check_conditional(self, request, last_modified, *state):
+        """Return (etag, timestamp, the 304 response or None)"""
+        etag = self.get_conditional_etag(request, last_modified, *state)
+        if self.conditional_models or last_modified is None:
+            timestamp = None
+        else:
+            timestamp = int(last_modified.timestamp())
+        return etag, timestamp, get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+
+    def conditional(self, request, respond, last_modified, *state):
+        """Return the 304 or respond() response with validators"""
+        etag, timestamp, response = self.check_conditional(
+            request, last_modified, *state
+        )
+        if response is None:
+            response = respond()
+        return self.set_validators(response, etag, timestamp)
+
+    @staticmethod
+    def set_validators(response, etag, timestamp):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+    def validates_list(self, request):
+        # Keyset pages skip COUNT(*) by design, so they get no validators
+        use_cursor = getattr(self.paginator, "use_cursor", None)
+        return "list" in self.conditional_actions and not (
+            use_cursor is not None and use_cursor(request)
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.validates_list(request):
+            return super().list(request, *args, **kwargs)
+        state = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+        )
+        self.queryset_count = state["count"]
+        return self.conditional(
+            request,
+            lambda: super(ConditionalGetMixin, self).list(
+                request, *args, **kwargs
+            ),
+            state["last_modified"],
+            state["count"],
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if "retrieve" not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        instance = self.get_object()
+        return self.conditional(
+            request,
+            lambda: Response(self.get_serializer(instance).data),
+            self.get_last_modified(instance),
+            instance.pk,
+        )
@@ -0,0 +1,41 @@
+from django.core.checks import Error, Tags, register
+from django.db import connections
+
+from airport_api_service.db_pool import (
+    is_pooled,
+    pool_configuration_error,
+    wait_for_database,
+)
+
+
+@register(Tags.database)
+def check_connection_pools(app_configs=None, databases=None, **kwargs):
+    """Open the pools of the checked databases once, as wait_for_db does"""
+    errors = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if not is_pooled(connection):
+            continue
+        problem = pool_configuration_error(connection)
+        if problem is not None:
+            errors.append(
+                Error(
+                    f"Invalid connection pool for {alias}: {problem}.",
+                    hint="Review the POSTGRES_POOL settings.",
+                    id="airport.E001",
+                )
+            )
+            continue
+        error = wait_for_database(connection, attempts=1)
+        if error is not None:
+            errors.append(
+                Error(
+                    f"Connection pool for {alias} did not open: {error}",
+                    hint=(
+                        "Check that the database is up and accepts "
+                        "POSTGRES_POOL_MIN_SIZE connections."
+                    ),
+                    id="airport.E002",
+                )
+            )
+    return errors
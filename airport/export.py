@@ -0,0 +1,77 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+TICKET_EXPORT_FIELDS = {
+    "ticket": "id",
+    "row": "row",
+    "seat": "seat",
+    "flight": "flight_id",
+    "departure_time": "flight__departure_time",
+    "arrival_time": "flight__arrival_time",
+    "source": "flight__route__source__name",
+    "source_city": "flight__route__source__closest_big_city",
+    "destination": "flight__route__destination__name",
+    "destination_city": "flight__route__destination__closest_big_city",
+    "airplane": "flight__airplane__name",
+    "order": "order_id",
+    "order_created": "order__created",
+    "email": "order__user__email",
+}
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that returns what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def filter_manifest(queryset, flight=None, departure_from=None,
+                    departure_to=None):
+    """Narrow tickets to one flight and/or a [from, to) departure range"""
+    if flight:
+        queryset = queryset.filter(flight_id=flight)
+    if departure_from:
+        queryset = queryset.filter(flight__departure_time__gte=departure_from)
+    if departure_to:
+        queryset = queryset.filter(flight__departure_time__lt=departure_to)
+    return queryset
+
+
+def ticket_export_rows(queryset):
+    """Yield plain tuples of TICKET_EXPORT_FIELDS without building models"""
+    return (
+        queryset.values_list(*TICKET_EXPORT_FIELDS.values())
+        .order_by("flight__departure_time", "flight_id", "row", "seat")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(TICKET_EXPORT_FIELDS.keys())
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in row
+        )
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder()
+    columns = tuple(TICKET_EXPORT_FIELDS.keys())
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def export_lines(queryset, export_format):
+    rows = ticket_export_rows(queryset)
+    if export_format == "ndjson":
+        return ndjson_lines(rows)
+    return csv_lines(rows)
@@ -0,0 +1,255 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+
+from airport.models import Flight
+
+Leg = namedtuple(
+    "Leg",
+    (
+        "flight_id",
+        "source_id",
+        "destination_id",
+        "departure_time",
+        "arrival_time",
+        "distance",
+    ),
+)
+Itinerary = namedtuple(
+    "Itinerary",
+    ("legs", "departure_time", "arrival_time", "duration", "distance"),
+)
+
+LEG_FIELDS = (
+    "id",
+    "route__source_id",
+    "route__destination_id",
+    "departure_time",
+    "arrival_time",
+    "route__distance",
+)
+AIRPORT_FIELDS = (
+    "route__source__name",
+    "route__source__closest_big_city",
+    "route__destination__name",
+    "route__destination__closest_big_city",
+)
+
+
+class FlightIndex:
+    """
+    In-memory time-expanded graph of flights.
+
+    Every airport maps to its departing legs sorted by departure time, so
+    connections within a layover window are found with bisect instead of
+    database queries. The index is built from one bulk query, patched on
+    Flight saves/deletes in this process and fully rebuilt once it is
+    older than ITINERARY_INDEX_TTL seconds, which bounds staleness for
+    changes made by other workers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.departures = {}
+        self.legs_by_flight = {}
+        self.airports = {}
+
+    @property
+    def is_stale(self):
+        ttl = getattr(settings, "ITINERARY_INDEX_TTL", 300)
+        return self.built_at is None or time.monotonic() - self.built_at > ttl
+
+    def invalidate(self):
+        self.built_at = None
+
+    def ensure_built(self):
+        if self.is_stale:
+            with self.lock:
+                if self.is_stale:
+                    self.build()
+
+    def build(self):
+        departures = {}
+        legs_by_flight = {}
+        airports = {}
+        for values in Flight.objects.values_list(
+            *LEG_FIELDS, *AIRPORT_FIELDS
+        ).order_by("departure_time").iterator(chunk_size=5000):
+            leg = self._add_values(values, legs_by_flight, airports)
+            departures.setdefault(leg.source_id, ([], []))
+            departures[leg.source_id][0].append(leg.departure_time)
+            departures[leg.source_id][1].append(leg)
+
+        self.departures = departures
+        self.legs_by_flight = legs_by_flight
+        self.airports = airports
+        self.built_at = time.monotonic()
+
+    @staticmethod
+    def _add_values(values, legs_by_flight, airports):
+        leg = Leg(*values[:len(LEG_FIELDS)])
+        (
+            source_name,
+            source_city,
+            destination_name,
+            destination_city,
+        ) = values[len(LEG_FIELDS):]
+        airports[leg.source_id] = (source_name, source_city)
+        airports[leg.destination_id] = (destination_name, destination_city)
+        legs_by_flight[leg.flight_id] = leg
+        return leg
+
+    def _replace_departures(self, airport_id, legs):
+        legs = sorted(legs, key=lambda leg: leg.departure_time)
+        # Swap in new lists so concurrent searches never see a half edit
+        self.departures[airport_id] = (
+            [leg.departure_time for leg in legs],
+            legs,
+        )
+
+    def _remove_leg(self, flight_id):
+        leg = self.legs_by_flight.pop(flight_id, None)
+        if leg is not None:
+            self._replace_departures(
+                leg.source_id,
+                [
+                    other
+                    for other in self.departures[leg.source_id][1]
+                    if other.flight_id != flight_id
+                ],
+            )
+
+    def remove_flight(self, flight_id):
+        with self.lock:
+            self._remove_leg(flight_id)
+
+    def update_flight(self, flight_id):
+        if self.built_at is None:
+            return
+        values = (
+            Flight.objects.filter(pk=flight_id)
+            .values_list(*LEG_FIELDS, *AIRPORT_FIELDS)
+            .first()
+        )
+        with self.lock:
+            self._remove_leg(flight_id)
+            if values is not None:
+                leg = self._add_values(
+                    values, self.legs_by_flight, self.airports
+                )
+                self._replace_departures(
+                    leg.source_id,
+                    self.departures.get(leg.source_id, ([], []))[1] + [leg],
+                )
+
+    def airports_in_city(self, city):
+        city = city.casefold()
+        return {
+            airport_id
+            for airport_id, (_, airport_city) in self.airports.items()
+            if city in airport_city.casefold()
+        }
+
+    def legs_departing(self, airport_id, start, end=None):
+        departure_times, legs = self.departures.get(airport_id, ([], []))
+        first = bisect_left(departure_times, start)
+        last = (
+            len(legs) if end is None
+            else bisect_right(departure_times, end, lo=first)
+        )
+        return legs[first:last]
+
+    def search(
+        self,
+        source_city,
+        destination_city,
+        departure_from,
+        departure_to=None,
+        min_layover=timedelta(minutes=45),
+        max_layover=timedelta(hours=12),
+        max_legs=3,
+        order_by="duration",
+        limit=5,
+        max_expansions=100000,
+    ):
+        """
+        Return up to limit best itineraries as a best-first search.
+
+        Both costs only grow when a leg is appended, so itineraries leave
+        the heap in rank order and the search stops after limit results.
+        """
+        self.ensure_built()
+        destinations = self.airports_in_city(destination_city)
+        if not destinations:
+            return []
+
+        heap = []
+        counter = 0
+        for source_id in self.airports_in_city(source_city):
+            for leg in self.legs_departing(
+                source_id, departure_from, departure_to
+            ):
+                counter += 1
+                heapq.heappush(
+                    heap, (self._cost(order_by, (leg,)), counter, (leg,))
+                )
+
+        results = []
+        while heap and len(results) < limit and counter < max_expansions:
+            _, _, legs = heapq.heappop(heap)
+            last = legs[-1]
+            if last.destination_id in destinations:
+                results.append(self._itinerary(legs))
+                continue
+            if len(legs) >= max_legs:
+                continue
+            visited = {leg.source_id for leg in legs}
+            for leg in self.legs_departing(
+                last.destination_id,
+                last.arrival_time + min_layover,
+                last.arrival_time + max_layover,
+            ):
+                if leg.destination_id in visited:
+                    continue
+                counter += 1
+                path = legs + (leg,)
+                heapq.heappush(
+                    heap, (self._cost(order_by, path), counter, path)
+                )
+        return results
+
+    @staticmethod
+    def _cost(order_by, legs):
+        if order_by == "distance":
+            return sum(leg.distance for leg in legs), legs[-1].arrival_time
+        return legs[-1].arrival_time - legs[0].departure_time, 0
+
+    def _itinerary(self, legs):
+        return Itinerary(
+            legs=[
+                {
+                    "flight": leg.flight_id,
+                    "source": "{} ({})".format(*self.airports[leg.source_id]),
+                    "destination": "{} ({})".format(
+                        *self.airports[leg.destination_id]
+                    ),
+                    "departure_time": leg.departure_time,
+                    "arrival_time": leg.arrival_time,
+                    "distance": leg.distance,
+                }
+                for leg in legs
+            ],
+            departure_time=legs[0].departure_time,
+            arrival_time=legs[-1].arrival_time,
+            duration=legs[-1].arrival_time - legs[0].departure_time,
+            distance=sum(leg.distance for leg in legs),
+        )
+
+
+flight_index = FlightIndex()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from airport.models import FlightSearchIndex
+
+
+class Command(BaseCommand):
+    """Django command that rebuilds the flight search index in batches"""
+
+    help = (
+        "Rebuild FlightSearchIndex rows of all flights, for example after "
+        "writes that bypassed signals"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        indexed = FlightSearchIndex.rebuild(options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {indexed} flight(s)")
+        )
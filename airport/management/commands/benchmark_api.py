@@ -0,0 +1,262 @@
+import json
+import math
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from airport.models import Airport, Flight, Order
+from airport.seed import seed_dataset
+
+DEFAULT_MIX = {
+    "flight_search": 50,
+    "flight_detail": 25,
+    "ticket_list": 15,
+    "order_create": 10,
+}
+ROWS_SCANNED_SQL = (
+    "SELECT COALESCE(SUM(seq_tup_read + COALESCE(idx_tup_fetch, 0)), 0) "
+    "FROM pg_stat_user_tables"
+)
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def load_mix(path):
+    """Read {"scenario": ..., "weight": ...} JSON lines"""
+    mix = {}
+    with open(path) as mix_file:
+        for line in mix_file:
+            if line.strip():
+                entry = json.loads(line)
+                mix[entry["scenario"]] = entry.get("weight", 1)
+    return mix
+
+
+class Command(BaseCommand):
+    """Django command that benchmarks the booking API in process"""
+
+    help = (
+        "Replay a weighted request mix against flight search, flight "
+        "detail, ticket list and order creation and report latency "
+        "percentiles, queries per request and rows scanned as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--mix", help="JSON lines file of scenario weights"
+        )
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Seed a dataset before the run",
+        )
+        parser.add_argument("--airports", type=int, default=1000)
+        parser.add_argument("--flights", type=int, default=10000)
+        parser.add_argument("--tickets", type=int, default=100000)
+        parser.add_argument("--random-seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        random.seed(options["random_seed"])
+        if options["seed"]:
+            self.stdout.write("Seeding dataset...")
+            seed_dataset(
+                airports=options["airports"],
+                flights=options["flights"],
+                tickets=options["tickets"],
+            )
+
+        self.flight_ids = list(Flight.objects.values_list("id", flat=True))
+        if not self.flight_ids:
+            raise CommandError("No flights, run with --seed first")
+        self.cities = list(
+            Airport.objects.values_list("closest_big_city", flat=True)
+            .distinct()[:500]
+        )
+        self.dates = [
+            day.strftime("%Y-%m-%d")
+            for day in Flight.objects.dates("departure_time", "day")[:90]
+        ]
+
+        mix = load_mix(options["mix"]) if options["mix"] else DEFAULT_MIX
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {sorted(unknown)}")
+
+        user, _ = get_user_model().objects.get_or_create(
+            email="bench@example.com"
+        )
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(user)
+
+        samples = defaultdict(list)
+        # Unlimited rates for the run, the replay would exhaust them
+        unthrottled = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": dict.fromkeys(
+                api_settings.DEFAULT_THROTTLE_RATES
+            ),
+        }
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "localhost"],
+            REST_FRAMEWORK=unthrottled,
+        ):
+            scenarios = random.choices(
+                list(mix), weights=list(mix.values()), k=options["requests"]
+            )
+            for scenario in scenarios:
+                samples[scenario].append(self.measure(scenario))
+
+        report = {
+            "created": datetime.now(dt_timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "dataset": {
+                "airports": Airport.objects.count(),
+                "flights": len(self.flight_ids),
+            },
+            "scenarios": {
+                scenario: self.summarize(scenario_samples)
+                for scenario, scenario_samples in sorted(samples.items())
+            },
+        }
+        with open(options["output"], "w") as output:
+            json.dump(report, output, indent=2)
+
+        for scenario, summary in report["scenarios"].items():
+            self.stdout.write(
+                f"{scenario:14} p50={summary['p50_ms']:.2f}ms "
+                f"p95={summary['p95_ms']:.2f}ms "
+                f"p99={summary['p99_ms']:.2f}ms "
+                f"queries={summary['queries_per_request']:.1f}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Results written to {options['output']}")
+        )
+
+    @staticmethod
+    def rows_scanned():
+        """
+        Rows read from the tables of the primary and replicas so far, by
+        all sessions, so the database should be otherwise idle
+        """
+        aliases = [
+            alias
+            for alias in connections
+            if connections[alias].vendor == "postgresql"
+        ]
+        if not aliases:
+            return None
+        total = 0
+        for alias in aliases:
+            with connections[alias].cursor() as cursor:
+                if connections[alias].pg_version >= 150000:
+                    # Sessions otherwise report their counts up to a
+                    # second later
+                    cursor.execute("SELECT pg_stat_force_next_flush()")
+                cursor.execute("SELECT pg_stat_clear_snapshot()")
+                cursor.execute(ROWS_SCANNED_SQL)
+                total += cursor.fetchone()[0]
+        return total
+
+    def measure(self, scenario):
+        method, url, data = getattr(self, scenario)()
+        rows_before = self.rows_scanned()
+        # Reads of GET requests may go to replicas (see db_router)
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in connections
+            ]
+            started = time.perf_counter()
+            if method == "post":
+                response = self.client.post(url, data, format="json")
+            else:
+                response = self.client.get(url, data)
+            elapsed = time.perf_counter() - started
+        rows_after = self.rows_scanned()
+        if method == "post" and response.status_code == 201:
+            # Keep the dataset the same for the rest of the run
+            Order.objects.filter(id=response.data["id"]).delete()
+        return {
+            "ms": elapsed * 1000,
+            "queries": sum(len(queries) for queries in captured),
+            "rows_scanned": (
+                None if rows_before is None else rows_after - rows_before
+            ),
+            "status": response.status_code,
+        }
+
+    @staticmethod
+    def summarize(samples):
+        latencies = [sample["ms"] for sample in samples]
+        rows = [
+            sample["rows_scanned"]
+            for sample in samples
+            if sample["rows_scanned"] is not None
+        ]
+        return {
+            "count": len(samples),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": statistics.fmean(latencies),
+            "queries_per_request": statistics.fmean(
+                sample["queries"] for sample in samples
+            ),
+            "rows_scanned_per_request": (
+                statistics.fmean(rows) if rows else None
+            ),
+            "statuses": dict(
+                Counter(str(sample["status"]) for sample in samples)
+            ),
+        }
+
+    def flight_search(self):
+        params = {}
+        if self.cities and random.random() < 0.8:
+            params["source_city"] = random.choice(self.cities)
+        if self.cities and random.random() < 0.5:
+            params["destination_city"] = random.choice(self.cities)
+        if self.dates and random.random() < 0.5:
+            params["departure_date"] = random.choice(self.dates)
+        return "get", reverse("airport:flight-list"), params
+
+    def flight_detail(self):
+        return "get", reverse(
+            "airport:flight-detail", args=[random.choice(self.flight_ids)]
+        ), None
+
+    def ticket_list(self):
+        return "get", reverse("airport:ticket-list"), {
+            "offset": random.choice((0, 0, 10, 100, 1000)),
+        }
+
+    def order_create(self):
+        flight_id = random.choice(self.flight_ids)
+        row = random.randint(1, 20)
+        return "post", reverse("airport:order-list"), {
+            "tickets": [
+                {"row": row, "seat": seat, "flight": flight_id}
+                for seat in random.sample(range(1, 7), random.randint(1, 4))
+            ]
+        }
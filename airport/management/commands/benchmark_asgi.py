@@ -0,0 +1,217 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import (
+    ThreadSensitiveContext,
+    async_to_sync,
+    sync_to_async,
+)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.management.commands.benchmark_api import percentile
+from airport.models import Airport, Flight
+from airport.seed import seed_dataset
+
+SCENARIOS = ("flight_search", "flight_detail", "route_list", "airport_list")
+
+
+class Command(BaseCommand):
+    """Django command that compares the WSGI and ASGI read paths"""
+
+    help = (
+        "Replay the same flight search, flight detail, route list and "
+        "airport list requests through the sync (WSGI) views from a pool "
+        "of worker threads and through the async (ASGI) views from as "
+        "many concurrent tasks, and report throughput and latency as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="WSGI worker threads and concurrent ASGI requests",
+        )
+        parser.add_argument("--output", default="benchmark_asgi.json")
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Seed a dataset before the run",
+        )
+        parser.add_argument("--airports", type=int, default=1000)
+        parser.add_argument("--flights", type=int, default=10000)
+        parser.add_argument("--tickets", type=int, default=100000)
+        parser.add_argument("--random-seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        random.seed(options["random_seed"])
+        if options["seed"]:
+            self.stdout.write("Seeding dataset...")
+            seed_dataset(
+                airports=options["airports"],
+                flights=options["flights"],
+                tickets=options["tickets"],
+            )
+
+        flight_ids = list(Flight.objects.values_list("id", flat=True))
+        if not flight_ids:
+            raise CommandError("No flights, run with --seed first")
+        cities = list(
+            Airport.objects.values_list("closest_big_city", flat=True)
+            .distinct()[:500]
+        )
+        # Both paths replay the same requests in the same order
+        plan = [
+            self.plan_request(
+                random.choice(SCENARIOS), flight_ids, cities
+            )
+            for _ in range(options["requests"])
+        ]
+
+        user, _ = get_user_model().objects.get_or_create(
+            email="bench@example.com"
+        )
+        token = RefreshToken.for_user(user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+        throttle_classes = APIView.throttle_classes
+        APIView.throttle_classes = ()
+        try:
+            # AsyncClient always sends Host: testserver
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                results = {
+                    "wsgi": self.run_wsgi(plan, options["workers"]),
+                    "asgi": async_to_sync(self.run_asgi)(
+                        plan, options["workers"]
+                    ),
+                }
+        finally:
+            APIView.throttle_classes = throttle_classes
+
+        report = {
+            "created": datetime.now(dt_timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "workers": options["workers"],
+            "dataset": {
+                "airports": Airport.objects.count(),
+                "flights": len(flight_ids),
+            },
+            **results,
+        }
+        with open(options["output"], "w") as output:
+            json.dump(report, output, indent=2)
+
+        for mode in ("wsgi", "asgi"):
+            summary = report[mode]
+            self.stdout.write(
+                f"{mode} {summary['requests_per_second']:.1f} req/s "
+                f"p50={summary['p50_ms']:.2f}ms "
+                f"p95={summary['p95_ms']:.2f}ms "
+                f"p99={summary['p99_ms']:.2f}ms"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Results written to {options['output']}")
+        )
+
+    @staticmethod
+    def plan_request(scenario, flight_ids, cities):
+        """Return (URL name, URL args, query params) of one request"""
+        if scenario == "flight_detail":
+            return "flight-detail", [random.choice(flight_ids)], {}
+        if scenario == "flight_search":
+            params = {}
+            if cities and random.random() < 0.8:
+                params["source_city"] = random.choice(cities)
+            if cities and random.random() < 0.5:
+                params["destination_city"] = random.choice(cities)
+            return "flight-list", [], params
+        return f"{scenario.split('_')[0]}-list", [], {}
+
+    def run_wsgi(self, plan, workers):
+        def worker(requests):
+            client = Client()
+            samples = []
+            try:
+                for name, args, params in requests:
+                    started = time.perf_counter()
+                    response = client.get(
+                        reverse(f"airport:{name}", args=args),
+                        params,
+                        headers=self.headers,
+                    )
+                    samples.append((time.perf_counter() - started, response))
+                    close_old_connections()
+            finally:
+                connection.close()
+            return samples
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            samples = [
+                sample
+                for worker_samples in executor.map(
+                    worker, [plan[index::workers] for index in range(workers)]
+                )
+                for sample in worker_samples
+            ]
+        return self.summarize(samples, time.perf_counter() - started)
+
+    async def run_asgi(self, plan, workers):
+        async def worker(requests):
+            client = AsyncClient()
+            samples = []
+            for name, args, params in requests:
+                # A request context of its own, as ASGIHandler gives it
+                async with ThreadSensitiveContext():
+                    started = time.perf_counter()
+                    response = await client.get(
+                        reverse(f"airport:async-{name}", args=args),
+                        params,
+                        headers=self.headers,
+                    )
+                    samples.append((time.perf_counter() - started, response))
+                    await sync_to_async(close_old_connections)()
+            return samples
+
+        started = time.perf_counter()
+        worker_samples = await asyncio.gather(
+            *(worker(plan[index::workers]) for index in range(workers))
+        )
+        return self.summarize(
+            [sample for samples in worker_samples for sample in samples],
+            time.perf_counter() - started,
+        )
+
+    @staticmethod
+    def summarize(samples, elapsed):
+        latencies = [seconds * 1000 for seconds, _ in samples]
+        return {
+            "seconds": elapsed,
+            "requests_per_second": len(samples) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": statistics.fmean(latencies),
+            "statuses": dict(
+                Counter(str(response.status_code) for _, response in samples)
+            ),
+        }
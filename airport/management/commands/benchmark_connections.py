@@ -0,0 +1,189 @@
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.management.commands.benchmark_api import percentile
+from airport.models import Flight
+from airport.seed import seed_dataset
+from airport_api_service.db_pool import pool_stats, pooling_unavailable
+
+MODES = ("per_request", "persistent", "pool")
+
+
+class Command(BaseCommand):
+    """Django command that measures the connection cost of requests"""
+
+    help = (
+        "Replay the same flight detail requests with a new connection per "
+        "request (CONN_MAX_AGE=0), with persistent connections and with a "
+        "psycopg 3 pool, closing connections between requests as Django "
+        "does, and report the time spent connecting and the latency as "
+        "JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--output", default="benchmark_connections.json")
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Seed a dataset before the run",
+        )
+        parser.add_argument("--airports", type=int, default=100)
+        parser.add_argument("--flights", type=int, default=1000)
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument("--pool-size", type=int, default=4)
+        parser.add_argument("--random-seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        random.seed(options["random_seed"])
+        if options["seed"]:
+            self.stdout.write("Seeding dataset...")
+            seed_dataset(
+                airports=options["airports"],
+                flights=options["flights"],
+                tickets=options["tickets"],
+            )
+
+        flight_ids = list(Flight.objects.values_list("id", flat=True))
+        if not flight_ids:
+            raise CommandError("No flights, run with --seed first")
+        urls = [
+            reverse("airport:flight-detail", args=[random.choice(flight_ids)])
+            for _ in range(options["requests"])
+        ]
+
+        user, _ = get_user_model().objects.get_or_create(
+            email="bench@example.com"
+        )
+        token = RefreshToken.for_user(user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+        results = {}
+        throttle_classes = APIView.throttle_classes
+        APIView.throttle_classes = ()
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                for mode in MODES:
+                    skipped = self.skip_reason(mode)
+                    if skipped:
+                        self.stdout.write(f"{mode} skipped: {skipped}")
+                        results[mode] = None
+                        continue
+                    with self.connection_mode(mode, options["pool_size"]):
+                        results[mode] = self.run(urls)
+                        if mode == "pool":
+                            results[mode]["pool"] = pool_stats()[
+                                connection.alias
+                            ]
+        finally:
+            APIView.throttle_classes = throttle_classes
+
+        report = {
+            "created": datetime.now(dt_timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            **results,
+        }
+        with open(options["output"], "w") as output:
+            json.dump(report, output, indent=2)
+
+        for mode in MODES:
+            summary = report[mode]
+            if summary is None:
+                continue
+            self.stdout.write(
+                f"{mode:11} connects={summary['connects']} "
+                f"connect={summary['connect_ms_per_request']:.2f}ms/request "
+                f"p50={summary['p50_ms']:.2f}ms "
+                f"p95={summary['p95_ms']:.2f}ms"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Results written to {options['output']}")
+        )
+
+    @staticmethod
+    def skip_reason(mode):
+        if mode == "pool":
+            return pooling_unavailable(connection)
+        return None
+
+    @contextmanager
+    def connection_mode(self, mode, pool_size):
+        """Reconfigure the default connection for mode, then restore it"""
+        saved = {
+            key: connection.settings_dict[key]
+            for key in ("CONN_MAX_AGE", "OPTIONS")
+        }
+        options = {
+            key: value
+            for key, value in saved["OPTIONS"].items()
+            if key != "pool"
+        }
+        if mode == "pool":
+            options["pool"] = {"min_size": pool_size, "max_size": pool_size}
+        self.close(closing_pool=True)
+        connection.settings_dict.update(
+            CONN_MAX_AGE=600 if mode == "persistent" else 0,
+            OPTIONS=options,
+        )
+        try:
+            yield
+        finally:
+            self.close(closing_pool=mode == "pool")
+            connection.settings_dict.update(saved)
+
+    @staticmethod
+    def close(closing_pool):
+        connection.close()
+        if closing_pool and pooling_unavailable(connection) is None:
+            connection.close_pool()
+
+    def run(self, urls):
+        client = Client()
+        # Warm up, so the pool is open and the first connect not counted
+        connection.ensure_connection()
+        close_old_connections()
+
+        connects = 0
+        connect_seconds = 0.0
+        latencies = []
+        statuses = Counter()
+        for url in urls:
+            started = time.perf_counter()
+            # What the first query of a request does
+            if connection.connection is None:
+                connects += 1
+                connection.ensure_connection()
+                connect_seconds += time.perf_counter() - started
+            response = client.get(url, headers=self.headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(response.status_code)] += 1
+            # What request_finished does, Client skips it
+            close_old_connections()
+        return {
+            "connects": connects,
+            "connect_ms_per_request": connect_seconds * 1000 / len(urls),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": statistics.fmean(latencies),
+            "statuses": dict(statuses),
+        }
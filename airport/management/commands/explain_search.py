@@ -0,0 +1,118 @@
+import time
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Count, F
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.models import Flight, Ticket
+from airport.seed import seed_dataset
+from airport.views import FlightViewSet, TicketViewSet
+
+
+class Command(BaseCommand):
+    """Django command that prints flight/ticket search plans"""
+
+    help = (
+        "Compare query plans and timings of the legacy flight/ticket "
+        "search predicates with the indexed ones, optionally seeding data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Number of flights to seed before explaining",
+        )
+        parser.add_argument("--source-city", default="Kyiv")
+        parser.add_argument("--destination-city", default="Warsaw")
+        parser.add_argument("--date", default=None, help="%%Y-%%m-%%d")
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["seed"]:
+            self.seed(options["seed"])
+
+        date = options["date"] or (
+            Flight.objects.order_by("departure_time")
+            .values_list("departure_time", flat=True)
+            .first() or timezone.now()
+        ).strftime("%Y-%m-%d")
+        params = {
+            "departure_date": date,
+            "source_city": options["source_city"],
+            "destination_city": options["destination_city"],
+        }
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+
+        legacy_flights = (
+            Flight.objects.annotate(
+                tickets_available=F("airplane__rows")
+                * F("airplane__seats_in_row")
+                - Count("tickets")
+            )
+            .filter(
+                departure_time__date=day,
+                route__source__closest_big_city__icontains=(
+                    params["source_city"]
+                ),
+                route__destination__closest_big_city__icontains=(
+                    params["destination_city"]
+                ),
+            )
+            .order_by("id")
+            .distinct()
+        )
+        legacy_tickets = Ticket.objects.filter(
+            flight__route__source__closest_big_city__icontains=(
+                params["source_city"]
+            ),
+            flight__route__destination__closest_big_city__icontains=(
+                params["destination_city"]
+            ),
+        ).distinct()
+
+        self.explain("Flight search (before)", legacy_flights)
+        self.explain(
+            "Flight search (after)",
+            self.view_queryset(FlightViewSet, params),
+        )
+        self.explain("Ticket search (before)", legacy_tickets)
+        self.explain(
+            "Ticket search (after)",
+            self.view_queryset(TicketViewSet, params),
+        )
+
+    @staticmethod
+    def view_queryset(viewset_class, params):
+        request = APIRequestFactory().get("/", params)
+        view = viewset_class(
+            action="list", request=Request(request), format_kwarg=None
+        )
+        return view.get_queryset()
+
+    def explain(self, title, queryset):
+        options = {}
+        if connection.vendor == "postgresql":
+            options = {"analyze": True, "buffers": True}
+        started = time.perf_counter()
+        rows = len(queryset[:10])
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(queryset[:10].explain(**options))
+        self.stdout.write(f"{rows} row(s) in {elapsed:.2f} ms\n")
+
+    def seed(self, flights_count):
+        self.stdout.write(f"Seeding {flights_count} flights...")
+        seed_dataset(
+            airports=100,
+            airplanes=50,
+            flights=flights_count,
+            tickets=flights_count * 10,
+            crews=0,
+        )
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.export import EXPORT_FORMATS, export_lines, filter_manifest
+from airport.models import Ticket
+
+
+def parse_day(value):
+    return timezone.make_aware(datetime.strptime(value, "%Y-%m-%d"))
+
+
+class Command(BaseCommand):
+    """Django command that streams tickets or a flight manifest to a file"""
+
+    help = "Export tickets as CSV or NDJSON with constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=tuple(EXPORT_FORMATS), default="csv"
+        )
+        parser.add_argument("--flight", type=int, help="Flight ID")
+        parser.add_argument(
+            "--from", dest="departure_from", type=parse_day,
+            help="First departure day, %%Y-%%m-%%d",
+        )
+        parser.add_argument(
+            "--to", dest="departure_to", type=parse_day,
+            help="Last departure day (inclusive), %%Y-%%m-%%d",
+        )
+        parser.add_argument(
+            "--output", "-o", help="File to write, stdout by default"
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        departure_to = options["departure_to"]
+        queryset = filter_manifest(
+            Ticket.objects.all(),
+            flight=options["flight"],
+            departure_from=options["departure_from"],
+            departure_to=departure_to and departure_to + timedelta(days=1),
+        )
+        lines = export_lines(queryset, options["format"])
+
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        count = -1 if options["format"] == "csv" else 0
+        with open(options["output"], "w", newline="") as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Exported {count} ticket(s) to {options['output']}"
+            )
+        )
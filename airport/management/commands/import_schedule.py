@@ -0,0 +1,328 @@
+import csv
+import json
+import time
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.cache import bump_model_version
+from airport.itinerary import flight_index
+from airport.models import (
+    Airport,
+    Airplane,
+    Crew,
+    Flight,
+    FlightSearchIndex,
+    Route,
+)
+from airport.roster import CrewRoster, max_flight_duration
+from airport.rotation import (
+    CONTINUITY,
+    OVERLAP,
+    Leg,
+    check_rotations,
+    load_legs,
+)
+
+
+def read_rows(path):
+    """Yield schedule rows one by one from a CSV or JSON lines file"""
+    with open(path, newline="") as source:
+        if Path(path).suffix.lower() == ".csv":
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def parse_time(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"invalid datetime {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_crews(value):
+    if isinstance(value, list):
+        return [int(crew) for crew in value]
+    return [int(crew) for crew in (value or "").split(";") if crew.strip()]
+
+
+class Command(BaseCommand):
+    """Django command that bulk imports a flight schedule"""
+
+    help = (
+        "Import flights from CSV or JSON lines with columns source, "
+        "destination, airplane, departure_time, arrival_time and optional "
+        "distance and crews (';'-separated crew IDs). Airports and "
+        "airplanes are matched by name. Re-importing a row updates the "
+        "flight with the same airplane and departure time. Rows that "
+        "double-book an airplane are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to .csv or .jsonl file")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.airports = dict(Airport.objects.values_list("name", "id"))
+        self.airplanes = dict(Airplane.objects.values_list("name", "id"))
+        self.crews = set(Crew.objects.values_list("id", flat=True))
+        self.routes = {
+            (source_id, destination_id): route_id
+            for route_id, source_id, destination_id in (
+                Route.objects.order_by("-id")
+                .values_list("id", "source_id", "destination_id")
+            )
+        }
+        self.routes_created = 0
+
+        started = time.perf_counter()
+        rows = enumerate(read_rows(options["path"]), start=1)
+        imported = skipped = 0
+        while batch := list(islice(rows, options["batch_size"])):
+            batch_imported, batch_skipped = self.import_batch(batch)
+            imported += batch_imported
+            skipped += batch_skipped
+            elapsed = time.perf_counter() - started
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    f"{imported + skipped} rows, "
+                    f"{(imported + skipped) / elapsed:.0f} rows/sec"
+                )
+
+        if self.routes_created:
+            bump_model_version(Route)
+        bump_model_version(Flight)
+        flight_index.invalidate()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} flight(s), skipped {skipped}, "
+                f"created {self.routes_created} route(s) in {elapsed:.2f}s "
+                f"({(imported + skipped) / max(elapsed, 1e-9):.0f} rows/sec)"
+            )
+        )
+
+    def resolve(self, row):
+        source = self.airports.get(row["source"])
+        destination = self.airports.get(row["destination"])
+        airplane = self.airplanes.get(row["airplane"])
+        for value, column in (
+            (source, "source"),
+            (destination, "destination"),
+            (airplane, "airplane"),
+        ):
+            if value is None:
+                raise ValueError(f"unknown {column} {row[column]!r}")
+        crews = parse_crews(row.get("crews"))
+        unknown_crews = set(crews) - self.crews
+        if unknown_crews:
+            raise ValueError(f"unknown crews {sorted(unknown_crews)}")
+        departure_time = parse_time(row["departure_time"])
+        arrival_time = parse_time(row["arrival_time"])
+        # Roster and rotation windows only look max_flight_duration() back
+        duration = arrival_time - departure_time
+        if duration <= timedelta(0):
+            raise ValueError("arrival_time must be after departure_time")
+        if duration > max_flight_duration():
+            raise ValueError(
+                f"flights last at most {settings.FLIGHT_MAX_HOURS} hours"
+            )
+        return {
+            "route_key": (source, destination),
+            "distance": row.get("distance"),
+            "airplane_id": airplane,
+            "departure_time": departure_time,
+            "arrival_time": arrival_time,
+            "crews": crews,
+        }
+
+    def create_missing_routes(self, resolved):
+        missing = {}
+        for flight in resolved:
+            key = flight["route_key"]
+            if key not in self.routes and key not in missing:
+                if not flight["distance"]:
+                    raise CommandError(
+                        f"Route {key} does not exist, distance is required"
+                    )
+                missing[key] = Route(
+                    source_id=key[0],
+                    destination_id=key[1],
+                    distance=int(flight["distance"]),
+                )
+        Route.objects.bulk_create(missing.values())
+        for key, route in missing.items():
+            self.routes[key] = route.id
+        self.routes_created += len(missing)
+
+    @staticmethod
+    def delete_stale_crew_links(flights, resolved):
+        """Delete the crew links of upserted flights their rows dropped"""
+        crews = {
+            flight.id: set(row["crews"])
+            for flight, row in zip(flights, resolved)
+        }
+        flight_crew_model = Flight.crews.through
+        stale = [
+            link_id
+            for link_id, flight_id, crew_id in (
+                flight_crew_model.objects.filter(
+                    flight_id__in=crews
+                ).values_list("id", "flight_id", "crew_id")
+            )
+            if crew_id not in crews[flight_id]
+        ]
+        if stale:
+            flight_crew_model.objects.filter(id__in=stale).delete()
+
+    def crew_links(self, flights, resolved):
+        """(flight_id, crew_id) links of a batch that fit the crew rosters"""
+        assignments = [
+            (crew_id, flight.id, row["departure_time"], row["arrival_time"])
+            for flight, row in zip(flights, resolved)
+            for crew_id in row["crews"]
+        ]
+        if not assignments:
+            return []
+        roster = CrewRoster.load(
+            min(assignment[2] for assignment in assignments),
+            max(assignment[3] for assignment in assignments),
+            {assignment[0] for assignment in assignments},
+        )
+        rejected = set()
+        for conflict in roster.validate(assignments):
+            self.stderr.write(
+                f"Crew {conflict.crew_id} not assigned to flight "
+                f"{conflict.flight_id}: conflicts with flight "
+                f"{conflict.other_flight_id}"
+            )
+            rejected.add((conflict.flight_id, conflict.crew_id))
+        return [
+            (flight_id, crew_id)
+            for crew_id, flight_id, _, _ in assignments
+            if (flight_id, crew_id) not in rejected
+        ]
+
+    def rotation_checked(self, resolved):
+        """
+        Rows of a batch that do not double-book their airplanes. Rows
+        that break location continuity are kept with a warning, as the
+        rotation may be completed by a later batch or file.
+        """
+        if not resolved:
+            return resolved
+        legs = {
+            (leg.airplane_id, leg.departure_time): leg
+            for leg in load_legs(
+                {flight["airplane_id"] for flight in resolved},
+                min(flight["departure_time"] for flight in resolved),
+                max(flight["arrival_time"] for flight in resolved),
+            )
+        }
+        rows = {}
+        for flight in resolved:
+            key = (flight["airplane_id"], flight["departure_time"])
+            legs[key] = Leg(
+                None, *key, flight["arrival_time"], *flight["route_key"]
+            )
+            rows[key] = flight
+
+        def row_of(leg):
+            return rows.get((leg.airplane_id, leg.departure_time))
+
+        def describe(leg):
+            row = row_of(leg)
+            return f"row {row['line']}" if row else f"flight {leg.flight_id}"
+
+        rejected = set()
+        for kind, leg, other in check_rotations(legs.values()):
+            if kind != OVERLAP:
+                continue
+            if row_of(leg) is None:
+                leg, other = other, leg
+            key = (leg.airplane_id, leg.departure_time)
+            if key in rows and key not in rejected:
+                self.stderr.write(
+                    f"Row {rows[key]['line']} skipped: airplane "
+                    f"{leg.airplane_id} is on {describe(other)} at that time"
+                )
+                rejected.add(key)
+        for kind, leg, other in check_rotations(
+            leg for key, leg in legs.items() if key not in rejected
+        ):
+            if kind == CONTINUITY and (row_of(leg) or row_of(other)):
+                self.stderr.write(
+                    f"Warning: airplane {leg.airplane_id} departs "
+                    f"{describe(leg)} from airport {leg.source_id} after "
+                    f"arriving at airport {other.destination_id} with "
+                    f"{describe(other)}"
+                )
+        return [
+            flight
+            for key, flight in rows.items()
+            if key not in rejected
+        ]
+
+    def import_batch(self, batch):
+        resolved = {}
+        skipped = 0
+        for line, row in batch:
+            try:
+                flight = self.resolve(row)
+            except (KeyError, ValueError) as error:
+                self.stderr.write(f"Row {line} skipped: {error}")
+                skipped += 1
+                continue
+            flight["line"] = line
+            # A batch may upsert each (airplane, departure_time) only once
+            resolved[flight["airplane_id"], flight["departure_time"]] = flight
+        resolved = list(resolved.values())
+        checked = self.rotation_checked(resolved)
+        skipped += len(resolved) - len(checked)
+        resolved = checked
+
+        with transaction.atomic():
+            self.create_missing_routes(resolved)
+            flights = Flight.objects.bulk_create(
+                [
+                    Flight(
+                        route_id=self.routes[flight["route_key"]],
+                        airplane_id=flight["airplane_id"],
+                        departure_time=flight["departure_time"],
+                        arrival_time=flight["arrival_time"],
+                    )
+                    for flight in resolved
+                ],
+                update_conflicts=True,
+                unique_fields=["airplane", "departure_time"],
+                update_fields=["route", "arrival_time", "updated_at"],
+            )
+            # Before the rosters are loaded, so dropped duties don't clash
+            self.delete_stale_crew_links(flights, resolved)
+            flight_crew_model = Flight.crews.through
+            flight_crew_model.objects.bulk_create(
+                [
+                    flight_crew_model(flight_id=flight_id, crew_id=crew_id)
+                    for flight_id, crew_id in self.crew_links(
+                        flights, resolved
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+            FlightSearchIndex.refresh(
+                Flight.objects.filter(id__in=[flight.id for flight in flights])
+            )
+        return len(batch) - skipped, skipped
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models import Count
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.models import Flight, FlightSearchIndex, Ticket
+
+
+class Command(BaseCommand):
+    """Django command that checks and rebuilds Flight.tickets_sold counters"""
+
+    help = (
+        "Recount sold tickets per flight, fix drifted counters and "
+        "refresh the flight search index"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drifted counters, exit with error if any",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        with transaction.atomic():
+            sold = dict(
+                Ticket.objects.values_list("flight_id")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            flights = Flight.objects.select_for_update().only(
+                "id", "tickets_sold"
+            )
+            drifted = []
+            for flight in flights.iterator(chunk_size=2000):
+                actual = sold.get(flight.id, 0)
+                if flight.tickets_sold != actual:
+                    self.stdout.write(
+                        f"Flight {flight.id}: "
+                        f"counter {flight.tickets_sold}, actual {actual}"
+                    )
+                    flight.tickets_sold = actual
+                    flight.updated_at = timezone.now()
+                    drifted.append(flight)
+
+            if options["check"]:
+                if drifted:
+                    raise CommandError(
+                        f"{len(drifted)} flight counter(s) out of date"
+                    )
+                self.stdout.write(self.style.SUCCESS("Seat inventory is OK"))
+                return
+
+            Flight.objects.bulk_update(
+                drifted, ["tickets_sold", "updated_at"], batch_size=1000
+            )
+
+        # Every row, as loaded fixtures and other raw writes have none
+        indexed = FlightSearchIndex.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(drifted)} flight counter(s), "
+                f"indexed {indexed} flight(s)"
+            )
+        )
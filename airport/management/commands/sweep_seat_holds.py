@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.models import SeatHold
+
+
+class Command(BaseCommand):
+    """Django command that deletes expired seat holds in batches"""
+
+    help = "Delete expired seat holds"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        now = timezone.now()
+        deleted = 0
+        while True:
+            expired_ids = list(
+                SeatHold.objects.filter(expires_at__lte=now)
+                .values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not expired_ids:
+                break
+            deleted += SeatHold.objects.filter(id__in=expired_ids).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired seat hold(s)")
+        )
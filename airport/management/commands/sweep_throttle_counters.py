@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.models import ThrottleCounter
+
+
+class Command(BaseCommand):
+    """Django command that deletes expired throttle counters in batches"""
+
+    help = (
+        "Delete throttle counters of windows no request can read any more "
+        "(THROTTLE_STORE=database)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        now = timezone.now()
+        deleted = 0
+        while True:
+            expired_ids = list(
+                ThrottleCounter.objects.filter(expires_at__lt=now)
+                .values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not expired_ids:
+                break
+            deleted += ThrottleCounter.objects.filter(
+                id__in=expired_ids
+            ).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} expired throttle counter(s)"
+            )
+        )
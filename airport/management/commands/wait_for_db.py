@@ -1,9 +1,7 @@
-import time
-
-from django.db import connection
-from django.db.utils import OperationalError
 from django.core.management.base import BaseCommand
 
+from airport_api_service.db_pool import wait_for_database
+
 
 class Command(BaseCommand):
     """Django command that waits for database to be available"""
@@ -11,13 +9,10 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Handle the command"""
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
-            try:
-                connection.ensure_connection()
-                db_conn = True
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+        wait_for_database(
+            on_retry=lambda error: self.stdout.write(
+                "Database unavailable, waiting 1 second..."
+            )
+        )
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-18 17:59
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            sql='CREATE INDEX airport_city_upper_trgm_idx ON airport_airport '
+                'USING gin (UPPER("closest_big_city") gin_trgm_ops);',
+            reverse_sql='DROP INDEX airport_city_upper_trgm_idx;',
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['departure_time', 'id'], name='flight_departure_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['arrival_time'], name='flight_arrival_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['source', 'destination'], name='route_source_destination_idx'),
+        ),
+    ]
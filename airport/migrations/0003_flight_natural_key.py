@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0002_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='flight',
+            constraint=models.UniqueConstraint(fields=('airplane', 'departure_time'), name='unique_airplane_departure'),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_flight_search_index(apps, schema_editor):
+    # FlightSearchIndex.refresh() for the fields of this migration
+    Flight = apps.get_model('airport', 'Flight')
+    FlightSearchIndex = apps.get_model('airport', 'FlightSearchIndex')
+    last_id = 0
+    while True:
+        rows = {}
+        for (
+            flight_id,
+            source_name,
+            source_city,
+            destination_name,
+            destination_city,
+            departure_time,
+            arrival_time,
+            rows_count,
+            seats_in_row,
+            tickets_sold,
+            airplane_name,
+        ) in Flight.objects.filter(id__gt=last_id).order_by('id').values_list(
+            'id',
+            'route__source__name',
+            'route__source__closest_big_city',
+            'route__destination__name',
+            'route__destination__closest_big_city',
+            'departure_time',
+            'arrival_time',
+            'airplane__rows',
+            'airplane__seats_in_row',
+            'tickets_sold',
+            'airplane__name',
+        )[:5000]:
+            rows[flight_id] = FlightSearchIndex(
+                flight_id=flight_id,
+                source_city_norm=source_city.casefold(),
+                dest_city_norm=destination_city.casefold(),
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                departure_date=timezone.localdate(departure_time),
+                arrival_date=timezone.localdate(arrival_time),
+                seats_left=rows_count * seats_in_row - tickets_sold,
+                airplane_name=airplane_name,
+                route_label=(
+                    f'{source_name} ({source_city}) -> '
+                    f'{destination_name} ({destination_city})'
+                ),
+                crews=[],
+            )
+        if not rows:
+            break
+        for flight_id, first_name, last_name in (
+            Flight.crews.through.objects.filter(flight_id__in=rows)
+            .order_by('crew_id')
+            .values_list('flight_id', 'crew__first_name', 'crew__last_name')
+        ):
+            rows[flight_id].crews.append(f'{first_name} {last_name}')
+        FlightSearchIndex.objects.bulk_create(rows.values())
+        last_id = max(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0005_throttlecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightSearchIndex',
+            fields=[
+                ('flight', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='airport.flight')),
+                ('source_city_norm', models.CharField(max_length=100)),
+                ('dest_city_norm', models.CharField(max_length=100)),
+                ('departure_time', models.DateTimeField()),
+                ('arrival_time', models.DateTimeField()),
+                ('departure_date', models.DateField()),
+                ('arrival_date', models.DateField()),
+                ('seats_left', models.IntegerField()),
+                ('airplane_name', models.CharField(max_length=100)),
+                ('route_label', models.CharField(max_length=420)),
+                ('crews', models.JSONField(default=list)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['departure_date', 'flight'], name='flight_search_departure_idx'), models.Index(fields=['arrival_date', 'flight'], name='flight_search_arrival_idx'), models.Index(fields=['departure_time', 'flight'], name='flight_search_cursor_idx')],
+            },
+        ),
+        migrations.RunPython(
+            fill_flight_search_index, migrations.RunPython.noop
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX flight_search_source_trgm_idx '
+                'ON airport_flightsearchindex '
+                'USING gin ("source_city_norm" gin_trgm_ops);',
+            reverse_sql='DROP INDEX flight_search_source_trgm_idx;',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX flight_search_dest_trgm_idx '
+                'ON airport_flightsearchindex '
+                'USING gin ("dest_city_norm" gin_trgm_ops);',
+            reverse_sql='DROP INDEX flight_search_dest_trgm_idx;',
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-18 18:42
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def fill_fare_inputs(apps, schema_editor):
+    Flight = apps.get_model('airport', 'Flight')
+    FlightSearchIndex = apps.get_model('airport', 'FlightSearchIndex')
+    flights = Flight.objects.filter(id=OuterRef('flight_id'))
+    FlightSearchIndex.objects.update(
+        distance=Subquery(flights.values('route__distance')),
+        capacity=Subquery(
+            flights.annotate(
+                capacity=F('airplane__rows') * F('airplane__seats_in_row')
+            ).values('capacity')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airport', '0006_flightsearchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flightsearchindex',
+            name='capacity',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='flightsearchindex',
+            name='distance',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.RunPython(fill_fare_inputs, migrations.RunPython.noop),
+    ]
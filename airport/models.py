@@ -1,6 +1,8 @@
 from django.conf import settings
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import models, transaction
+from django.db.models import F, Q, UniqueConstraint
+from django.db.models.functions import Now
+from django.utils import timezone
 
 from rest_framework.exceptions import ValidationError
 
@@ -8,6 +10,7 @@ from rest_framework.exceptions import ValidationError
 class Airport(models.Model):
     name = models.CharField(max_length=100, unique=True)
     closest_big_city = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
 
     @property
     def full_name(self):
@@ -25,6 +28,15 @@ class Route(models.Model):
         Airport, on_delete=models.CASCADE, related_name="destination_route"
     )
     distance = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["source", "destination"],
+                name="route_source_destination_idx",
+            )
+        ]
 
     @property
     def name(self):
@@ -46,6 +58,44 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField("Crew", related_name="flights")
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_time", "id"],
+                name="flight_departure_time_idx",
+            ),
+            models.Index(
+                fields=["arrival_time"],
+                name="flight_arrival_time_idx",
+            ),
+        ]
+        constraints = [
+            UniqueConstraint(
+                fields=["airplane", "departure_time"],
+                name="unique_airplane_departure",
+            ),
+            # Roster and rotation searches rely on it (see airport.roster)
+            models.CheckConstraint(
+                condition=Q(arrival_time__gt=F("departure_time")),
+                name="flight_arrives_after_departure",
+            ),
+        ]
+
+    @staticmethod
+    def change_tickets_sold(flight_deltas):
+        """Apply {flight_id: delta} to the tickets_sold counters"""
+        for flight_id, delta in flight_deltas.items():
+            if delta:
+                now = timezone.now()
+                Flight.objects.filter(id=flight_id).update(
+                    tickets_sold=F("tickets_sold") + delta, updated_at=now
+                )
+                FlightSearchIndex.objects.filter(flight_id=flight_id).update(
+                    seats_left=F("seats_left") - delta, updated_at=now
+                )
 
     @property
     def name(self):
@@ -58,6 +108,7 @@ class Flight(models.Model):
 class Crew(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
 
     @property
     def name(self):
@@ -76,6 +127,7 @@ class Airplane(models.Model):
         on_delete=models.CASCADE,
         related_name="airplane_types"
     )
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
 
     @property
     def capacity(self) -> int:
@@ -87,6 +139,7 @@ class Airplane(models.Model):
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
 
     def __str__(self):
         return self.name
@@ -107,6 +160,15 @@ class Ticket(models.Model):
         blank=True,
         null=True
     )
+    # Fare paid, set when the ticket is bought through an order
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
 
     class Meta:
         constraints = [
@@ -141,6 +203,31 @@ class Ticket(models.Model):
             ValidationError,
         )
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self._state.adding:
+                old_flight_id = None
+            else:
+                old_flight_id = (
+                    Ticket.objects.filter(pk=self.pk)
+                    .values_list("flight_id", flat=True)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            if old_flight_id != self.flight_id:
+                deltas = {self.flight_id: 1}
+                if old_flight_id is not None:
+                    deltas[old_flight_id] = -1
+                Flight.change_tickets_sold(deltas)
+            self.touch_order()
+
+    def touch_order(self):
+        # Order responses list their tickets, keep their validators fresh
+        if self.order_id is not None:
+            Order.objects.filter(id=self.order_id).update(
+                updated_at=timezone.now()
+            )
+
     @property
     def taken_places(self):
         return f"row:{self.row} seat:{self.seat}"
@@ -164,6 +251,7 @@ class Order(models.Model):
         on_delete=models.CASCADE,
         related_name="orders"
     )
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
 
     @property
     def name(self):
@@ -171,3 +259,204 @@ class Order(models.Model):
 
     def __str__(self):
         return f"{self.user.email} ({self.created})"
+
+
+class SeatHold(models.Model):
+    flight = models.ForeignKey(
+        Flight,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["row", "seat", "flight"],
+                name="unique_seat_hold"
+            )
+        ]
+
+    @staticmethod
+    def active():
+        return SeatHold.objects.filter(expires_at__gt=timezone.now())
+
+    def __str__(self):
+        return (
+            f"{self.flight_id}: row:{self.row} seat:{self.seat} "
+            f"until {self.expires_at}"
+        )
+
+
+class ThrottleCounter(models.Model):
+    """Hits of one client in one window of a sliding-window throttle"""
+
+    key = models.CharField(max_length=255)
+    bucket = models.BigIntegerField()
+    hits = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["key", "bucket"],
+                name="unique_throttle_counter"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.key} #{self.bucket}: {self.hits}"
+
+
+def normalize_city(city):
+    """Case-insensitive form of a city stored and searched in the index"""
+    return city.casefold()
+
+
+class FlightSearchIndex(models.Model):
+    """
+    Denormalized flight list row for search without joins.
+
+    Rows are rebuilt by refresh() from signals on Flight, its crews,
+    airplane, route and airports, and seats_left follows tickets_sold.
+    Writes that skip signals (bulk_create, update, loaddata) must call
+    refresh(); rebuild() refreshes every flight, for the
+    backfill_flight_search_index and rebuild_seat_inventory commands.
+    """
+
+    flight = models.OneToOneField(
+        Flight,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_index",
+    )
+    source_city_norm = models.CharField(max_length=100)
+    dest_city_norm = models.CharField(max_length=100)
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+    departure_date = models.DateField()
+    arrival_date = models.DateField()
+    seats_left = models.IntegerField()
+    # Fare inputs besides seats_left
+    capacity = models.IntegerField(default=0)
+    distance = models.IntegerField(default=0)
+    airplane_name = models.CharField(max_length=100)
+    route_label = models.CharField(max_length=420)
+    crews = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
+
+    FLIGHT_FIELDS = (
+        "id",
+        "route__source__name",
+        "route__source__closest_big_city",
+        "route__destination__name",
+        "route__destination__closest_big_city",
+        "departure_time",
+        "arrival_time",
+        "airplane__rows",
+        "airplane__seats_in_row",
+        "tickets_sold",
+        "airplane__name",
+        "route__distance",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_date", "flight"],
+                name="flight_search_departure_idx",
+            ),
+            models.Index(
+                fields=["arrival_date", "flight"],
+                name="flight_search_arrival_idx",
+            ),
+            models.Index(
+                fields=["departure_time", "flight"],
+                name="flight_search_cursor_idx",
+            ),
+        ]
+
+    @classmethod
+    def refresh(cls, flights):
+        """Rebuild the index rows of a Flight queryset"""
+        rows = {}
+        for (
+            flight_id,
+            source_name,
+            source_city,
+            destination_name,
+            destination_city,
+            departure_time,
+            arrival_time,
+            rows_count,
+            seats_in_row,
+            tickets_sold,
+            airplane_name,
+            distance,
+        ) in flights.values_list(*cls.FLIGHT_FIELDS).order_by():
+            rows[flight_id] = cls(
+                flight_id=flight_id,
+                source_city_norm=normalize_city(source_city),
+                dest_city_norm=normalize_city(destination_city),
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                departure_date=timezone.localdate(departure_time),
+                arrival_date=timezone.localdate(arrival_time),
+                seats_left=rows_count * seats_in_row - tickets_sold,
+                capacity=rows_count * seats_in_row,
+                distance=distance,
+                airplane_name=airplane_name,
+                route_label=(
+                    f"{source_name} ({source_city}) -> "
+                    f"{destination_name} ({destination_city})"
+                ),
+                crews=[],
+            )
+        if not rows:
+            return 0
+
+        # Same order as the flight serializers: by crew id
+        for flight_id, first_name, last_name in (
+            Flight.crews.through.objects.filter(flight_id__in=rows)
+            .order_by("crew_id")
+            .values_list("flight_id", "crew__first_name", "crew__last_name")
+        ):
+            rows[flight_id].crews.append(f"{first_name} {last_name}")
+
+        cls.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=["flight"],
+            update_fields=[
+                field.name
+                for field in cls._meta.concrete_fields
+                if not field.primary_key
+            ],
+        )
+        return len(rows)
+
+    @classmethod
+    def rebuild(cls, batch_size=5000):
+        """Refresh the rows of all flights, a transaction per batch"""
+        indexed = 0
+        last_id = 0
+        while True:
+            flight_ids = list(
+                Flight.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not flight_ids:
+                return indexed
+            with transaction.atomic():
+                indexed += cls.refresh(
+                    Flight.objects.filter(id__in=flight_ids)
+                )
+            last_id = flight_ids[-1]
@@ -0,0 +1,107 @@
+from asgiref.sync import sync_to_async
+
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    page_size_query_param = "limit"
+    ordering = ("id",)
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    """LimitOffsetPagination with a variant for async views"""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        # Counted along with the view's validators (ConditionalGetMixin)
+        self.count = getattr(view, "queryset_count", None)
+        if self.count is None:
+            self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [
+            item
+            async for item in queryset[self.offset:self.offset + self.limit]
+        ]
+
+
+class LimitOffsetOrCursorPagination(AsyncLimitOffsetPagination):
+    """
+    Limit/offset pagination with opt-in keyset (cursor) mode.
+
+    Cursor mode is used for ?pagination=cursor and for the ?cursor= links
+    it returns. It orders by the view's cursor_ordering and does not run
+    COUNT(*), so deep pages cost the same as the first one.
+    """
+
+    mode_query_param = "pagination"
+    cursor_pagination_class = KeysetCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+        self.known_count = None
+
+    def get_count(self, queryset):
+        if self.known_count is not None:
+            return self.known_count
+        return super().get_count(queryset)
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            # Counted along with the view's validators (ConditionalGetMixin)
+            self.known_count = getattr(view, "queryset_count", None)
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.cursor_paginator.ordering = getattr(
+            view, "cursor_ordering", self.cursor_paginator.ordering
+        )
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            return await super().apaginate_queryset(queryset, request, view)
+        # CursorPagination has no async API, run it where the ORM would
+        return await sync_to_async(self.paginate_queryset)(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        cursor_parameters = [
+            parameter
+            for parameter in self.cursor_pagination_class()
+            .get_schema_operation_parameters(view)
+            if parameter["name"] != self.limit_query_param
+        ]
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'cursor' for keyset pagination "
+                               "without the total count.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+        ] + cursor_parameters
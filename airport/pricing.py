@@ -0,0 +1,92 @@
+"""
+Fares: a base fare from the route distance times a load-factor step.
+
+The base fare is FARE_BASE + FARE_PER_KM * distance. The multiplier
+steps up with the share of seats sold, like airline fare buckets:
+FARE_LOAD_FACTORS maps load factors to multipliers, and the multiplier
+of the highest load factor reached applies.
+
+quote_fares() prices a whole page of flights with one cache round trip.
+Quotes are cached for FARE_QUOTE_TIMEOUT seconds under a key that
+includes the seats sold, so every sale or refund invalidates the quote
+of its flight, while route or airplane edits apply once quotes expire.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+
+CENT = Decimal("0.01")
+
+
+def get_fare_cache():
+    return caches[getattr(settings, "FARE_CACHE_ALIAS", "default")]
+
+
+def base_fare(distance):
+    return Decimal(settings.FARE_BASE) + Decimal(
+        settings.FARE_PER_KM
+    ) * distance
+
+
+def load_multiplier(tickets_sold, capacity):
+    load_factor = tickets_sold / capacity if capacity else 1
+    multiplier = Decimal(1)
+    for threshold, step in sorted(settings.FARE_LOAD_FACTORS.items()):
+        if load_factor >= threshold:
+            multiplier = Decimal(step)
+    return multiplier
+
+
+def fare(distance, tickets_sold, capacity):
+    """Price of the next seat on a flight"""
+    return (
+        base_fare(distance) * load_multiplier(tickets_sold, capacity)
+    ).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def quote_key(flight_id, tickets_sold):
+    return f"airport:fare:{flight_id}:{tickets_sold}"
+
+
+def quote_fares(flights):
+    """
+    Return {flight_id: fare} of (flight_id, distance, tickets_sold,
+    capacity) tuples, from the cache where possible
+    """
+    flights = {
+        quote_key(flight_id, tickets_sold): (
+            flight_id, distance, tickets_sold, capacity
+        )
+        for flight_id, distance, tickets_sold, capacity in flights
+    }
+    if not flights:
+        return {}
+    cache = get_fare_cache()
+    cached = cache.get_many(flights)
+    missing = {
+        key: fare(*flight[1:])
+        for key, flight in flights.items()
+        if key not in cached
+    }
+    if missing:
+        cache.set_many(
+            missing, getattr(settings, "FARE_QUOTE_TIMEOUT", 60)
+        )
+    return {
+        flight[0]: cached.get(key, missing.get(key))
+        for key, flight in flights.items()
+    }
+
+
+def quote_flight_fares(flights):
+    """quote_fares() of Flight instances with route and airplane loaded"""
+    return quote_fares(
+        (
+            flight.id,
+            flight.route.distance,
+            flight.tickets_sold,
+            flight.airplane.capacity,
+        )
+        for flight in flights
+    )
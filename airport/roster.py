@@ -0,0 +1,169 @@
+"""
+Crew rosters: duty intervals per crew member and conflict checks.
+
+A duty is the [departure_time, arrival_time) window of a flight a crew
+member is assigned to, widened by CREW_MIN_REST_MINUTES on both sides
+when checked. CrewRoster keeps duties sorted by start per crew member
+and for the whole roster. No flight is longer than FLIGHT_MAX_HOURS, so
+duties overlapping a window [start, end) all start within
+[start - FLIGHT_MAX_HOURS, end): two bisects and a scan of the matches,
+whatever the number of crew members or duties.
+
+CrewRoster.load() reads the duties around a time window in one query,
+so whole schedule batches are validated without a query per assignment.
+"""
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+
+from airport.models import Flight
+
+Duty = namedtuple("Duty", ("start", "end", "flight_id", "crew_id"))
+Conflict = namedtuple("Conflict", ("crew_id", "flight_id", "other_flight_id"))
+
+
+def min_rest():
+    return timedelta(minutes=getattr(settings, "CREW_MIN_REST_MINUTES", 60))
+
+
+def max_flight_duration():
+    return timedelta(hours=getattr(settings, "FLIGHT_MAX_HOURS", 24))
+
+
+class DutyIndex:
+    """Duties sorted by start, searched for overlaps with bisect"""
+
+    def __init__(self):
+        self.starts = []
+        self.duties = []
+
+    def add(self, duty):
+        index = bisect_left(self.starts, duty.start)
+        self.starts.insert(index, duty.start)
+        self.duties.insert(index, duty)
+
+    def overlapping(self, start, end):
+        """Duties with start < end and end > start"""
+        first = bisect_left(self.starts, start - max_flight_duration())
+        last = bisect_left(self.starts, end, lo=first)
+        return [
+            duty for duty in self.duties[first:last] if duty.end > start
+        ]
+
+
+class CrewRoster:
+    """Duties of many crew members, indexed per member and as a whole"""
+
+    def __init__(self, duties=()):
+        self.by_crew = defaultdict(DutyIndex)
+        self.all = DutyIndex()
+        for duty in duties:
+            self.add(duty)
+
+    @classmethod
+    def load(cls, start, end, crew_ids=None):
+        """Roster of the duties that can conflict with [start, end)"""
+        rest = min_rest()
+        links = Flight.crews.through.objects.filter(
+            flight__departure_time__gte=start - rest - max_flight_duration(),
+            flight__departure_time__lt=end + rest,
+            flight__arrival_time__gt=start - rest,
+        )
+        if crew_ids is not None:
+            links = links.filter(crew_id__in=crew_ids)
+        return cls(
+            Duty(departure_time, arrival_time, flight_id, crew_id)
+            for flight_id, crew_id, departure_time, arrival_time in (
+                links.values_list(
+                    "flight_id",
+                    "crew_id",
+                    "flight__departure_time",
+                    "flight__arrival_time",
+                )
+            )
+        )
+
+    def add(self, duty):
+        self.by_crew[duty.crew_id].add(duty)
+        self.all.add(duty)
+
+    def conflicts(self, crew_id, start, end, flight_id=None):
+        """Duties of crew_id too close to [start, end), except flight_id"""
+        rest = min_rest()
+        if crew_id not in self.by_crew:
+            return []
+        return [
+            duty
+            for duty in self.by_crew[crew_id].overlapping(
+                start - rest, end + rest
+            )
+            if duty.flight_id != flight_id
+        ]
+
+    def busy_crews(self, start, end, flight_id=None):
+        """Crew ids with a duty too close to [start, end)"""
+        rest = min_rest()
+        return {
+            duty.crew_id
+            for duty in self.all.overlapping(start - rest, end + rest)
+            if duty.flight_id != flight_id
+        }
+
+    def validate(self, assignments):
+        """
+        Check (crew_id, flight_id, start, end) assignments against the
+        roster and each other, add the valid ones, return the conflicts
+        """
+        conflicts = []
+        for crew_id, flight_id, start, end in assignments:
+            clashes = self.conflicts(crew_id, start, end, flight_id)
+            conflicts.extend(
+                Conflict(crew_id, flight_id, duty.flight_id)
+                for duty in clashes
+            )
+            if not clashes:
+                self.add(Duty(start, end, flight_id, crew_id))
+        return conflicts
+
+
+def crew_schedule(crew_id, start=None, end=None):
+    """
+    Return the duties of a crew member from start to end as dicts with
+    the flight, its route and times, and the flights it conflicts with
+    """
+    flights = Flight.objects.filter(crews=crew_id)
+    if start is not None:
+        flights = flights.filter(arrival_time__gt=start)
+    if end is not None:
+        flights = flights.filter(departure_time__lt=end)
+    schedule = list(
+        flights.order_by("departure_time", "id").values(
+            "id",
+            "departure_time",
+            "arrival_time",
+            route_label=F("search_index__route_label"),
+        )
+    )
+    roster = CrewRoster(
+        Duty(
+            flight["departure_time"],
+            flight["arrival_time"],
+            flight["id"],
+            crew_id,
+        )
+        for flight in schedule
+    )
+    for flight in schedule:
+        flight["conflicts"] = [
+            duty.flight_id
+            for duty in roster.conflicts(
+                crew_id,
+                flight["departure_time"],
+                flight["arrival_time"],
+                flight["id"],
+            )
+        ]
+    return schedule
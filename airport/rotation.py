@@ -0,0 +1,112 @@
+"""
+Airplane rotations: double bookings and location continuity.
+
+A leg is a flight of an airplane from one airport to another. Sorted by
+departure, the legs of an airplane must not overlap, and each must leave
+from the airport the one before it arrived at. check_rotations() walks
+legs sorted by (airplane, departure) once, comparing each leg with the
+latest arriving leg before it, so a fleet is checked in linear time
+after the sort, which querysets leave to the database.
+
+load_legs() reads the legs of many airplanes around a time window and
+their neighbours outside it in one query, so flights and whole schedule
+batches are checked without a query per airplane.
+"""
+from collections import namedtuple
+
+from django.db.models import Max, Min, Q
+
+from airport.models import Flight
+from airport.roster import max_flight_duration
+
+Leg = namedtuple(
+    "Leg",
+    (
+        "flight_id",
+        "airplane_id",
+        "departure_time",
+        "arrival_time",
+        "source_id",
+        "destination_id",
+    ),
+)
+# leg departs before other (an earlier leg of the airplane) arrives, or
+# from an airport other than the one other arrives at
+Violation = namedtuple("Violation", ("kind", "leg", "other"))
+
+OVERLAP = "overlap"
+CONTINUITY = "continuity"
+
+
+def flight_legs(flights):
+    """Legs of a Flight queryset in (airplane, departure) order"""
+    return [
+        Leg(*values)
+        for values in flights.order_by(
+            "airplane_id", "departure_time", "id"
+        ).values_list(
+            "id",
+            "airplane_id",
+            "departure_time",
+            "arrival_time",
+            "route__source_id",
+            "route__destination_id",
+        )
+    ]
+
+
+def load_legs(airplane_ids, start, end):
+    """
+    Legs of the airplanes that can overlap [start, end), with the last
+    leg of each airplane before them and the first one after
+    """
+    flights = Flight.objects.filter(airplane_id__in=airplane_ids)
+    window_start = start - max_flight_duration()
+    before = (
+        flights.filter(departure_time__lt=window_start)
+        .values("airplane_id")
+        .annotate(last=Max("departure_time"))
+        .values("last")
+    )
+    after = (
+        flights.filter(departure_time__gte=end)
+        .values("airplane_id")
+        .annotate(first=Min("departure_time"))
+        .values("first")
+    )
+    return flight_legs(
+        flights.filter(
+            Q(departure_time__gte=window_start, departure_time__lt=end)
+            | Q(departure_time__in=before)
+            | Q(departure_time__in=after)
+        )
+    )
+
+
+def check_rotations(legs):
+    """Violations of legs of any number of airplanes, in leg order"""
+    violations = []
+    previous = None
+    for leg in sorted(
+        legs, key=lambda leg: (leg.airplane_id, leg.departure_time)
+    ):
+        if previous is None or previous.airplane_id != leg.airplane_id:
+            previous = leg
+            continue
+        if leg.departure_time < previous.arrival_time:
+            violations.append(Violation(OVERLAP, leg, previous))
+        elif leg.source_id != previous.destination_id:
+            violations.append(Violation(CONTINUITY, leg, previous))
+        if leg.arrival_time > previous.arrival_time:
+            previous = leg
+    return violations
+
+
+def fleet_violations(start=None, end=None):
+    """Violations across all airplanes of flights from start to end"""
+    flights = Flight.objects.all()
+    if start is not None:
+        flights = flights.filter(arrival_time__gt=start)
+    if end is not None:
+        flights = flights.filter(departure_time__lt=end)
+    return check_rotations(flight_legs(flights))
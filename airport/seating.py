@@ -0,0 +1,71 @@
+"""
+Seat allocation for orders that ask for "any N seats" on a flight.
+
+Unsold seats are not rows in the database, so there is nothing for
+SELECT ... FOR UPDATE SKIP LOCKED to skip. Instead every order locks the
+flight rows it books on, in id order, before inserting tickets. Orders
+for the same flight queue for a few milliseconds rather than racing for
+the same seat, and the lock is the one the tickets_sold update takes at
+the end of the transaction anyway, so nothing new can deadlock.
+"""
+from collections import defaultdict
+from itertools import chain, islice
+
+from django.db import connection
+
+from airport.models import Flight, SeatHold, Ticket
+
+
+def lock_flights(flight_ids):
+    """Lock the flights for the current transaction, return {id: flight}"""
+    flights = Flight.objects.select_related("airplane", "route").filter(
+        id__in=flight_ids
+    ).order_by("id")
+    if connection.features.has_select_for_update_of:
+        flights = flights.select_for_update(of=("self",))
+    else:
+        flights = flights.select_for_update()
+    return {flight.id: flight for flight in flights}
+
+
+def taken_seats(flight_ids, user=None):
+    """Return {flight_id: {(row, seat), ...}} of sold and held seats"""
+    holds = SeatHold.active().filter(flight_id__in=flight_ids)
+    if user is not None:
+        holds = holds.exclude(user=user)
+    taken = defaultdict(set)
+    for flight_id, row, seat in chain(
+        Ticket.objects.filter(flight_id__in=flight_ids).values_list(
+            "flight_id", "row", "seat"
+        ),
+        holds.values_list("flight_id", "row", "seat"),
+    ):
+        taken[flight_id].add((row, seat))
+    return taken
+
+
+def pick_seats(airplane, taken, count, together=False):
+    """
+    Return count free (row, seat) places from the front of the airplane,
+    all next to each other in one row if together is set, or None
+    """
+    if together:
+        for row in range(1, airplane.rows + 1):
+            run = []
+            for seat in range(1, airplane.seats_in_row + 1):
+                if (row, seat) in taken:
+                    run = []
+                    continue
+                run.append((row, seat))
+                if len(run) == count:
+                    return run
+        return None
+
+    free = (
+        (row, seat)
+        for row in range(1, airplane.rows + 1)
+        for seat in range(1, airplane.seats_in_row + 1)
+        if (row, seat) not in taken
+    )
+    seats = list(islice(free, count))
+    return seats if len(seats) == count else None
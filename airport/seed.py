@@ -0,0 +1,247 @@
+"""
+Bulk factories for benchmark datasets.
+
+The sample_* test helpers create one object per call, far too slow for
+thousands of flights and millions of tickets, so these write everything
+with bulk_create. Seeded schedules follow the rules the API enforces:
+airplanes fly on from where they landed and never overlap, and crews
+rest between duties (see airport.rotation and airport.roster), so
+benchmarks and query plans run on data the service could hold.
+"""
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from airport.models import (
+    Airport,
+    Airplane,
+    AirplaneType,
+    Crew,
+    Flight,
+    FlightSearchIndex,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.roster import max_flight_duration, min_rest
+
+CITIES = (
+    "Kyiv", "Lviv", "Odesa", "Warsaw", "Krakow", "Berlin", "Munich",
+    "Paris", "Lyon", "Madrid", "Barcelona", "Rome", "Milan", "Vienna",
+    "Prague", "Budapest", "London", "Dublin", "Lisbon", "Athens",
+)
+BATCH_SIZE = 5000
+
+
+def bulk_airports(count, prefix="Bench"):
+    return Airport.objects.bulk_create(
+        (
+            Airport(
+                name=f"{prefix} airport {index}",
+                closest_big_city=(
+                    f"{CITIES[index % len(CITIES)]}"
+                    f"{'' if index < len(CITIES) else f' {index}'}"
+                ),
+            )
+            for index in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def bulk_routes(airports, routes_per_airport=10):
+    return Route.objects.bulk_create(
+        (
+            Route(
+                source=source,
+                destination=destination,
+                distance=random.randint(200, 5000),
+            )
+            for source in airports
+            for destination in random.sample(
+                airports, min(routes_per_airport, len(airports))
+            )
+            if source != destination
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def bulk_airplanes(count, prefix="Bench"):
+    airplane_type = AirplaneType.objects.create(name=f"{prefix} type")
+    return Airplane.objects.bulk_create(
+        (
+            Airplane(
+                name=f"{prefix} airplane {index}",
+                rows=random.randint(20, 40),
+                seats_in_row=6,
+                airplane_type=airplane_type,
+            )
+            for index in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def bulk_crews(count):
+    return Crew.objects.bulk_create(
+        (
+            Crew(first_name=f"Pilot {index}", last_name="Bench")
+            for index in range(count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def bulk_flights(count, routes, airplanes, crews=(), crew_size=3):
+    """
+    Fly every airplane in turn, one leg per slot: slots are longer than
+    the longest flight plus a rest and the spread of departures, so no
+    two legs of a slot clash with the legs of the next. Each leg leaves
+    from the airport the previous one landed at, where routes allow.
+    Within a slot each crew flies at most one leg
+    """
+    start = timezone.now().replace(minute=0, second=0, microsecond=0)
+    spread = timedelta(hours=1)
+    slot = max_flight_duration() + max(min_rest(), spread) + spread
+    longest_hours = min(12, max(1, max_flight_duration() // spread))
+    routes_by_source = defaultdict(list)
+    for route in routes:
+        routes_by_source[route.source_id].append(route)
+    crew_size = min(crew_size, len(crews))
+    teams = [
+        crews[index:index + crew_size]
+        for index in range(0, len(crews) - crew_size + 1, crew_size)
+    ] if crew_size else []
+
+    flights, flight_teams, last_routes = [], [], {}
+    for batch_start in range(0, count, BATCH_SIZE):
+        batch = []
+        batch_end = min(count, batch_start + BATCH_SIZE)
+        for index in range(batch_start, batch_end):
+            leg, airplane_index = divmod(index, len(airplanes))
+            airplane = airplanes[airplane_index]
+            departure_time = start + leg * slot + timedelta(
+                minutes=airplane_index % 60
+            )
+            last_route = last_routes.get(airplane.id)
+            route = random.choice(
+                routes_by_source.get(last_route.destination_id, routes)
+                if last_route else routes
+            )
+            last_routes[airplane.id] = route
+            batch.append(
+                Flight(
+                    route=route,
+                    airplane=airplane,
+                    departure_time=departure_time,
+                    arrival_time=departure_time + timedelta(
+                        hours=random.randint(1, longest_hours)
+                    ),
+                )
+            )
+            # Teams rotate over the first len(teams) airplanes
+            flight_teams.append(
+                teams[(airplane_index + leg) % len(teams)]
+                if airplane_index < len(teams) else ()
+            )
+        flights.extend(Flight.objects.bulk_create(batch))
+
+    flight_crew_model = Flight.crews.through
+    flight_crew_model.objects.bulk_create(
+        (
+            flight_crew_model(flight_id=flight.id, crew_id=crew.id)
+            for flight, team in zip(flights, flight_teams)
+            for crew in team
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    index_flights(flights)
+    return flights
+
+
+def index_flights(flights):
+    """Refresh the search index rows bulk_create and bulk_update skip"""
+    flight_ids = [flight.id for flight in flights]
+    for start in range(0, len(flight_ids), BATCH_SIZE):
+        FlightSearchIndex.refresh(
+            Flight.objects.filter(id__in=flight_ids[start:start + BATCH_SIZE])
+        )
+
+
+def bulk_tickets(count, flights, user, tickets_per_order=4):
+    """Sell about count seats spread over flights, keeping counters right"""
+    airplanes = Airplane.objects.in_bulk(
+        {flight.airplane_id for flight in flights}
+    )
+    per_flight = max(1, count // len(flights))
+    orders, tickets = [], []
+    sold = 0
+
+    def flush():
+        Order.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+        for ticket in tickets:
+            ticket.order_id = ticket.order.id
+        Ticket.objects.bulk_create(tickets, batch_size=BATCH_SIZE)
+        orders.clear()
+        tickets.clear()
+
+    for flight in flights:
+        if sold >= count:
+            break
+        airplane = airplanes[flight.airplane_id]
+        seats = random.sample(
+            range(airplane.capacity),
+            min(per_flight, airplane.capacity, count - sold),
+        )
+        for index, seat in enumerate(seats):
+            if index % tickets_per_order == 0:
+                orders.append(Order(user=user))
+            tickets.append(
+                Ticket(
+                    flight=flight,
+                    order=orders[-1],
+                    row=seat // airplane.seats_in_row + 1,
+                    seat=seat % airplane.seats_in_row + 1,
+                )
+            )
+        flight.tickets_sold += len(seats)
+        sold += len(seats)
+        if len(tickets) >= BATCH_SIZE:
+            flush()
+    flush()
+
+    Flight.objects.bulk_update(
+        flights, ["tickets_sold"], batch_size=BATCH_SIZE
+    )
+    index_flights(flights)
+    return sold
+
+
+def seed_dataset(
+    airports=1000,
+    airplanes=200,
+    flights=10000,
+    tickets=100000,
+    crews=300,
+    prefix=None,
+):
+    """Create a consistent benchmark dataset and return its flights"""
+    prefix = prefix or f"Bench {Airport.objects.count()}"
+    with transaction.atomic():
+        airport_objects = bulk_airports(airports, prefix=prefix)
+        routes = bulk_routes(airport_objects)
+        airplane_objects = bulk_airplanes(airplanes, prefix=prefix)
+        crew_objects = bulk_crews(crews)
+        flight_objects = bulk_flights(
+            flights, routes, airplane_objects, crew_objects
+        )
+        user, _ = get_user_model().objects.get_or_create(
+            email="bench@example.com"
+        )
+        bulk_tickets(tickets, flight_objects, user)
+    return flight_objects
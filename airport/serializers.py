@@ -1,4 +1,13 @@
-from django.db import transaction
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
@@ -12,7 +21,121 @@ from airport.models import (
     Ticket,
     Order,
     Airplane,
+    SeatHold,
+)
+from airport.pricing import quote_fares, quote_flight_fares
+from airport.rotation import (
+    CONTINUITY,
+    OVERLAP,
+    Leg,
+    check_rotations,
+    load_legs,
 )
+from airport.roster import CrewRoster, max_flight_duration
+from airport.seating import lock_flights, pick_seats, taken_seats
+
+
+def seats_filter(seats, flight_field="flight_id"):
+    """Q matching exactly the given (flight_id, row, seat) places"""
+    return reduce(
+        or_,
+        (
+            Q(**{flight_field: flight_id}, row=row, seat=seat)
+            for flight_id, row, seat in seats
+        ),
+    )
+
+
+def format_taken_places(places):
+    taken = defaultdict(list)
+    for flight_id, row, seat in sorted(places):
+        taken[str(flight_id)].append(f"row:{row} seat:{seat}")
+    return dict(taken)
+
+
+def airport_name(prefix):
+    """Airport.__str__ computed by the database"""
+    return Concat(
+        F(f"{prefix}__name"),
+        Value(" ("),
+        F(f"{prefix}__closest_big_city"),
+        Value(")"),
+    )
+
+
+def route_name(prefix):
+    """Route.name computed by the database"""
+    return Concat(
+        airport_name(f"{prefix}__source"),
+        Value(" -> "),
+        airport_name(f"{prefix}__destination"),
+    )
+
+
+def flight_name(prefix):
+    """Flight.name computed by the database"""
+    return Concat(
+        route_name(f"{prefix}__route"),
+        Value(": "),
+        F(f"{prefix}__airplane__name"),
+    )
+
+
+class RowListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        rows = list(data)
+        self.child.add_related(rows)
+        return [self.child.to_representation(row) for row in rows]
+
+
+class RowSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer of .values() rows.
+
+    Model serializers build a model instance per row and format slugs
+    through chains of __str__ calls; these read only the columns they
+    need, with names concatenated by the database. rows() turns a
+    queryset into such rows, add_related() loads to-many data for a page
+    of rows at once. The JSON is the same as the model serializer's.
+    """
+
+    row_fields = ()
+    row_expressions = {}
+    datetime_field = serializers.DateTimeField()
+    price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        list_serializer_class = RowListSerializer
+
+    @classmethod
+    def rows(cls, queryset):
+        return queryset.prefetch_related(None).values(
+            *cls.row_fields, **cls.row_expressions
+        )
+
+    def add_related(self, rows):
+        pass
+
+    def format_datetime(self, value):
+        return self.datetime_field.to_representation(value)
+
+    def format_price(self, value):
+        if value is None:
+            return None
+        return self.price_field.to_representation(value)
+
+
+class FareField(serializers.DecimalField):
+    """Fare of the next seat of a Flight with route and airplane loaded"""
+
+    def __init__(self, **kwargs):
+        kwargs.update(source="*", read_only=True)
+        super().__init__(max_digits=10, decimal_places=2, **kwargs)
+
+    def to_representation(self, flight):
+        return super().to_representation(
+            quote_flight_fares([flight])[flight.id]
+        )
 
 
 class AirportSerializer(serializers.ModelSerializer):
@@ -55,6 +178,7 @@ class CrewSerializer(serializers.ModelSerializer):
 
 class FlightSerializer(serializers.ModelSerializer):
     tickets_available = serializers.IntegerField(read_only=True)
+    price = FareField()
 
     class Meta:
         model = Flight
@@ -66,8 +190,101 @@ class FlightSerializer(serializers.ModelSerializer):
             "arrival_time",
             "crews",
             "tickets_available",
+            "price",
         )
 
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        departure_time = attrs.get("departure_time")
+        arrival_time = attrs.get("arrival_time")
+        if departure_time is None or arrival_time is None:
+            return data
+        if arrival_time <= departure_time:
+            raise ValidationError(
+                {"arrival_time": "Flights must arrive after they depart"}
+            )
+        if arrival_time - departure_time > max_flight_duration():
+            raise ValidationError(
+                {
+                    "arrival_time": f"Flights last at most "
+                                    f"{settings.FLIGHT_MAX_HOURS} hours"
+                }
+            )
+        flight_id = getattr(self.instance, "id", None)
+        route = attrs.get("route")
+        airplane = attrs.get("airplane")
+        if route is not None and airplane is not None:
+            self.validate_rotation(
+                Leg(
+                    flight_id,
+                    airplane.id,
+                    departure_time,
+                    arrival_time,
+                    route.source_id,
+                    route.destination_id,
+                )
+            )
+        crews = attrs.get("crews", [])
+        if crews:
+            conflicts = CrewRoster.load(
+                departure_time, arrival_time, [crew.id for crew in crews]
+            ).validate(
+                (crew.id, flight_id, departure_time, arrival_time)
+                for crew in crews
+            )
+            if conflicts:
+                raise ValidationError(
+                    {
+                        "crews": [
+                            f"Crew {conflict.crew_id} is on flight "
+                            f"{conflict.other_flight_id} less than "
+                            f"{settings.CREW_MIN_REST_MINUTES} minutes "
+                            f"away"
+                            for conflict in conflicts
+                        ]
+                    }
+                )
+        return data
+
+    @staticmethod
+    def validate_rotation(new_leg):
+        legs = [
+            leg
+            for leg in load_legs(
+                [new_leg.airplane_id],
+                new_leg.departure_time,
+                new_leg.arrival_time,
+            )
+            if leg.flight_id != new_leg.flight_id
+        ]
+        for kind, leg, other in check_rotations(legs + [new_leg]):
+            if leg is new_leg:
+                neighbour = other
+                position = "before"
+            elif other is new_leg:
+                neighbour = leg
+                position = "after"
+            else:
+                continue
+            if kind == OVERLAP:
+                raise ValidationError(
+                    {
+                        "departure_time": f"Airplane is on flight "
+                                          f"{neighbour.flight_id} at "
+                                          f"that time"
+                    }
+                )
+            airport = (
+                other.destination_id if leg is new_leg else leg.source_id
+            )
+            raise ValidationError(
+                {
+                    "route": f"Airplane is at airport {airport} with "
+                             f"flight {neighbour.flight_id} {position} "
+                             f"this flight"
+                }
+            )
+
 
 class FlightListSerializer(FlightSerializer):
     route = serializers.SlugRelatedField(slug_field="name", read_only=True)
@@ -79,6 +296,48 @@ class FlightListSerializer(FlightSerializer):
     )
 
 
+class FlightListRowSerializer(RowSerializer):
+    """FlightListSerializer output from FlightSearchIndex rows"""
+
+    row_fields = (
+        "flight_id",
+        "route_label",
+        "airplane_name",
+        "departure_time",
+        "arrival_time",
+        "crews",
+        "seats_left",
+        "capacity",
+        "distance",
+    )
+
+    def add_related(self, rows):
+        # One cache round trip prices the whole page
+        fares = quote_fares(
+            (
+                row["flight_id"],
+                row["distance"],
+                row["capacity"] - row["seats_left"],
+                row["capacity"],
+            )
+            for row in rows
+        )
+        for row in rows:
+            row["price"] = fares[row["flight_id"]]
+
+    def to_representation(self, row):
+        return {
+            "id": row["flight_id"],
+            "route": row["route_label"],
+            "airplane": row["airplane_name"],
+            "departure_time": self.format_datetime(row["departure_time"]),
+            "arrival_time": self.format_datetime(row["arrival_time"]),
+            "crews": row["crews"],
+            "tickets_available": row["seats_left"],
+            "price": self.format_price(row["price"]),
+        }
+
+
 class FlightDetailSerializer(FlightListSerializer):
     taken_places = serializers.SlugRelatedField(
         source="tickets", many=True, read_only=True, slug_field="taken_places"
@@ -94,10 +353,81 @@ class FlightDetailSerializer(FlightListSerializer):
             "arrival_time",
             "crews",
             "tickets_available",
+            "price",
             "taken_places",
         )
 
 
+class CrewScheduleQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(
+        required=False, help_text="Defaults to now"
+    )
+    end = serializers.DateTimeField(required=False)
+
+
+class CrewDutySerializer(serializers.Serializer):
+    flight = serializers.IntegerField(source="id")
+    route = serializers.CharField(source="route_label")
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    conflicts = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Flights of the same crew member too close to this one",
+    )
+
+
+class AvailableCrewQuerySerializer(serializers.Serializer):
+    flight = serializers.IntegerField()
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class FlightSeatMapSerializer(serializers.Serializer):
+    rows = serializers.IntegerField(read_only=True)
+    seats_in_row = serializers.IntegerField(read_only=True)
+    seatmap = serializers.CharField(read_only=True)
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source_city = serializers.CharField()
+    destination_city = serializers.CharField()
+    departure_date = serializers.DateField(required=False)
+    min_layover = serializers.IntegerField(
+        min_value=0, default=45, help_text="Minutes"
+    )
+    max_layover = serializers.IntegerField(
+        min_value=0, default=720, help_text="Minutes"
+    )
+    max_legs = serializers.IntegerField(min_value=1, max_value=5, default=3)
+    order_by = serializers.ChoiceField(
+        choices=("duration", "distance"), default="duration"
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
+
+    def validate(self, attrs):
+        if attrs["min_layover"] > attrs["max_layover"]:
+            raise ValidationError(
+                {"min_layover": "min_layover must not exceed max_layover"}
+            )
+        return attrs
+
+
+class ItineraryLegSerializer(serializers.Serializer):
+    flight = serializers.IntegerField()
+    source = serializers.CharField()
+    destination = serializers.CharField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    distance = serializers.IntegerField()
+
+
+class ItinerarySerializer(serializers.Serializer):
+    legs = ItineraryLegSerializer(many=True)
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration = serializers.DurationField()
+    distance = serializers.IntegerField()
+
+
 class AirplaneSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airplane
@@ -118,6 +448,25 @@ class AirplaneListSerializer(AirplaneSerializer):
     )
 
 
+class RotationQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(
+        required=False, help_text="Defaults to now"
+    )
+    end = serializers.DateTimeField(required=False)
+
+
+class RotationViolationSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(
+        choices=(OVERLAP, CONTINUITY),
+        help_text="overlap: the flight departs before the previous one "
+                  "arrives; continuity: it departs from another airport "
+                  "than the previous one arrived at",
+    )
+    airplane = serializers.IntegerField(source="leg.airplane_id")
+    flight = serializers.IntegerField(source="leg.flight_id")
+    previous_flight = serializers.IntegerField(source="other.flight_id")
+
+
 class AirplaneTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = AirplaneType
@@ -137,7 +486,7 @@ class TicketSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ticket
-        fields = ("id", "row", "seat", "flight", "order")
+        fields = ("id", "row", "seat", "flight", "order", "price")
 
 
 class TicketListSerializer(TicketSerializer):
@@ -145,19 +494,301 @@ class TicketListSerializer(TicketSerializer):
     order = serializers.SlugRelatedField(slug_field="name", read_only=True)
 
 
+class TicketListRowSerializer(RowSerializer):
+    """TicketListSerializer output from TicketListRowSerializer.rows()"""
+
+    row_fields = ("id", "row", "seat", "order_id", "price")
+    row_expressions = {
+        "flight_name": flight_name("flight"),
+        "order_created": F("order__created"),
+        "order_email": F("order__user__email"),
+    }
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "row": row["row"],
+            "seat": row["seat"],
+            "flight": row["flight_name"],
+            "order": (
+                None
+                if row["order_id"] is None
+                else f"{row['order_email']}: "
+                     f"{row['order_created'].isoformat()}"
+            ),
+            "price": self.format_price(row["price"]),
+        }
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "row", "seat", "expires_at")
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+    minutes = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.SEAT_HOLD_MAX_MINUTES,
+        default=settings.SEAT_HOLD_MINUTES,
+    )
+
+    def validate(self, attrs):
+        airplane = self.context["flight"].airplane
+        for seat in attrs["seats"]:
+            Ticket.validate_ticket(
+                seat["row"], seat["seat"], airplane, ValidationError
+            )
+        return attrs
+
+    def create(self, validated_data):
+        flight = self.context["flight"]
+        user = validated_data["user"]
+        places = {
+            (flight.id, seat["row"], seat["seat"])
+            for seat in validated_data["seats"]
+        }
+        expires_at = timezone.now() + timedelta(
+            minutes=validated_data["minutes"]
+        )
+        with transaction.atomic():
+            holds = SeatHold.objects.filter(seats_filter(places))
+            # Expired holds and the user's own holds are replaced
+            holds.filter(
+                Q(expires_at__lte=timezone.now()) | Q(user=user)
+            ).delete()
+            taken = set(
+                Ticket.objects.filter(seats_filter(places)).values_list(
+                    "flight_id", "row", "seat"
+                )
+            ) | set(holds.values_list("flight_id", "row", "seat"))
+            if taken:
+                raise ValidationError(
+                    {"taken_places": format_taken_places(taken)}
+                )
+            try:
+                with transaction.atomic():
+                    return SeatHold.objects.bulk_create(
+                        SeatHold(
+                            flight=flight,
+                            row=row,
+                            seat=seat,
+                            user=user,
+                            expires_at=expires_at,
+                        )
+                        for _, row, seat in places
+                    )
+            except IntegrityError:
+                raise ValidationError(
+                    {
+                        "taken_places": format_taken_places(
+                            holds.values_list("flight_id", "row", "seat")
+                        )
+                    }
+                )
+
+
+class TicketExportSerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(
+        choices=("csv", "ndjson"), default="csv"
+    )
+    flight = serializers.IntegerField(required=False)
+    departure_from = serializers.DateField(required=False)
+    departure_to = serializers.DateField(
+        required=False, help_text="Inclusive"
+    )
+
+
+class OrderTicketSerializer(TicketSerializer):
+    """Ticket inside an order, validated in bulk by OrderSerializer"""
+
+    flight = serializers.IntegerField(source="flight_id")
+    order = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    def validate(self, attrs):
+        return attrs
+
+    class Meta(TicketSerializer.Meta):
+        validators = []
+
+
+class AutoAssignSerializer(serializers.Serializer):
+    """Request for any count free seats on a flight"""
+
+    flight = serializers.IntegerField()
+    count = serializers.IntegerField(min_value=1)
+    together = serializers.BooleanField(
+        default=False, help_text="All seats next to each other in one row"
+    )
+
+
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = OrderTicketSerializer(
+        many=True, read_only=False, allow_empty=False, required=False
+    )
+    auto_assign = AutoAssignSerializer(
+        many=True, write_only=True, allow_empty=False, required=False
+    )
 
     class Meta:
         model = Order
-        fields = ("id", "created", "tickets")
+        fields = ("id", "created", "tickets", "auto_assign")
+
+    @staticmethod
+    def taken_places(tickets_data, user=None):
+        """Return {flight_id: ["row:X seat:Y", ...]} of clashing seats"""
+        places = Counter(
+            (ticket["flight_id"], ticket["row"], ticket["seat"])
+            for ticket in tickets_data
+        )
+        places.update(
+            Ticket.objects.filter(seats_filter(places)).values_list(
+                "flight_id", "row", "seat"
+            )
+        )
+        held_by_others = SeatHold.active().filter(seats_filter(places))
+        if user is not None:
+            held_by_others = held_by_others.exclude(user=user)
+        places.update(
+            held_by_others.values_list("flight_id", "row", "seat")
+        )
+        return format_taken_places(
+            place for place, count in places.items() if count > 1
+        )
+
+    @property
+    def request_user(self):
+        return getattr(self.context.get("request"), "user", None)
+
+    def validate(self, attrs):
+        data = super(OrderSerializer, self).validate(attrs=attrs)
+        tickets_data = attrs.get("tickets", [])
+        seat_requests = attrs.get("auto_assign", [])
+        if not tickets_data and not seat_requests:
+            raise ValidationError(
+                {"tickets": "Pick seats or ask to auto_assign them."}
+            )
+        flight_ids = [ticket["flight_id"] for ticket in tickets_data]
+        flight_ids += [request["flight"] for request in seat_requests]
+        flights = Flight.objects.select_related("airplane").in_bulk(
+            set(flight_ids)
+        )
+        missing = [
+            flight_id for flight_id in flight_ids if flight_id not in flights
+        ]
+        if missing:
+            raise ValidationError(
+                {"flight": f"Invalid pk \"{missing[0]}\" - "
+                           f"object does not exist."}
+            )
+        for ticket in tickets_data:
+            Ticket.validate_ticket(
+                ticket["row"],
+                ticket["seat"],
+                flights[ticket["flight_id"]].airplane,
+                ValidationError
+            )
+        for request in seat_requests:
+            airplane = flights[request["flight"]].airplane
+            limit = (
+                airplane.seats_in_row
+                if request["together"]
+                else airplane.capacity
+            )
+            if request["count"] > limit:
+                raise ValidationError(
+                    {
+                        "auto_assign": f"At most {limit} seats can be "
+                                       f"assigned on flight "
+                                       f"{request['flight']}"
+                    }
+                )
+
+        taken_places = tickets_data and self.taken_places(
+            tickets_data, self.request_user
+        )
+        if taken_places:
+            raise ValidationError({"taken_places": taken_places})
+        return data
+
+    @staticmethod
+    def assign_seats(seat_requests, flights, tickets_data, user):
+        """Pick free seats for auto_assign requests on locked flights"""
+        taken = taken_seats(list(flights), user)
+        for ticket in tickets_data:
+            taken[ticket["flight_id"]].add((ticket["row"], ticket["seat"]))
+        assigned = []
+        for request in seat_requests:
+            flight = flights[request["flight"]]
+            seats = pick_seats(
+                flight.airplane,
+                taken[flight.id],
+                request["count"],
+                request["together"],
+            )
+            if seats is None:
+                raise ValidationError(
+                    {
+                        "auto_assign": f"Not enough free seats on flight "
+                                       f"{flight.id}"
+                    }
+                )
+            taken[flight.id].update(seats)
+            assigned.extend(
+                {"flight_id": flight.id, "row": row, "seat": seat}
+                for row, seat in seats
+            )
+        return assigned
 
     def create(self, validated_data):
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
+            tickets_data = validated_data.pop("tickets", [])
+            seat_requests = validated_data.pop("auto_assign", [])
+            flights = lock_flights(
+                {ticket["flight_id"] for ticket in tickets_data}
+                | {request["flight"] for request in seat_requests}
+            )
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            if seat_requests:
+                tickets_data = tickets_data + self.assign_seats(
+                    seat_requests, flights, tickets_data, order.user
+                )
+            # Priced at the seat count the flight locks have frozen
+            fares = quote_flight_fares(flights.values())
+            try:
+                with transaction.atomic():
+                    Ticket.objects.bulk_create(
+                        Ticket(
+                            order=order,
+                            price=fares[ticket_data["flight_id"]],
+                            **ticket_data,
+                        )
+                        for ticket_data in tickets_data
+                    )
+            except IntegrityError:
+                taken_places = self.taken_places(
+                    tickets_data, self.request_user
+                )
+                if not taken_places:
+                    raise
+                raise ValidationError({"taken_places": taken_places})
+            # Seats held by the buyer become tickets, so drop their holds
+            SeatHold.objects.filter(
+                seats_filter(
+                    (ticket["flight_id"], ticket["row"], ticket["seat"])
+                    for ticket in tickets_data
+                ),
+                user=order.user,
+            ).delete()
+            Flight.change_tickets_sold(
+                Counter(ticket["flight_id"] for ticket in tickets_data)
+            )
             return order
 
 
@@ -172,3 +803,34 @@ class OrderListSerializer(OrderSerializer):
     class Meta:
         model = Order
         fields = ("id", "created", "user", "tickets")
+
+
+class OrderListRowSerializer(RowSerializer):
+    """OrderListSerializer output from OrderListRowSerializer.rows()"""
+
+    row_fields = ("id", "created")
+    row_expressions = {"email": F("user__email")}
+
+    def add_related(self, rows):
+        tickets = defaultdict(list)
+        for order_id, row, seat, name in (
+            Ticket.objects.filter(order_id__in=[row["id"] for row in rows])
+            .order_by("id")
+            .values_list("order_id", "row", "seat", flight_name("flight"))
+        ):
+            tickets[order_id].append((name, row, seat))
+        for order in rows:
+            order["tickets"] = [
+                f"{name}: {order['email']} ({order['created']}) "
+                f"(row:{row} seats:{seat})"
+                for name, row, seat in tickets[order["id"]]
+            ]
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "created": self.format_datetime(row["created"]),
+            # The user model has no username, so the slug is always null
+            "user": None,
+            "tickets": row["tickets"],
+        }
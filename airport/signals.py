@@ -0,0 +1,177 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from airport.cache import bump_model_version
+from airport.itinerary import flight_index
+from airport.models import (
+    Airport,
+    AirplaneType,
+    Airplane,
+    Route,
+    Crew,
+    Flight,
+    FlightSearchIndex,
+    Order,
+    Ticket,
+)
+
+REFERENCE_MODELS = (Airport, AirplaneType, Airplane, Route, Crew)
+
+
+def invalidate_reference_cache(sender, **kwargs):
+    """
+    Bump the cache version of reference models on admin or API edits.
+    Once they commit: bumped earlier, a concurrent miss could cache the
+    rows before the edit under the new version
+    """
+    transaction.on_commit(lambda: bump_model_version(sender))
+
+
+# Connected per model: a sender-less post_delete receiver would disable
+# fast (single query) deletes for every model
+for reference_model in REFERENCE_MODELS:
+    post_save.connect(invalidate_reference_cache, sender=reference_model)
+    post_delete.connect(invalidate_reference_cache, sender=reference_model)
+
+# Ticket and order responses name their flights, so their ETags include
+# the Flight version (see ConditionalGetMixin)
+post_save.connect(invalidate_reference_cache, sender=Flight)
+post_delete.connect(invalidate_reference_cache, sender=Flight)
+
+
+class SeatRelease:
+    """Seats given back by one delete() call, applied in one go"""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.pending = 0
+        self.flight_deltas = Counter()
+        self.order_ids = set()
+
+    def add(self, ticket):
+        self.pending += 1
+        self.flight_deltas[ticket.flight_id] -= 1
+        if ticket.order_id is not None:
+            self.order_ids.add(ticket.order_id)
+
+    def apply(self):
+        Flight.change_tickets_sold(self.flight_deltas)
+        # What Ticket.touch_order() does, for all orders at once
+        if self.order_ids:
+            Order.objects.filter(id__in=self.order_ids).update(
+                updated_at=timezone.now()
+            )
+
+
+# {id(origin): SeatRelease} of the deletes in progress, origin being the
+# instance or queryset delete() was called on
+seat_releases = {}
+
+
+@receiver(pre_delete, sender=Ticket)
+def collect_ticket_seat(sender, instance, origin=None, **kwargs):
+    """
+    Receivers rather than Ticket.delete() so cascades (orders, flights,
+    users) and queryset deletes, which skip model delete(), are counted
+    too. A delete sends every pre_delete before its post_deletes, so
+    the seats are collected here and released once, after the last
+    ticket, with one update per flight instead of per ticket
+    """
+    release = seat_releases.get(id(origin))
+    if release is None or release.origin is not origin:
+        release = seat_releases[id(origin)] = SeatRelease(origin)
+    release.add(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, origin=None, **kwargs):
+    release = seat_releases.get(id(origin))
+    if release is None or release.origin is not origin:
+        # Not collected by pre_delete, release this seat alone
+        release = SeatRelease(origin)
+        release.add(instance)
+    release.pending -= 1
+    if release.pending == 0:
+        seat_releases.pop(id(origin), None)
+        release.apply()
+
+
+@receiver(post_save, sender=Flight)
+def update_flight_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: flight_index.update_flight(instance.id))
+
+
+@receiver(post_delete, sender=Flight)
+def remove_from_flight_index(sender, instance, **kwargs):
+    flight_id = instance.id
+    transaction.on_commit(lambda: flight_index.remove_flight(flight_id))
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Route)
+@receiver(post_delete, sender=Airport)
+def invalidate_flight_index(sender, **kwargs):
+    transaction.on_commit(flight_index.invalidate)
+
+
+@receiver(post_save, sender=Flight)
+def index_flight(sender, instance, raw=False, **kwargs):
+    if not raw:
+        FlightSearchIndex.refresh(Flight.objects.filter(id=instance.id))
+
+
+@receiver(m2m_changed, sender=Flight.crews.through)
+def index_flight_crews(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # The crew's flights are unknown once the links are gone
+        instance._cleared_flight_ids = list(
+            instance.flights.values_list("id", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        flight_ids = [instance.id]
+    elif action == "post_clear":
+        flight_ids = instance.__dict__.pop("_cleared_flight_ids", [])
+    else:
+        flight_ids = pk_set
+    FlightSearchIndex.refresh(Flight.objects.filter(id__in=flight_ids))
+
+
+@receiver(post_save, sender=Airplane)
+def index_airplane_flights(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        FlightSearchIndex.refresh(instance.flights.all())
+
+
+@receiver(post_save, sender=Route)
+def index_route_flights(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        FlightSearchIndex.refresh(instance.flights.all())
+
+
+@receiver(post_save, sender=Airport)
+def index_airport_flights(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        FlightSearchIndex.refresh(
+            Flight.objects.filter(
+                Q(route__source=instance) | Q(route__destination=instance)
+            )
+        )
+
+
+@receiver(post_save, sender=Crew)
+def index_crew_flights(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        FlightSearchIndex.refresh(instance.flights.all())
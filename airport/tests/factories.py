@@ -0,0 +1,13 @@
+"""Bulk factories, kept in airport.seed for the benchmark commands"""
+from airport.seed import (
+    BATCH_SIZE,
+    CITIES,
+    bulk_airplanes,
+    bulk_airports,
+    bulk_crews,
+    bulk_flights,
+    bulk_routes,
+    bulk_tickets,
+    index_flights,
+    seed_dataset,
+)
@@ -1,10 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.reverse import reverse
 
+from airport.cache import get_model_versions
 from airport.models import Airport
 from airport.serializers import AirportSerializer
 from airport.tests.sample import sample_airport
@@ -51,6 +53,52 @@ class AuthenticatedAirportTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+@override_settings(THROTTLE_STORE="cache")
+class AirportListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        sample_airport()
+
+    def test_airport_list_served_from_cache(self):
+        self.client.get(AIRPORT_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AIRPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+        self.assertIn("max-age", res["Cache-Control"])
+
+    def test_airport_list_not_modified_until_airport_saved(self):
+        etag = self.client.get(AIRPORT_URL)["ETag"]
+
+        res = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        res = self.client.get(AIRPORT_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 2)
+
+    def test_version_bumped_on_commit(self):
+        version = get_model_versions([Airport])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_airport(name="Boryspil", closest_big_city="Kyiv")
+            # A miss before the commit reads the old rows
+            self.assertEqual(get_model_versions([Airport]), version)
+
+        self.assertNotEqual(get_model_versions([Airport]), version)
+
+
 class AdminAirportApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -0,0 +1,139 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.models import Ticket
+from airport.tests.sample import sample_crew, sample_flight, sample_order
+from airport_api_service.metrics import registry
+
+
+class AsyncReadApiTests(TestCase):
+    def setUp(self):
+        # Versions are bumped on commit, which test transactions never do
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.auth_headers = {
+            "Authorization": (
+                f"Bearer {RefreshToken.for_user(self.user).access_token}"
+            )
+        }
+        self.flight = sample_flight()
+        self.flight.crews.add(sample_crew())
+        Ticket.objects.create(
+            flight=self.flight, order=sample_order(), row=2, seat=3
+        )
+
+    async def assert_same_as_sync(self, sync_url, async_url, params=None):
+        sync_res = await self.sync_get(sync_url, params)
+        async_res = await self.async_client.get(
+            async_url, params, headers=self.auth_headers
+        )
+
+        self.assertEqual(async_res.status_code, sync_res.status_code)
+        self.assertEqual(async_res.content, sync_res.content)
+        # ETags cover the URL, so only their presence matches
+        self.assertEqual("ETag" in async_res, "ETag" in sync_res)
+        for header in ("Last-Modified", "Vary"):
+            self.assertEqual(async_res.get(header), sync_res.get(header))
+        return async_res
+
+    async def sync_get(self, url, params=None):
+        return await sync_to_async(self.client.get)(url, params)
+
+    async def test_flight_list(self):
+        res = await self.assert_same_as_sync(
+            reverse("airport:flight-list"),
+            reverse("airport:async-flight-list"),
+            {"source_city": "", "departure_date": "2020-10-10"},
+        )
+
+        self.assertEqual(res.json()["count"], 1)
+
+    async def test_flight_list_cursor(self):
+        await self.assert_same_as_sync(
+            reverse("airport:flight-list"),
+            reverse("airport:async-flight-list"),
+            {"pagination": "cursor"},
+        )
+
+    async def test_flight_detail(self):
+        res = await self.assert_same_as_sync(
+            reverse("airport:flight-detail", args=[self.flight.id]),
+            reverse("airport:async-flight-detail", args=[self.flight.id]),
+        )
+
+        self.assertEqual(res.json()["taken_places"], ["row:2 seat:3"])
+
+    async def test_flight_not_modified(self):
+        for name, args in (
+            ("airport:async-flight-list", []),
+            ("airport:async-flight-detail", [self.flight.id]),
+        ):
+            url = reverse(name, args=args)
+            res = await self.async_client.get(url, headers=self.auth_headers)
+            self.assertIn("ETag", res)
+            self.assertIn("Last-Modified", res)
+
+            for validator in (
+                {"If-None-Match": res["ETag"]},
+                {"If-Modified-Since": res["Last-Modified"]},
+            ):
+                with self.subTest(name=name, validator=validator):
+                    not_modified = await self.async_client.get(
+                        url, headers={**self.auth_headers, **validator}
+                    )
+                    self.assertEqual(
+                        not_modified.status_code,
+                        status.HTTP_304_NOT_MODIFIED,
+                    )
+                    self.assertEqual(not_modified["ETag"], res["ETag"])
+
+    async def test_flight_detail_not_found(self):
+        await self.assert_same_as_sync(
+            reverse("airport:flight-detail", args=[self.flight.id + 1]),
+            reverse("airport:async-flight-detail", args=[self.flight.id + 1]),
+        )
+
+    async def test_route_and_airport_list(self):
+        for name in ("route", "airport"):
+            res = await self.async_client.get(
+                reverse(f"airport:async-{name}-list"),
+                headers=self.auth_headers,
+            )
+            sync_res = await self.sync_get(reverse(f"airport:{name}-list"))
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json(), sync_res.json())
+            self.assertIn("ETag", res)
+
+    async def test_auth_required(self):
+        res = await self.async_client.get(
+            reverse("airport:async-flight-list")
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_request_metrics_recorded(self):
+        registry.reset()
+
+        await self.async_client.get(
+            reverse("airport:async-flight-list"), headers=self.auth_headers
+        )
+
+        totals = registry.snapshot()[
+            ("airport:async-flight-list", "get")
+        ]
+        self.assertEqual(totals["requests"], 1)
+        self.assertGreater(totals["queries"], 0)
+        self.assertGreater(totals["serializer_seconds"], 0)
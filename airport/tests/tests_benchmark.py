@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from rest_framework.settings import api_settings
+
+from airport.models import Crew, Flight, Ticket
+from airport.roster import crew_schedule
+from airport.rotation import fleet_violations
+from airport.tests.factories import seed_dataset
+
+
+class SeedDatasetTests(TestCase):
+    def test_seed_dataset_keeps_counters(self):
+        flights = seed_dataset(
+            airports=10, airplanes=3, flights=20, tickets=100, crews=5
+        )
+
+        self.assertEqual(len(flights), 20)
+        self.assertEqual(Ticket.objects.count(), 100)
+        self.assertEqual(
+            sum(Flight.objects.values_list("tickets_sold", flat=True)), 100
+        )
+
+    def test_seed_dataset_follows_schedule_rules(self):
+        seed_dataset(
+            airports=10, airplanes=3, flights=30, tickets=10, crews=10
+        )
+
+        self.assertEqual(fleet_violations(), [])
+        self.assertTrue(Flight.crews.through.objects.exists())
+        for crew_id in Crew.objects.values_list("id", flat=True):
+            for duty in crew_schedule(crew_id):
+                self.assertEqual(duty["conflicts"], [])
+
+
+class BenchmarkApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def benchmark(self):
+        output = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        output.close()
+        self.addCleanup(os.remove, output.name)
+
+        call_command(
+            "benchmark_api", "--seed", "--airports", "10", "--flights", "20",
+            "--tickets", "50", "--requests", "20", "--output", output.name,
+            stdout=StringIO(),
+        )
+
+        with open(output.name) as report_file:
+            return json.load(report_file)
+
+    def test_benchmark_writes_report(self):
+        report = self.benchmark()
+
+        summary = next(iter(report["scenarios"].values()))
+        self.assertEqual(report["requests"], 20)
+        for key in ("p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+            self.assertIn(key, summary)
+        self.assertGreater(summary["queries_per_request"], 0)
+        # Orders may hit taken seats, reads must all succeed
+        for scenario, summary in report["scenarios"].items():
+            if scenario != "order_create":
+                self.assertEqual(list(summary["statuses"]), ["200"])
+
+    def test_benchmark_not_throttled(self):
+        rates = dict.fromkeys(api_settings.DEFAULT_THROTTLE_RATES, "1/day")
+        with override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": rates,
+            }
+        ):
+            report = self.benchmark()
+
+            for summary in report["scenarios"].values():
+                self.assertNotIn("429", summary["statuses"])
+            # Only for the run
+            self.assertEqual(api_settings.DEFAULT_THROTTLE_RATES, rates)
+
+
+class BenchmarkAsgiTests(TransactionTestCase):
+    def test_benchmark_compares_wsgi_and_asgi(self):
+        output = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        output.close()
+        self.addCleanup(os.remove, output.name)
+
+        call_command(
+            "benchmark_asgi", "--seed", "--airports", "10", "--flights",
+            "20", "--tickets", "50", "--requests", "20", "--workers", "2",
+            "--output", output.name, stdout=StringIO(),
+        )
+
+        with open(output.name) as report_file:
+            report = json.load(report_file)
+        for mode in ("wsgi", "asgi"):
+            self.assertEqual(report[mode]["statuses"], {"200": 20})
+            self.assertGreater(report[mode]["requests_per_second"], 0)
+
+
+class BenchmarkConnectionsTests(TransactionTestCase):
+    def test_benchmark_compares_connection_modes(self):
+        output = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        output.close()
+        self.addCleanup(os.remove, output.name)
+
+        call_command(
+            "benchmark_connections", "--seed", "--airports", "10",
+            "--flights", "20", "--tickets", "50", "--requests", "20",
+            "--output", output.name, stdout=StringIO(),
+        )
+
+        with open(output.name) as report_file:
+            report = json.load(report_file)
+        for mode in ("per_request", "persistent"):
+            self.assertEqual(report[mode]["statuses"], {"200": 20})
+            self.assertIn("connect_ms_per_request", report[mode])
+        self.assertEqual(report["persistent"]["connects"], 0)
+        # SQLite has no pool
+        self.assertIsNone(report["pool"])
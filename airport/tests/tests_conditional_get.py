@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.models import Airport, Flight, Order, Ticket
+from airport.tests.sample import sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+TICKET_URL = reverse("airport:ticket-list")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight()
+        self.order = Order.objects.create(user=self.user)
+        self.ticket = Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=1
+        )
+
+    def assert_revalidates(self, url, change):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res["ETag"]
+
+        res = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertFalse(res.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        res = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_flight_list_follows_seats_sold(self):
+        self.assert_revalidates(
+            FLIGHT_URL,
+            lambda: Ticket.objects.create(flight=self.flight, row=1, seat=2),
+        )
+
+    def test_flight_list_follows_deletes(self):
+        other = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time="2020-10-12T10:00Z",
+            arrival_time="2020-10-12T12:00Z",
+        )
+        # Not the last updated row, only the count changes
+        Ticket.objects.create(flight=self.flight, row=1, seat=2)
+
+        self.assert_revalidates(FLIGHT_URL, other.delete)
+
+    def test_flight_list_last_modified(self):
+        res = self.client.get(FLIGHT_URL)
+
+        res = self.client.get(
+            FLIGHT_URL, headers={"If-Modified-Since": res["Last-Modified"]}
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_flight_detail_follows_related_edits(self):
+        def rename_airport():
+            airport = self.flight.route.source
+            airport.name = "Chopin"
+            airport.save()
+
+        self.assert_revalidates(
+            reverse("airport:flight-detail", args=[self.flight.id]),
+            rename_airport,
+        )
+
+    def test_ticket_list_follows_flight_edits(self):
+        def rename_airplane():
+            airplane = self.flight.airplane
+            airplane.name = "Dreamliner"
+            airplane.save()
+
+        self.assert_revalidates(TICKET_URL, rename_airplane)
+        self.assertNotIn("Last-Modified", self.client.get(TICKET_URL))
+
+    def test_order_detail_follows_ticket_deletes(self):
+        Ticket.objects.create(
+            flight=self.flight, order=self.order, row=1, seat=2
+        )
+        self.assert_revalidates(
+            reverse("airport:order-detail", args=[self.order.id]),
+            self.ticket.delete,
+        )
+
+    def test_keyset_pages_not_validated(self):
+        res = self.client.get(FLIGHT_URL, {"pagination": "cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
+
+
+class FixtureTests(TestCase):
+    def test_initial_data_loads(self):
+        # The README fixture predates updated_at
+        call_command(
+            "loaddata",
+            settings.BASE_DIR / "db.json",
+            exclude=["contenttypes", "auth", "admin", "sessions"],
+            verbosity=0,
+        )
+
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertFalse(Airport.objects.filter(updated_at=None).exists())
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.models import Airplane, Flight
+from airport.roster import CrewRoster, Duty
+from airport.tests.sample import sample_airplane, sample_crew, sample_route
+
+FLIGHT_URL = reverse("airport:flight-list")
+START = datetime(2030, 1, 1, 8, tzinfo=dt_timezone.utc)
+
+
+def at(hours):
+    return START + timedelta(hours=hours)
+
+
+@override_settings(CREW_MIN_REST_MINUTES=60, FLIGHT_MAX_HOURS=24)
+class CrewRosterTests(TestCase):
+    def setUp(self):
+        self.roster = CrewRoster(
+            [
+                Duty(at(0), at(2), 1, 10),
+                Duty(at(20), at(30), 2, 10),
+                Duty(at(1), at(3), 3, 11),
+            ]
+        )
+
+    def test_conflicts_include_rest(self):
+        for start, end, flights in (
+            (at(2.5), at(4), [1]),
+            (at(3), at(5), []),
+            (at(17), at(19), []),
+            (at(17), at(19.5), [2]),
+            (at(25), at(26), [2]),
+            (at(-1), at(40), [1, 2]),
+        ):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(
+                    [
+                        duty.flight_id
+                        for duty in self.roster.conflicts(10, start, end)
+                    ],
+                    flights,
+                )
+
+    def test_own_flight_is_no_conflict(self):
+        self.assertEqual(self.roster.conflicts(10, at(0), at(2), 1), [])
+        self.assertEqual(self.roster.conflicts(12, at(0), at(2)), [])
+
+    def test_busy_crews(self):
+        self.assertEqual(self.roster.busy_crews(at(3.5), at(4)), {11})
+        self.assertEqual(self.roster.busy_crews(at(25), at(26)), {10})
+        self.assertEqual(self.roster.busy_crews(at(8), at(10)), set())
+
+    def test_validate_batch(self):
+        conflicts = self.roster.validate(
+            [
+                (11, 4, at(10), at(12)),
+                (11, 5, at(12.5), at(14)),
+                (11, 6, at(13.5), at(15)),
+            ]
+        )
+
+        # Rejected assignments do not block later ones
+        self.assertEqual(
+            [(conflict.flight_id, conflict.other_flight_id)
+             for conflict in conflicts],
+            [(5, 4)],
+        )
+        self.assertEqual(self.roster.busy_crews(at(14), at(14.2)), {11})
+
+
+@override_settings(CREW_MIN_REST_MINUTES=60)
+class CrewScheduleApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.route = sample_route()
+        self.airplane = sample_airplane()
+        self.crew = sample_crew()
+        self.flight = self.create_flight(0, 2, self.crew)
+
+    def new_airplane(self):
+        return Airplane.objects.create(
+            name=f"Airplane {Airplane.objects.count()}",
+            rows=10,
+            seats_in_row=10,
+            airplane_type=self.airplane.airplane_type,
+        )
+
+    def create_flight(self, departure, arrival, *crews):
+        flight = Flight.objects.create(
+            route=self.route,
+            airplane=self.new_airplane(),
+            departure_time=at(departure),
+            arrival_time=at(arrival),
+        )
+        flight.crews.add(*crews)
+        return flight
+
+    def post_flight(self, departure, arrival):
+        return self.client.post(
+            FLIGHT_URL,
+            {
+                "route": self.route.id,
+                "airplane": self.new_airplane().id,
+                "departure_time": at(departure).isoformat(),
+                "arrival_time": at(arrival).isoformat(),
+                "crews": [self.crew.id],
+            },
+        )
+
+    def test_create_flight_checks_crew_roster(self):
+        res = self.post_flight(2.5, 4)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"flight {self.flight.id}", res.data["crews"][0])
+
+        res = self.post_flight(3, 4)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_flight_max_duration(self):
+        res = self.post_flight(10, 40)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("arrival_time", res.data)
+
+    def test_schedule(self):
+        overlapping = self.create_flight(1, 3, self.crew)
+        later = self.create_flight(10, 12, self.crew)
+        self.create_flight(10, 12, sample_crew(first_name="Other"))
+
+        res = self.client.get(
+            reverse("airport:crew-schedule", args=[self.crew.id]),
+            {"start": at(-1).isoformat()},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(duty["flight"], duty["conflicts"]) for duty in res.data],
+            [
+                (self.flight.id, [overlapping.id]),
+                (overlapping.id, [self.flight.id]),
+                (later.id, []),
+            ],
+        )
+        self.assertEqual(res.data[0]["route"], self.route.name)
+
+    def test_schedule_unknown_crew(self):
+        res = self.client.get(
+            reverse("airport:crew-schedule", args=[self.crew.id + 1])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_available_crew(self):
+        free = sample_crew(first_name="Free")
+        resting = sample_crew(first_name="Resting")
+        self.create_flight(-2, -0.5, resting)
+        flight = self.create_flight(0, 1)
+
+        res = self.client.get(
+            reverse("airport:crew-available"), {"flight": flight.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([crew["id"] for crew in res.data], [free.id])
+
+        res = self.client.get(
+            reverse("airport:crew-available"),
+            {"flight": self.create_flight(50, 52).id, "limit": 2},
+        )
+        self.assertEqual(
+            [crew["id"] for crew in res.data], [self.crew.id, free.id]
+        )
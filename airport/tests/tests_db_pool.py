@@ -0,0 +1,103 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connections
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.checks import check_connection_pools
+from airport_api_service.db_pool import wait_for_database
+
+
+@mock.patch("airport_api_service.db_pool.time.sleep")
+class WaitForDatabaseTests(SimpleTestCase):
+    def setUp(self):
+        self.connection = mock.Mock(settings_dict={})
+
+    def test_wait_for_db_retries(self, sleep):
+        self.connection.ensure_connection.side_effect = [
+            OperationalError,
+            OperationalError,
+            None,
+        ]
+        out = StringIO()
+
+        with mock.patch(
+            "airport_api_service.db_pool.connections",
+            {"default": self.connection},
+        ):
+            call_command("wait_for_db", stdout=out)
+
+        self.assertEqual(self.connection.ensure_connection.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(out.getvalue().count("Database unavailable"), 2)
+        self.assertIn("Database available!", out.getvalue())
+
+    def test_attempts_return_last_error(self, sleep):
+        error = OperationalError("refused")
+        self.connection.ensure_connection.side_effect = error
+
+        self.assertIs(wait_for_database(self.connection, attempts=2), error)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_pool_filled(self, sleep):
+        self.connection.settings_dict = {"OPTIONS": {"pool": True}}
+        self.connection.pool.timeout = 5
+        self.connection.wrap_database_errors = mock.MagicMock()
+
+        self.assertIsNone(wait_for_database(self.connection))
+        self.connection.pool.wait.assert_called_once_with(timeout=5)
+
+
+class PoolCheckTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_unpooled_databases_skipped(self):
+        self.assertEqual(check_connection_pools(databases=["default"]), [])
+
+    def test_invalid_pool_reported(self):
+        with mock.patch.dict(
+            connections["default"].settings_dict, {"OPTIONS": {"pool": True}}
+        ):
+            errors = check_connection_pools(databases=["default"])
+
+        self.assertEqual([error.id for error in errors], ["airport.E001"])
+        self.assertIn("cannot be pooled", errors[0].msg)
+
+    @mock.patch(
+        "airport.checks.wait_for_database",
+        return_value=OperationalError("refused"),
+    )
+    @mock.patch("airport.checks.pool_configuration_error", return_value=None)
+    def test_unreachable_pool_reported(self, configuration, wait):
+        with mock.patch.dict(
+            connections["default"].settings_dict, {"OPTIONS": {"pool": True}}
+        ):
+            errors = check_connection_pools(databases=["default"])
+
+        self.assertEqual([error.id for error in errors], ["airport.E002"])
+        wait.assert_called_once_with(connections["default"], attempts=1)
+
+
+class PoolMetricsTests(TestCase):
+    @mock.patch(
+        "airport_api_service.db_pool.pool_stats",
+        return_value={"default": {"pool_size": 4, "requests_num": 10}},
+    )
+    def test_pool_stats_exposed(self, stats):
+        res = self.client.get(reverse("metrics"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = res.content.decode()
+        self.assertIn('airport_db_pool_size{alias="default"} 4', content)
+        self.assertIn(
+            'airport_db_pool_requests_num_total{alias="default"} 10', content
+        )
+        self.assertIn(
+            'airport_db_pool_requests_errors_total{alias="default"} 0',
+            content,
+        )
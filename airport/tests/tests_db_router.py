@@ -0,0 +1,182 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils.functional import SimpleLazyObject
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.models import Flight
+from airport.tests.sample import sample_flight
+from airport_api_service.db_router import (
+    ReplicaRoutingMiddleware,
+    read_primary,
+)
+
+REPLICAS = ["replica_1", "replica_2"]
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method="get", user=None, status_code=200, **headers):
+        """Return the database the view read from and the request"""
+        request = getattr(self.factory, method)("/", headers=headers)
+        databases = []
+
+        def view(request):
+            if user is not None:
+                # As DRF sets it once the request is authenticated
+                request.user = user
+            databases.append(router.db_for_read(Flight))
+            return HttpResponse(status=status_code)
+
+        ReplicaRoutingMiddleware(view)(request)
+        return databases[0]
+
+    def user(self, pk):
+        return User(pk=pk, email=f"user{pk}@gmail.com")
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(Flight), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_write(Flight), DEFAULT_DB_ALIAS)
+
+    def test_safe_requests_read_replicas(self):
+        self.assertIn(self.request(user=self.user(1)), REPLICAS)
+        self.assertIn(self.request(user=AnonymousUser()), REPLICAS)
+        self.assertIn(self.request("head", user=self.user(1)), REPLICAS)
+
+    def test_unsafe_requests_read_primary(self):
+        for method in ("post", "put", "patch", "delete"):
+            with self.subTest(method=method):
+                self.assertEqual(
+                    self.request(method, user=self.user(1)), DEFAULT_DB_ALIAS
+                )
+
+    def test_writer_pinned_to_primary(self):
+        self.request("post", user=self.user(1))
+
+        self.assertEqual(self.request(user=self.user(1)), DEFAULT_DB_ALIAS)
+        self.assertIn(self.request(user=self.user(2)), REPLICAS)
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        self.request("delete", user=self.user(1))
+
+        self.assertIn(self.request(user=self.user(1)), REPLICAS)
+
+    def test_failed_write_not_pinned(self):
+        self.request("post", user=self.user(1), status_code=400)
+
+        self.assertIn(self.request(user=self.user(1)), REPLICAS)
+
+    def test_forced_primary(self):
+        self.assertEqual(
+            self.request(user=self.user(1), x_read_primary="1"),
+            DEFAULT_DB_ALIAS,
+        )
+        with read_primary():
+            self.assertEqual(self.request(user=self.user(1)), DEFAULT_DB_ALIAS)
+
+    def test_unauthenticated_reads_primary(self):
+        request = self.factory.get("/")
+        load_user = mock.Mock(return_value=self.user(1))
+        request.user = SimpleLazyObject(load_user)
+        databases = []
+
+        def view(request):
+            databases.append(router.db_for_read(User))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(view)(request)
+
+        self.assertEqual(databases, [DEFAULT_DB_ALIAS])
+        load_user.assert_not_called()
+
+    def test_transactions_read_primary(self):
+        primary = mock.Mock(in_atomic_block=True)
+        with mock.patch(
+            "airport_api_service.db_router.connections",
+            {DEFAULT_DB_ALIAS: primary},
+        ):
+            self.assertEqual(self.request(user=self.user(1)), DEFAULT_DB_ALIAS)
+
+
+class ReplicaApiTests(TransactionTestCase):
+    """API requests against a second connection to the test database"""
+
+    # Added once the test database exists, as an alias of its own
+    replica = "replica_1"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connections.settings[cls.replica] = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict
+        }
+        cls.addClassCleanup(connections.settings.pop, cls.replica)
+        cls.databases = {DEFAULT_DB_ALIAS, cls.replica}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[cls.replica].close()
+        del connections[cls.replica]
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight()
+        self.url = reverse("airport:flight-detail", args=[self.flight.id])
+
+    def get_flight(self):
+        with CaptureQueriesContext(connections[self.replica]) as replica:
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(replica)
+
+    @override_settings(DATABASE_REPLICAS=[replica])
+    def test_reads_follow_writes(self):
+        self.assertGreater(self.get_flight(), 0)
+
+        with CaptureQueriesContext(connections[self.replica]) as replica:
+            res = self.client.post(
+                reverse("airport:order-list"),
+                {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+                format="json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(replica), 0)
+
+        self.assertEqual(self.get_flight(), 0)
+
+    @override_settings(DATABASE_REPLICAS=[replica])
+    def test_list_cache_filled_from_primary(self):
+        for name in ("airport", "route", "async-airport", "async-route"):
+            replica = CaptureQueriesContext(connections[self.replica])
+            with self.subTest(name=name), replica:
+                res = self.client.get(reverse(f"airport:{name}-list"))
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(replica), 0)
@@ -0,0 +1,200 @@
+from datetime import date
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.models import Flight, FlightSearchIndex, Route, Ticket
+from airport.serializers import FlightListSerializer
+from airport.tests.sample import (
+    sample_airport,
+    sample_crew,
+    sample_flight,
+)
+from airport.views import search_flights, with_tickets_available
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class FlightSearchIndexTests(TestCase):
+    def setUp(self):
+        self.flight = sample_flight()
+
+    def index(self):
+        return FlightSearchIndex.objects.get(flight=self.flight)
+
+    def test_flight_indexed(self):
+        row = self.index()
+
+        self.assertEqual(row.source_city_norm, "warshawa")
+        self.assertEqual(row.dest_city_norm, "warshawa")
+        self.assertEqual(row.departure_date, date(2020, 10, 10))
+        self.assertEqual(row.arrival_date, date(2020, 10, 11))
+        self.assertEqual(row.seats_left, 100)
+        self.assertEqual(row.airplane_name, "Boing")
+        self.assertEqual(row.route_label, self.flight.route.name)
+        self.assertEqual(row.crews, [])
+
+    def test_crews_follow_changes(self):
+        crew = sample_crew()
+        self.flight.crews.add(crew)
+        self.assertEqual(self.index().crews, ["Peter Mitchell"])
+
+        crew.last_name = "Parker"
+        crew.save()
+        self.assertEqual(self.index().crews, ["Peter Parker"])
+
+        crew.flights.clear()
+        self.assertEqual(self.index().crews, [])
+
+    def test_related_edits_follow(self):
+        destination = self.flight.route.destination
+        destination.closest_big_city = "Kyiv"
+        destination.save()
+        airplane = self.flight.airplane
+        airplane.rows = 20
+        airplane.save()
+
+        row = self.index()
+        self.assertEqual(row.dest_city_norm, "kyiv")
+        self.assertEqual(row.route_label, "Modlin (Warshawa) -> Kyiv (Kyiv)")
+        self.assertEqual(row.seats_left, 200)
+
+    def test_seats_left_follow_tickets(self):
+        ticket = Ticket.objects.create(flight=self.flight, row=1, seat=1)
+        self.assertEqual(self.index().seats_left, 99)
+
+        ticket.delete()
+        self.assertEqual(self.index().seats_left, 100)
+
+    def test_flight_delete_removes_row(self):
+        self.flight.delete()
+
+        self.assertFalse(FlightSearchIndex.objects.exists())
+
+    def test_backfill_command(self):
+        FlightSearchIndex.objects.all().delete()
+
+        call_command("backfill_flight_search_index", stdout=StringIO())
+
+        self.assertEqual(self.index().seats_left, 100)
+
+    def test_migration_fills_existing_flights(self):
+        self.flight.crews.add(sample_crew())
+        FlightSearchIndex.refresh(Flight.objects.filter(id=self.flight.id))
+        fields = [
+            "source_city_norm",
+            "dest_city_norm",
+            "departure_date",
+            "arrival_date",
+            "seats_left",
+            "airplane_name",
+            "route_label",
+            "crews",
+        ]
+        refreshed = FlightSearchIndex.objects.values(*fields).get()
+        FlightSearchIndex.objects.all().delete()
+        migration = import_module("airport.migrations.0006_flightsearchindex")
+
+        migration.fill_flight_search_index(apps, None)
+
+        self.assertEqual(
+            FlightSearchIndex.objects.values(*fields).get(), refreshed
+        )
+
+
+class FlightSearchIndexApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        lviv = sample_airport(name="Lviv", closest_big_city="Lviv")
+        airplane = sample_flight().airplane
+        for source, destination, day in ((kyiv, lviv, 10), (lviv, kyiv, 11)):
+            flight = Flight.objects.create(
+                route=Route.objects.create(
+                    source=source, destination=destination, distance=500
+                ),
+                airplane=airplane,
+                departure_time=f"2020-10-{day} 10:00Z",
+                arrival_time=f"2020-10-{day} 12:00Z",
+            )
+            flight.crews.add(sample_crew())
+
+    def test_list_matches_join_search(self):
+        for params in (
+            {},
+            {"source_city": "kyi"},
+            {"destination_city": "LVIV"},
+            {"departure_date": "2020-10-11"},
+            {"arrival_date": "2020-10-10", "source_city": "Kyiv"},
+        ):
+            with self.subTest(params=params):
+                res = self.client.get(FLIGHT_URL, params)
+                flights = search_flights(
+                    with_tickets_available(
+                        Flight.objects.prefetch_related("crews")
+                    ),
+                    params,
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(
+                    res.data["results"],
+                    FlightListSerializer(flights, many=True).data,
+                )
+
+    def test_list_query_needs_no_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                FLIGHT_URL,
+                {"source_city": "Kyiv", "departure_date": "2020-10-10"},
+            )
+
+        page_query = queries.captured_queries[-1]["sql"].upper()
+        self.assertIn("FLIGHTSEARCHINDEX", page_query)
+        for keyword in ("JOIN", "DISTINCT", "GROUP BY"):
+            self.assertNotIn(keyword, page_query)
+
+
+class LoadedFlightsTests(TestCase):
+    def test_loaded_flights_listed(self):
+        # As README's Loading Initial Data: raw saves skip the signals
+        call_command(
+            "loaddata",
+            settings.BASE_DIR / "db.json",
+            exclude=["contenttypes", "auth", "admin", "sessions"],
+            verbosity=0,
+        )
+        call_command("rebuild_seat_inventory", stdout=StringIO())
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="email@gmail.com", password="<PASSWORD>"
+            )
+        )
+
+        res = client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(flight["id"] for flight in res.data["results"]),
+            sorted(Flight.objects.values_list("id", flat=True)),
+        )
+        # Flight 1 has the two tickets of the fixture
+        row = FlightSearchIndex.objects.get(flight_id=1)
+        self.assertEqual(row.seats_left, row.capacity - 2)
@@ -1,17 +1,25 @@
+import base64
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.test import TestCase
 
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.reverse import reverse
 
-from airport.models import Flight
+from airport.models import Flight, Order, SeatHold, Ticket
 from airport.serializers import FlightListSerializer, FlightSerializer
 from airport.tests.sample import (
     sample_flight,
     sample_airplane,
     sample_route,
     sample_crew,
+    sample_order,
 )
 
 
@@ -47,6 +55,34 @@ class AuthenticatedFightTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serial_data )
 
+    def test_flight_list_cursor_pagination(self):
+        route = sample_route()
+        airplane = sample_airplane()
+        for day in (12, 10, 11):
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=f"2020-10-{day}T00:00:00Z",
+                arrival_time=f"2020-10-{day}T05:00:00Z",
+            )
+
+        res = self.client.get(FLIGHT_URL, {"pagination": "cursor", "limit": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        self.assertEqual(
+            [flight["departure_time"][:10] for flight in res.data["results"]],
+            ["2020-10-10", "2020-10-11"],
+        )
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [flight["departure_time"][:10] for flight in res.data["results"]],
+            ["2020-10-12"],
+        )
+        self.assertIsNone(res.data["next"])
+
     def test_create_flights_forbidden(self):
         payload = {
             "route": 123,
@@ -85,3 +121,303 @@ class AdminFlightApiTests(TestCase):
 
         for key in payload:
             self.assertEqual(payload[key], serializer.data[key])
+
+    def test_flight_must_arrive_after_departure(self):
+        flight = sample_flight()
+        payload = {
+            "route": flight.route.id,
+            "airplane": flight.airplane.id,
+            "departure_time": "2020-11-10T00:00:00Z",
+            "crews": [sample_crew().id],
+        }
+
+        for arrival_time in ("2020-11-10T00:00:00Z", "2020-11-09T22:00:00Z"):
+            with self.subTest(arrival_time=arrival_time):
+                res = self.client.post(
+                    FLIGHT_URL, {**payload, "arrival_time": arrival_time}
+                )
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("arrival_time", res.data)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Flight.objects.filter(id=flight.id).update(
+                arrival_time=F("departure_time")
+            )
+
+
+class FlightSeatInventoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight()
+
+    def test_ticket_create_and_delete_update_counter(self):
+        order = sample_order(user=self.user)
+        ticket = Ticket.objects.create(
+            flight=self.flight, order=order, row=1, seat=1
+        )
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=2)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+
+        res = self.client.delete(
+            reverse("airport:ticket-detail", args=[ticket.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+
+    def test_order_create_and_delete_update_counter(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ]
+        }
+
+        res = self.client.post(
+            reverse("airport:order-list"), payload, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        flight_res = self.client.get(
+            reverse("airport:flight-detail", args=[self.flight.id])
+        )
+        self.assertEqual(flight_res.data["tickets_available"], 98)
+
+        self.client.delete(
+            reverse("airport:order-detail", args=[res.data["id"]])
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 0)
+
+    def assert_seats_sold(self, tickets_sold):
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, tickets_sold)
+        self.assertEqual(
+            self.flight.search_index.seats_left, 100 - tickets_sold
+        )
+
+    def test_user_delete_updates_counter(self):
+        order = sample_order(user=self.user)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=1)
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=2)
+        self.assert_seats_sold(2)
+
+        # Cascades to the orders, then the tickets
+        self.user.delete()
+
+        self.assert_seats_sold(0)
+
+    def test_queryset_delete_updates_counter(self):
+        for seat in (1, 2, 3):
+            Ticket.objects.create(flight=self.flight, row=1, seat=seat)
+
+        Ticket.objects.filter(seat__lt=3).delete()
+
+        self.assert_seats_sold(1)
+
+    def test_order_delete_queries_independent_of_tickets(self):
+        other_flight = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time="2020-10-12T00:00:00Z",
+            arrival_time="2020-10-13T00:00:00Z",
+        )
+        for count in (1, 20):
+            order = Order.objects.create(user=self.user)
+            for seat in range(1, count + 1):
+                for flight in (self.flight, other_flight):
+                    Ticket.objects.create(
+                        flight=flight,
+                        order=order,
+                        row=1 + (seat - 1) // 10,
+                        seat=1 + (seat - 1) % 10,
+                    )
+            with self.subTest(count=count):
+                # Select and delete tickets, delete the order, two counter
+                # updates per flight, touch the order
+                with self.assertNumQueries(8):
+                    order.delete()
+                self.assert_seats_sold(0)
+                other_flight.refresh_from_db()
+                self.assertEqual(other_flight.tickets_sold, 0)
+
+    def test_rebuild_seat_inventory(self):
+        Ticket.objects.create(
+            flight=self.flight, order=sample_order(), row=1, seat=1
+        )
+        Flight.objects.update(tickets_sold=5)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_seat_inventory", "--check", stdout=StringIO()
+            )
+        call_command("rebuild_seat_inventory", stdout=StringIO())
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, Ticket.objects.count())
+        call_command("rebuild_seat_inventory", "--check", stdout=StringIO())
+
+
+class FlightSeatMapTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight()
+        self.url = reverse("airport:flight-seatmap", args=[self.flight.id])
+
+    def test_seatmap_bits(self):
+        order = sample_order()
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=1)
+        Ticket.objects.create(flight=self.flight, order=order, row=2, seat=3)
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 10)
+        self.assertEqual(res.data["seats_in_row"], 10)
+        bitmap = base64.b64decode(res.data["seatmap"])
+        self.assertEqual(len(bitmap), 13)
+        self.assertEqual(bitmap[0], 0b10000000)
+        self.assertEqual(bitmap[1], 0b00001000)
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 2)
+
+    def test_seatmap_not_modified(self):
+        res = self.client.get(self.url)
+        etag = res["ETag"]
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Ticket.objects.create(
+            flight=self.flight, order=sample_order(), row=1, seat=1
+        )
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_seatmap_skips_seats_outside_layout(self):
+        order = sample_order()
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=1)
+        Ticket.objects.create(flight=self.flight, order=order, row=10, seat=10)
+        Ticket.objects.create(flight=self.flight, order=order, row=2, seat=10)
+        airplane = self.flight.airplane
+        airplane.rows = airplane.seats_in_row = 5
+        airplane.save()
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        bitmap = base64.b64decode(res.data["seatmap"])
+        self.assertEqual(len(bitmap), 4)
+        self.assertEqual(list(bitmap), [0b10000000, 0, 0, 0])
+
+    def test_non_numeric_flight_not_found(self):
+        for res in (
+            self.client.get(reverse("airport:flight-seatmap", args=["abc"])),
+            self.client.post(reverse("airport:flight-hold", args=["abc"])),
+        ):
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FlightSeatHoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight()
+        self.url = reverse("airport:flight-hold", args=[self.flight.id])
+
+    def order(self, seats):
+        return self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": self.flight.id}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_hold_and_order_seats(self):
+        res = self.client.post(
+            self.url,
+            {"seats": [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+
+        res = self.order([(1, 1), (1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_seat_held_by_other_user_is_taken(self):
+        self.client.post(
+            self.url, {"seats": [{"row": 1, "seat": 1}]}, format="json"
+        )
+        self.client.force_authenticate(user=self.other_user)
+
+        hold_res = self.client.post(
+            self.url, {"seats": [{"row": 1, "seat": 1}]}, format="json"
+        )
+        order_res = self.order([(1, 1)])
+
+        for res in (hold_res, order_res):
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(
+                res.data["taken_places"][str(self.flight.id)],
+                ["row:1 seat:1"],
+            )
+
+    def test_expired_hold_released(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            row=1,
+            seat=1,
+            user=self.other_user,
+            expires_at="2000-01-01T00:00:00Z",
+        )
+
+        res = self.client.post(
+            self.url, {"seats": [{"row": 1, "seat": 1}]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_sweep_seat_holds(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            row=1,
+            seat=1,
+            user=self.other_user,
+            expires_at="2000-01-01T00:00:00Z",
+        )
+        self.client.post(
+            self.url, {"seats": [{"row": 2, "seat": 2}]}, format="json"
+        )
+
+        call_command("sweep_seat_holds", stdout=StringIO())
+
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(2, 2)]
+        )
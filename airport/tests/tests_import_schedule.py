@@ -0,0 +1,100 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from airport.models import Flight, Route
+from airport.tests.sample import sample_airplane, sample_airport, sample_crew
+
+
+SCHEDULE = """source,destination,airplane,departure_time,arrival_time,distance,crews
+Modlin,Boryspil,Boing 777,2030-01-01T10:00:00Z,2030-01-01T12:00:00Z,800,{crew}
+Modlin,Boryspil,Boing 777,2030-01-02T10:00:00Z,2030-01-02T12:00:00Z,800,
+Modlin,Nowhere,Boing 777,2030-01-03T10:00:00Z,2030-01-03T12:00:00Z,800,
+"""
+
+
+class ImportScheduleTests(TestCase):
+    def setUp(self):
+        sample_airport()
+        sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        sample_airplane()
+        self.crew = sample_crew()
+        schedule = tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False
+        )
+        schedule.write(SCHEDULE.format(crew=self.crew.id))
+        schedule.close()
+        self.path = schedule.name
+        self.addCleanup(os.remove, self.path)
+
+    def write_schedule(self, schedule):
+        with open(self.path, "w") as output:
+            output.write(schedule)
+
+    def import_schedule(self):
+        out, err = StringIO(), StringIO()
+        call_command("import_schedule", self.path, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_schedule(self):
+        out, err = self.import_schedule()
+
+        self.assertIn("Imported 2 flight(s), skipped 1", out)
+        self.assertIn("rows/sec", out)
+        self.assertIn("Row 3 skipped", err)
+        self.assertEqual(Route.objects.count(), 1)
+        self.assertEqual(Flight.objects.count(), 2)
+        flight = Flight.objects.get(departure_time="2030-01-01T10:00:00Z")
+        self.assertEqual(list(flight.crews.all()), [self.crew])
+
+    def test_import_schedule_is_idempotent(self):
+        self.import_schedule()
+        self.import_schedule()
+
+        self.assertEqual(Route.objects.count(), 1)
+        self.assertEqual(Flight.objects.count(), 2)
+        self.assertEqual(Flight.crews.through.objects.count(), 1)
+
+    def test_reimport_replaces_crews(self):
+        self.import_schedule()
+        other_crew = sample_crew(first_name="Other")
+        self.write_schedule(
+            SCHEDULE.format(crew=other_crew.id).replace(
+                "800,\n", f"800,{self.crew.id}\n", 1
+            )
+        )
+
+        self.import_schedule()
+
+        crews = {
+            flight.departure_time.day: list(flight.crews.all())
+            for flight in Flight.objects.prefetch_related("crews")
+        }
+        self.assertEqual(crews, {1: [other_crew], 2: [self.crew]})
+        flight = Flight.objects.get(departure_time="2030-01-01T10:00:00Z")
+        self.assertEqual(
+            flight.search_index.crews,
+            [f"{other_crew.first_name} {other_crew.last_name}"],
+        )
+
+    def test_rows_with_invalid_duration_skipped(self):
+        self.write_schedule(
+            "source,destination,airplane,departure_time,arrival_time\n"
+            "Modlin,Boryspil,Boing 777,2030-01-01T12:00:00Z,"
+            "2030-01-01T10:00:00Z\n"
+            "Modlin,Boryspil,Boing 777,2030-01-02T10:00:00Z,"
+            "2030-01-02T10:00:00Z\n"
+            "Modlin,Boryspil,Boing 777,2030-01-03T10:00:00Z,"
+            "2030-01-05T10:00:00Z\n"
+        )
+
+        out, err = self.import_schedule()
+
+        self.assertIn("Imported 0 flight(s), skipped 3", out)
+        self.assertIn("Row 1 skipped: arrival_time must be after", err)
+        self.assertIn("Row 2 skipped: arrival_time must be after", err)
+        self.assertIn("Row 3 skipped: flights last at most 24 hours", err)
+        self.assertFalse(Flight.objects.exists())
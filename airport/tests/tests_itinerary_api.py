@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.itinerary import flight_index
+from airport.models import Flight, Route
+from airport.tests.sample import sample_airplane, sample_airport
+
+
+ITINERARY_URL = reverse("airport:itinerary-list")
+
+class UnauthenticatedItineraryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ITINERARY_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedItineraryTests(TestCase):
+    def setUp(self):
+        flight_index.invalidate()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        kyiv = sample_airport(name="Boryspil", closest_big_city="Kyiv")
+        warsaw = sample_airport(name="Chopin", closest_big_city="Warsaw")
+        berlin = sample_airport(name="BER", closest_big_city="Berlin")
+        airplane = sample_airplane()
+        self.direct = self.create_flight(
+            Route.objects.create(
+                source=kyiv, destination=berlin, distance=1500
+            ),
+            airplane, "08:00", "20:00",
+        )
+        self.first_leg = self.create_flight(
+            Route.objects.create(
+                source=kyiv, destination=warsaw, distance=600
+            ),
+            airplane, "06:00", "07:30",
+        )
+        self.second_leg = self.create_flight(
+            Route.objects.create(
+                source=warsaw, destination=berlin, distance=550
+            ),
+            airplane, "09:00", "10:30",
+        )
+
+    @staticmethod
+    def create_flight(route, airplane, departure, arrival):
+        return Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=f"2030-05-01T{departure}:00Z",
+            arrival_time=f"2030-05-01T{arrival}:00Z",
+        )
+
+    def search(self, **params):
+        params = {
+            "source_city": "kyiv",
+            "destination_city": "Berlin",
+            "departure_date": "2030-05-01",
+            **params,
+        }
+        return self.client.get(ITINERARY_URL, params)
+
+    def test_connections_ranked_by_duration(self):
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [[leg["flight"] for leg in item["legs"]] for item in res.data],
+            [[self.first_leg.id, self.second_leg.id], [self.direct.id]],
+        )
+        self.assertEqual(res.data[0]["distance"], 1150)
+
+    def test_layover_and_max_legs_limits(self):
+        for params in ({"min_layover": 120}, {"max_legs": 1}):
+            res = self.search(**params)
+
+            self.assertEqual(
+                [[leg["flight"] for leg in item["legs"]] for item in res.data],
+                [[self.direct.id]],
+            )
+
+    def test_index_updated_on_flight_delete(self):
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.second_leg.delete()
+        res = self.search()
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_invalid_layover_range(self):
+        res = self.search(min_layover=100, max_layover=50)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.tests.sample import sample_flight
+from airport_api_service.metrics import (
+    registry,
+    label_value,
+    sql_shape,
+)
+
+
+METRICS_URL = reverse("metrics")
+FLIGHT_LIST = ("airport:flight-list", "list")
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_view_metrics_exposed(self):
+        sample_flight()
+        self.client.get(reverse("airport:flight-list"))
+
+        totals = registry.snapshot()[FLIGHT_LIST]
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(totals["requests"], 1)
+        self.assertGreater(totals["queries"], 0)
+        self.assertGreater(totals["serializer_seconds"], 0)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'airport_view_requests_total{view="airport:flight-list",'
+            'action="list"} 1',
+            res.content.decode(),
+        )
+
+    @override_settings(METRICS_N_PLUS_ONE_THRESHOLD=0)
+    def test_repeated_sql_flagged(self):
+        with self.assertLogs("airport_api_service.metrics", "WARNING"):
+            self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(
+            registry.snapshot()[FLIGHT_LIST]["n_plus_one"], 1
+        )
+
+    def test_non_drf_view_labelled_by_url_name(self):
+        self.client.get(reverse("admin:index"))
+
+        self.assertIn(("admin:index", "get"), registry.snapshot())
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token_required(self):
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_label_values_escaped(self):
+        self.assertEqual(
+            label_value('a\\b "c"\nd'), 'a\\\\b \\"c\\"\\nd'
+        )
+
+    def test_sql_shape(self):
+        self.assertEqual(
+            sql_shape("SELECT * FROM t WHERE id IN (1, 2, 3) AND a = 'x'"),
+            "SELECT * FROM t WHERE id IN (?) AND a = ?",
+        )
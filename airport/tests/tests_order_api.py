@@ -1,13 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework.test import APIClient
 from rest_framework import status
 from rest_framework.reverse import reverse
 
-from airport.models import Order
+from airport.models import Flight, Order, SeatHold, Ticket
 from airport.serializers import OrderListSerializer
-from airport.tests.sample import sample_airplane
+from airport.tests.sample import sample_airplane, sample_flight, sample_order
 
 
 ORDER_URL = reverse("airport:order-list")
@@ -39,3 +48,205 @@ class AuthenticatedOrderTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data )
+
+
+class OrderCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight()
+
+    def order_payload(self, seats):
+        return {
+            "tickets": [
+                {"row": row, "seat": seat, "flight": self.flight.id}
+                for row, seat in seats
+            ]
+        }
+
+    @override_settings(THROTTLE_STORE="cache")
+    def test_create_order_constant_queries(self):
+        with CaptureQueriesContext(connection) as small_order:
+            res = self.client.post(
+                ORDER_URL, self.order_payload([(1, 1)]), format="json"
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        seats = [(row, seat) for row in range(2, 7) for seat in range(1, 11)]
+        with CaptureQueriesContext(connection) as group_order:
+            res = self.client.post(
+                ORDER_URL, self.order_payload(seats), format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 50)
+        self.assertEqual(res.data["tickets"][0]["flight"], self.flight.id)
+        self.assertEqual(len(group_order), len(small_order))
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 51)
+
+    def test_create_order_lists_all_taken_seats(self):
+        order = sample_order()
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=1)
+        Ticket.objects.create(flight=self.flight, order=order, row=2, seat=2)
+
+        res = self.client.post(
+            ORDER_URL,
+            self.order_payload([(1, 1), (2, 2), (3, 3), (3, 3)]),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["taken_places"][str(self.flight.id)],
+            ["row:1 seat:1", "row:2 seat:2", "row:3 seat:3"],
+        )
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 0)
+
+    def test_create_order_seat_out_of_range(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (11, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row", res.data)
+
+    def test_auto_assign_seats(self):
+        order = sample_order()
+        Ticket.objects.create(flight=self.flight, order=order, row=1, seat=1)
+        SeatHold.objects.create(
+            flight=self.flight,
+            row=1,
+            seat=2,
+            user=order.user,
+            expires_at="2100-01-01T00:00:00Z",
+        )
+
+        res = self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [{"row": 1, "seat": 3, "flight": self.flight.id}],
+                "auto_assign": [{"flight": self.flight.id, "count": 2}],
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(
+                (ticket["row"], ticket["seat"])
+                for ticket in res.data["tickets"]
+            ),
+            [(1, 3), (1, 4), (1, 5)],
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 4)
+
+    def test_auto_assign_seats_together(self):
+        order = sample_order()
+        for seat in (3, 7):
+            Ticket.objects.create(
+                flight=self.flight, order=order, row=1, seat=seat
+            )
+
+        res = self.client.post(
+            ORDER_URL,
+            {
+                "auto_assign": [
+                    {"flight": self.flight.id, "count": 4, "together": True}
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(
+                (ticket["row"], ticket["seat"])
+                for ticket in res.data["tickets"]
+            ),
+            [(2, 1), (2, 2), (2, 3), (2, 4)],
+        )
+
+    def test_auto_assign_too_many_seats(self):
+        for payload in (
+            {"flight": self.flight.id, "count": 11, "together": True},
+            {"flight": self.flight.id, "count": 101},
+        ):
+            res = self.client.post(
+                ORDER_URL, {"auto_assign": [payload]}, format="json"
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("auto_assign", res.data)
+
+    def test_auto_assign_sold_out(self):
+        self.client.post(
+            ORDER_URL,
+            {"auto_assign": [{"flight": self.flight.id, "count": 99}]},
+            format="json",
+        )
+
+        res = self.client.post(
+            ORDER_URL,
+            {"auto_assign": [{"flight": self.flight.id, "count": 2}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            str(res.data["auto_assign"]),
+            f"Not enough free seats on flight {self.flight.id}",
+        )
+        self.assertEqual(Ticket.objects.count(), 99)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentOrderTests(TransactionTestCase):
+    buyers = 20
+    seats_per_buyer = 3
+
+    def setUp(self):
+        self.flight = sample_flight()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"buyer{index}@gmail.com", password="<PASSWORD>"
+            )
+            for index in range(self.buyers)
+        ]
+
+    def book(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        try:
+            return client.post(
+                ORDER_URL,
+                {
+                    "auto_assign": [
+                        {
+                            "flight": self.flight.id,
+                            "count": self.seats_per_buyer,
+                            "together": True,
+                        }
+                    ]
+                },
+                format="json",
+            ).status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_auto_assign(self):
+        with ThreadPoolExecutor(max_workers=self.buyers) as executor:
+            statuses = list(executor.map(self.book, self.users))
+
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * self.buyers)
+        seats = list(Ticket.objects.values_list("row", "seat"))
+        self.assertEqual(len(seats), self.buyers * self.seats_per_buyer)
+        self.assertEqual(len(set(seats)), len(seats))
+        self.assertEqual(
+            Flight.objects.get(id=self.flight.id).tickets_sold, len(seats)
+        )
@@ -0,0 +1,109 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport import pricing
+from airport.models import Ticket
+from airport.tests.sample import sample_flight
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+@override_settings(
+    FARE_BASE="20.00",
+    FARE_PER_KM="0.10",
+    FARE_LOAD_FACTORS={0.5: "1.5", 0.9: "2"},
+)
+class FareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fare(self):
+        self.assertEqual(pricing.fare(1000, 0, 100), Decimal("120.00"))
+        self.assertEqual(pricing.fare(1000, 49, 100), Decimal("120.00"))
+        self.assertEqual(pricing.fare(1000, 50, 100), Decimal("180.00"))
+        self.assertEqual(pricing.fare(1000, 95, 100), Decimal("240.00"))
+        self.assertEqual(pricing.fare(333, 0, 100), Decimal("53.30"))
+
+    def test_quotes_cached_per_seats_sold(self):
+        with mock.patch(
+            "airport.pricing.fare", wraps=pricing.fare
+        ) as fare:
+            quotes = pricing.quote_fares([(1, 1000, 0, 100), (2, 500, 60, 100)])
+            self.assertEqual(
+                quotes, {1: Decimal("120.00"), 2: Decimal("105.00")}
+            )
+            self.assertEqual(fare.call_count, 2)
+
+            pricing.quote_fares([(1, 1000, 0, 100), (2, 500, 60, 100)])
+            self.assertEqual(fare.call_count, 2)
+
+            pricing.quote_fares([(1, 1000, 1, 100)])
+            self.assertEqual(fare.call_count, 3)
+
+
+@override_settings(
+    FARE_BASE="20.00",
+    FARE_PER_KM="0.10",
+    FARE_LOAD_FACTORS={0.01: "2"},
+)
+class FareApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        # 1200 km, 10 x 10 seats
+        self.flight = sample_flight()
+
+    def test_search_price_follows_seats_sold(self):
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.data["results"][0]["price"], "140.00")
+
+        Ticket.objects.create(flight=self.flight, row=1, seat=1)
+
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.data["results"][0]["price"], "280.00")
+
+    def test_detail_price(self):
+        res = self.client.get(
+            reverse("airport:flight-detail", args=[self.flight.id])
+        )
+
+        self.assertEqual(res.data["price"], "140.00")
+
+    def test_price_stored_at_purchase(self):
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["tickets"][0]["price"], "140.00")
+
+        res = self.client.post(
+            ORDER_URL,
+            {"auto_assign": [{"flight": self.flight.id, "count": 2}]},
+            format="json",
+        )
+        self.assertEqual(
+            [ticket["price"] for ticket in res.data["tickets"]],
+            ["280.00", "280.00"],
+        )
+        self.assertEqual(
+            list(
+                Ticket.objects.order_by("id").values_list("price", flat=True)
+            ),
+            [Decimal("140.00"), Decimal("280.00"), Decimal("280.00")],
+        )
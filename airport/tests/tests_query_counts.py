@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.cache import get_reference_cache
+from airport.itinerary import flight_index
+from airport.models import AirplaneType, Flight, Order, Ticket
+from airport.tests.factories import (
+    bulk_airplanes,
+    bulk_airports,
+    bulk_crews,
+    bulk_flights,
+    bulk_routes,
+    bulk_tickets,
+)
+
+PAGE_SIZES = (1, 10, 100)
+
+# Queries per request, the same for every page size
+LIST_QUERIES = {
+    "airport:airport-list": 2,
+    "airport:route-list": 2,
+    "airport:airplane-list": 2,
+    "airport:airplanetype-list": 2,
+    "airport:crew-list": 2,
+    "airport:flight-list": 2,
+    "airport:ticket-list": 2,
+    "airport:order-list": 3,
+}
+ASYNC_LIST_QUERIES = {
+    "airport:async-airport-list": 3,
+    "airport:async-route-list": 3,
+    "airport:async-flight-list": 3,
+}
+DETAIL_QUERIES = {
+    "airport:flight-detail": 3,
+    "airport:order-detail": 2,
+}
+
+
+# Counted without the throttle counter queries of the database store
+@override_settings(THROTTLE_STORE="cache")
+class QueryCountTests(TestCase):
+    """Query counts must not grow with page size or related rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        size = PAGE_SIZES[-1]
+        airports = bulk_airports(size, prefix="Query")
+        routes = bulk_routes(airports, routes_per_airport=2)
+        airplanes = bulk_airplanes(size, prefix="Query")
+        AirplaneType.objects.bulk_create(
+            AirplaneType(name=f"Query type {index}") for index in range(size)
+        )
+        cls.crews = bulk_crews(size)
+        flights = bulk_flights(size, routes, airplanes, cls.crews)
+        bulk_tickets(size, flights, cls.user, tickets_per_order=1)
+
+        # A flight and an order with 1, 10 and 100 tickets and crews each
+        cls.flights, cls.orders = {}, {}
+        departure_time = timezone.now() + timedelta(days=365)
+        for index, related in enumerate(PAGE_SIZES):
+            airplane = airplanes[index]
+            flight = Flight.objects.create(
+                route=routes[index],
+                airplane=airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=2),
+            )
+            flight.crews.set(cls.crews[:related])
+            order = Order.objects.create(user=cls.user)
+            Ticket.objects.bulk_create(
+                Ticket(
+                    flight=flight,
+                    order=order,
+                    row=seat // airplane.seats_in_row + 1,
+                    seat=seat % airplane.seats_in_row + 1,
+                )
+                for seat in range(related)
+            )
+            cls.flights[related], cls.orders[related] = flight, order
+
+    def setUp(self):
+        get_reference_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def assert_page_queries(self, get, url, queries, sizes=PAGE_SIZES):
+        for size in sizes:
+            with self.subTest(url=url, size=size):
+                with self.assertNumQueries(queries):
+                    res = get(url, {"limit": size})
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data["results"]), size)
+
+    def test_list_endpoints(self):
+        for name, queries in LIST_QUERIES.items():
+            self.assert_page_queries(self.client.get, reverse(name), queries)
+
+    def async_get(self, url, params=None):
+        """GET through the ASGI handler, the JWT costs one user query"""
+        token = RefreshToken.for_user(self.user).access_token
+        res = async_to_sync(self.async_client.get)(
+            url, params, headers={"Authorization": f"Bearer {token}"}
+        )
+        res.data = res.json()
+        return res
+
+    def test_async_list_endpoints(self):
+        for name, queries in ASYNC_LIST_QUERIES.items():
+            self.assert_page_queries(self.async_get, reverse(name), queries)
+
+    def test_detail_endpoints(self):
+        for related in PAGE_SIZES:
+            for name, obj in (
+                ("airport:flight-detail", self.flights[related]),
+                ("airport:order-detail", self.orders[related]),
+            ):
+                with self.subTest(name=name, related=related):
+                    with self.assertNumQueries(DETAIL_QUERIES[name]):
+                        res = self.client.get(reverse(name, args=[obj.id]))
+                    self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_async_flight_detail(self):
+        for related in PAGE_SIZES:
+            url = reverse(
+                "airport:async-flight-detail",
+                args=[self.flights[related].id],
+            )
+            with self.subTest(related=related):
+                with self.assertNumQueries(4):
+                    res = self.async_get(url)
+                self.assertEqual(len(res.data["crews"]), related)
+                self.assertEqual(len(res.data["taken_places"]), related)
+
+    def test_single_row_detail_endpoints(self):
+        ticket = Ticket.objects.first()
+        for name, obj in (
+            ("airport:ticket-detail", ticket),
+            ("airport:crew-detail", self.crews[0]),
+        ):
+            with self.subTest(name=name):
+                with self.assertNumQueries(1):
+                    res = self.client.get(reverse(name, args=[obj.id]))
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_itinerary_list(self):
+        flight = self.flights[1]
+        params = {
+            "source_city": flight.route.source.closest_big_city,
+            "destination_city": flight.route.destination.closest_big_city,
+        }
+        flight_index.invalidate()
+        self.client.get(reverse("airport:itinerary-list"), params)
+
+        for limit in (1, 10, 20):
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(0):
+                    res = self.client.get(
+                        reverse("airport:itinerary-list"),
+                        {**params, "limit": limit},
+                    )
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,185 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.models import Airplane, Flight, Route
+from airport.rotation import CONTINUITY, OVERLAP, Leg, check_rotations
+from airport.tests.sample import (
+    sample_airplane,
+    sample_airport,
+    sample_crew,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+VIOLATIONS_URL = reverse("airport:airplane-rotation-violations")
+START = datetime(2030, 1, 1, 8, tzinfo=dt_timezone.utc)
+
+
+def at(hours):
+    return START + timedelta(hours=hours)
+
+
+class CheckRotationsTests(TestCase):
+    def test_rotation_violations(self):
+        legs = [
+            Leg(1, 1, at(0), at(2), 10, 20),
+            Leg(2, 1, at(3), at(5), 20, 10),
+            Leg(3, 1, at(4), at(6), 10, 20),
+            Leg(4, 1, at(7), at(8), 30, 10),
+            Leg(5, 2, at(1), at(9), 10, 20),
+            Leg(6, 2, at(2), at(3), 20, 10),
+            Leg(7, 2, at(4), at(5), 10, 20),
+            Leg(8, 3, at(0), at(1), 30, 10),
+        ]
+
+        self.assertEqual(
+            [
+                (kind, leg.flight_id, other.flight_id)
+                for kind, leg, other in check_rotations(reversed(legs))
+            ],
+            [
+                (OVERLAP, 3, 2),
+                (CONTINUITY, 4, 3),
+                (OVERLAP, 6, 5),
+                (OVERLAP, 7, 5),
+            ],
+        )
+
+
+class RotationApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "testpass", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.modlin = sample_airport()
+        self.kyiv = sample_airport(name="Kyiv")
+        self.lviv = sample_airport(name="Lviv")
+        self.airplane = sample_airplane()
+        self.crew = sample_crew()
+        self.flight = self.create_flight(self.modlin, self.kyiv, 0, 2)
+
+    def route(self, source, destination):
+        return Route.objects.get_or_create(
+            source=source, destination=destination, distance=500
+        )[0]
+
+    def create_flight(self, source, destination, departure, arrival,
+                      airplane=None):
+        return Flight.objects.create(
+            route=self.route(source, destination),
+            airplane=airplane or self.airplane,
+            departure_time=at(departure),
+            arrival_time=at(arrival),
+        )
+
+    def post_flight(self, source, destination, departure, arrival):
+        return self.client.post(
+            FLIGHT_URL,
+            {
+                "route": self.route(source, destination).id,
+                "airplane": self.airplane.id,
+                "departure_time": at(departure).isoformat(),
+                "arrival_time": at(arrival).isoformat(),
+                "crews": [self.crew.id],
+            },
+        )
+
+    def test_create_flight_checks_overlap(self):
+        res = self.post_flight(self.kyiv, self.modlin, 1, 3)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(
+            f"flight {self.flight.id}", res.data["departure_time"][0]
+        )
+
+    def test_create_flight_checks_continuity(self):
+        later = self.create_flight(self.modlin, self.kyiv, 10, 12)
+
+        res = self.post_flight(self.lviv, self.modlin, 4, 6)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"flight {self.flight.id}", res.data["route"][0])
+
+        res = self.post_flight(self.kyiv, self.lviv, 4, 6)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f"flight {later.id}", res.data["route"][0])
+
+        res = self.post_flight(self.kyiv, self.modlin, 4, 6)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(THROTTLE_STORE="cache")
+    def test_fleet_violations(self):
+        overlapping = self.create_flight(self.kyiv, self.modlin, 1, 3)
+        for number in range(3):
+            airplane = Airplane.objects.create(
+                name=f"Airplane {number}",
+                rows=10,
+                seats_in_row=10,
+                airplane_type=self.airplane.airplane_type,
+            )
+            self.create_flight(self.modlin, self.kyiv, 0, 2, airplane)
+            self.create_flight(self.kyiv, self.modlin, 3, 5, airplane)
+        displaced = self.create_flight(self.lviv, self.kyiv, 6, 8, airplane)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(VIOLATIONS_URL, {"start": at(-1)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "kind": OVERLAP,
+                    "airplane": self.airplane.id,
+                    "flight": overlapping.id,
+                    "previous_flight": self.flight.id,
+                },
+                {
+                    "kind": CONTINUITY,
+                    "airplane": airplane.id,
+                    "flight": displaced.id,
+                    "previous_flight": displaced.id - 1,
+                },
+            ],
+        )
+
+    def test_import_skips_double_booking(self):
+        schedule = tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False
+        )
+        schedule.write(
+            "source,destination,airplane,departure_time,arrival_time,"
+            "distance\n"
+            f"Kyiv,Modlin,{self.airplane.name},{at(1).isoformat()},"
+            f"{at(3).isoformat()},500\n"
+            f"Lviv,Kyiv,{self.airplane.name},{at(4).isoformat()},"
+            f"{at(6).isoformat()},500\n"
+        )
+        schedule.close()
+        self.addCleanup(os.remove, schedule.name)
+        out, err = StringIO(), StringIO()
+
+        call_command("import_schedule", schedule.name, stdout=out, stderr=err)
+
+        self.assertIn("Imported 1 flight(s), skipped 1", out.getvalue())
+        self.assertIn(
+            f"Row 1 skipped: airplane {self.airplane.id} is on flight "
+            f"{self.flight.id}",
+            err.getvalue(),
+        )
+        self.assertIn(
+            f"departs row 2 from airport {self.lviv.id} after arriving at "
+            f"airport {self.kyiv.id} with flight {self.flight.id}",
+            err.getvalue(),
+        )
+        self.assertEqual(Flight.objects.count(), 2)
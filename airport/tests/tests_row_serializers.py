@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from airport.models import Flight, FlightSearchIndex, Order, Ticket
+from airport.serializers import (
+    FlightListSerializer,
+    FlightListRowSerializer,
+    OrderListSerializer,
+    OrderListRowSerializer,
+    TicketListSerializer,
+    TicketListRowSerializer,
+)
+from airport.tests.factories import seed_dataset
+from airport.views import with_tickets_available
+
+
+class RowSerializerTests(TestCase):
+    def setUp(self):
+        seed_dataset(
+            airports=10, airplanes=3, flights=20, tickets=100, crews=5
+        )
+        flight = Flight.objects.first()
+        Ticket.objects.create(flight=flight, order=None, row=1, seat=1)
+        self.user = get_user_model().objects.get(email="bench@example.com")
+
+    def assert_same_json(self, serializer_class, row_serializer_class,
+                         queryset, row_queryset=None):
+        if row_queryset is None:
+            row_queryset = queryset
+        self.assertEqual(
+            JSONRenderer().render(
+                row_serializer_class(
+                    row_serializer_class.rows(row_queryset), many=True
+                ).data
+            ),
+            JSONRenderer().render(serializer_class(queryset, many=True).data),
+        )
+
+    def test_flight_list(self):
+        self.assert_same_json(
+            FlightListSerializer,
+            FlightListRowSerializer,
+            with_tickets_available(
+                Flight.objects.prefetch_related("crews")
+            ),
+            FlightSearchIndex.objects.order_by("flight_id"),
+        )
+
+    def test_ticket_list(self):
+        self.assert_same_json(
+            TicketListSerializer,
+            TicketListRowSerializer,
+            Ticket.objects.order_by("id"),
+        )
+
+    def test_order_list(self):
+        self.assert_same_json(
+            OrderListSerializer,
+            OrderListRowSerializer,
+            Order.objects.filter(user=self.user).order_by("id"),
+        )
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        for row_serializer_class, queryset, queries in (
+            (FlightListRowSerializer, FlightSearchIndex.objects.all(), 1),
+            (TicketListRowSerializer, Ticket.objects.all(), 1),
+            (OrderListRowSerializer, Order.objects.all(), 2),
+        ):
+            with self.assertNumQueries(queries):
+                row_serializer_class(
+                    row_serializer_class.rows(queryset), many=True
+                ).data
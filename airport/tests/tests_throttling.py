@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from airport.models import ThrottleCounter
+from airport.throttling import SlidingWindowRateThrottle
+
+START = 60 * 1_000_000
+
+
+class FakeThrottle(SlidingWindowRateThrottle):
+    rate = "3/min"
+    now = START
+
+    def get_cache_key(self, request, view):
+        return "throttle_test_client"
+
+    def timer(self):
+        return FakeThrottle.now
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def allow_at(self, now):
+        FakeThrottle.now = now
+        throttle = FakeThrottle()
+        return throttle.allow_request(None, None), throttle
+
+    def test_sliding_window(self):
+        for store in ("cache", "database"):
+            cache.clear()
+            ThrottleCounter.objects.all().delete()
+            with self.subTest(store=store), override_settings(
+                THROTTLE_STORE=store
+            ):
+                for _ in range(3):
+                    self.assertTrue(self.allow_at(START + 10)[0])
+                allowed, throttle = self.allow_at(START + 20)
+                self.assertFalse(allowed)
+                self.assertEqual(throttle.wait(), 40)
+
+                # Half way through the next window 3 * 0.5 + 1 still fits
+                self.assertTrue(self.allow_at(START + 90)[0])
+                allowed, throttle = self.allow_at(START + 90)
+                self.assertFalse(allowed)
+                self.assertAlmostEqual(throttle.wait(), 10)
+
+                # The previous window no longer counts at all
+                for _ in range(2):
+                    self.assertTrue(self.allow_at(START + 120)[0])
+                self.assertFalse(self.allow_at(START + 120)[0])
+
+    @override_settings(THROTTLE_STORE="database")
+    def test_database_store_swept(self):
+        ThrottleCounter.objects.create(
+            key="gone",
+            bucket=1,
+            hits=5,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        for now in (START + 59, START + 119, START + 179):
+            self.allow_at(now)
+            self.allow_at(now)
+        call_command("sweep_throttle_counters", stdout=StringIO())
+
+        self.assertEqual(
+            list(
+                ThrottleCounter.objects.order_by("bucket").values_list(
+                    "key", "hits"
+                )
+            ),
+            [("throttle_test_client", 2)] * 3,
+        )
+
+    @override_settings(THROTTLE_STORE="cache")
+    def test_cache_counter_expired_before_incr(self):
+        incr = cache.incr
+
+        def expire_then_incr(key, *args, **kwargs):
+            cache.delete(key)
+            return incr(key, *args, **kwargs)
+
+        with mock.patch.object(cache, "incr", side_effect=expire_then_incr):
+            allowed, throttle = self.allow_at(START + 10)
+
+        self.assertTrue(allowed)
+        self.assertEqual(throttle.current, 1)
+        self.assertTrue(self.allow_at(START + 10)[0])
+        self.assertEqual(cache.get(f"throttle_test_client:{START // 60}"), 2)
+
+
+class ScopedThrottleApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_flight_search_has_own_budget(self):
+        with mock.patch.dict(
+            SlidingWindowRateThrottle.THROTTLE_RATES,
+            {"flight_search": "2/min"},
+        ):
+            for _ in range(2):
+                res = self.client.get(reverse("airport:flight-list"))
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            res = self.client.get(reverse("airport:flight-list"))
+            order_res = self.client.get(reverse("airport:order-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+        self.assertEqual(order_res.status_code, status.HTTP_200_OK)
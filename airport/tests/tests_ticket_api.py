@@ -1,4 +1,8 @@
+import json
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
 from rest_framework.test import APIClient
@@ -11,6 +15,7 @@ from airport.tests.sample import sample_ticket, sample_flight, sample_order
 
 
 TICKET_URL = reverse("airport:ticket-list")
+TICKET_EXPORT_URL = reverse("airport:ticket-export")
 
 class UnauthenticatedTicketTests(TestCase):
     def setUp(self):
@@ -40,6 +45,17 @@ class AuthenticatedTicketTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data )
 
+    def test_ticket_list_cursor_pagination(self):
+        ticket = sample_ticket()
+
+        res = self.client.get(TICKET_URL, {"pagination": "cursor"})
+        offset_res = self.client.get(TICKET_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        self.assertEqual(res.data["results"][0]["id"], ticket.id)
+        self.assertEqual(offset_res.data["count"], 1)
+
     def test_create_ticket(self):
         flight = sample_flight()
         order = sample_order()
@@ -54,6 +70,11 @@ class AuthenticatedTicketTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
 
+    def test_export_forbidden(self):
+        res = self.client.get(TICKET_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class AdminTicketApiTests(TestCase):
     def setUp(self):
@@ -76,3 +97,56 @@ class AdminTicketApiTests(TestCase):
         res = self.client.post(TICKET_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_export_csv(self):
+        ticket = sample_ticket()
+
+        res = self.client.get(TICKET_EXPORT_URL)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(
+            lines[0].split(",")[:4], ["ticket", "row", "seat", "flight"]
+        )
+        self.assertEqual(
+            lines[1].split(",")[:4],
+            [str(ticket.id), "10", "10", str(ticket.flight_id)],
+        )
+
+    def test_export_flight_manifest_ndjson(self):
+        ticket = sample_ticket()
+
+        res = self.client.get(
+            TICKET_EXPORT_URL,
+            {
+                "export_format": "ndjson",
+                "flight": ticket.flight_id,
+                "departure_from": "2020-10-10",
+                "departure_to": "2020-10-10",
+            },
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+        other_day = self.client.get(
+            TICKET_EXPORT_URL,
+            {"export_format": "ndjson", "departure_from": "2020-10-11"},
+        )
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["ticket"], ticket.id)
+        self.assertEqual(rows[0]["email"], ticket.order.user.email)
+        self.assertEqual(b"".join(other_day.streaming_content), b"")
+
+    def test_export_tickets_command(self):
+        ticket = sample_ticket()
+        out = StringIO()
+
+        call_command(
+            "export_tickets", "--format", "ndjson",
+            "--flight", str(ticket.flight_id), stdout=out,
+        )
+
+        self.assertEqual(json.loads(out.getvalue())["ticket"], ticket.id)
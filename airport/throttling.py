@@ -0,0 +1,215 @@
+"""
+Sliding-window rate throttles with shared, fixed-size counters.
+
+DRF's throttles keep a list of request timestamps per client in the
+default cache, which grows with the rate and is per-process with locmem.
+These keep two integers per client instead, the hits in the current and
+the previous window, and estimate the rate over the last window as
+
+    previous * (1 - elapsed fraction of current window) + current
+
+Counters live in a store chosen by THROTTLE_STORE: "cache" (the
+default) uses the THROTTLE_CACHE_ALIAS cache, shared by all workers with
+Redis but per process with locmem, "database" the ThrottleCounter table,
+shared without Redis at the cost of a write per request. Its expired
+rows are deleted by the sweep_throttle_counters command.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from rest_framework import throttling
+from rest_framework.settings import api_settings
+
+from airport.models import ThrottleCounter
+
+UPSERT_SQL = """
+WITH hit AS (
+    INSERT INTO {table} (key, bucket, hits, expires_at)
+    VALUES (%s, %s, 1, %s)
+    ON CONFLICT (key, bucket) DO UPDATE SET hits = {table}.hits + 1
+    RETURNING hits
+)
+SELECT
+    (SELECT hits FROM hit),
+    COALESCE(
+        (SELECT hits FROM {table} WHERE key = %s AND bucket = %s), 0
+    )
+"""
+
+
+class CacheWindowStore:
+    """Counters in a Django cache, atomic where incr is (Redis)"""
+
+    def __init__(self):
+        self.cache = caches[
+            getattr(settings, "THROTTLE_CACHE_ALIAS", "default")
+        ]
+
+    @staticmethod
+    def bucket_key(key, bucket):
+        return f"{key}:{bucket}"
+
+    def hit(self, key, bucket, duration):
+        """Count a hit, return (previous, current) window hits"""
+        current_key = self.bucket_key(key, bucket)
+        # Kept while it can still be the previous window
+        timeout = 2 * duration + 1
+        self.cache.add(current_key, 0, timeout=timeout)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # Expired or evicted since add()
+            if self.cache.add(current_key, 1, timeout=timeout):
+                current = 1
+            else:
+                current = self.cache.incr(current_key)
+        previous = self.cache.get(self.bucket_key(key, bucket - 1), 0)
+        return previous, current
+
+    def undo(self, key, bucket):
+        try:
+            self.cache.decr(self.bucket_key(key, bucket))
+        except ValueError:
+            pass
+
+
+class DatabaseWindowStore:
+    """Counters in the ThrottleCounter table, one upsert per hit in Postgres"""
+
+    def hit(self, key, bucket, duration):
+        """Count a hit, return (previous, current) window hits"""
+        expires_at = timezone.now() + timedelta(seconds=2 * duration)
+        if connection.vendor == "postgresql":
+            table = connection.ops.quote_name(ThrottleCounter._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    UPSERT_SQL.format(table=table),
+                    [key, bucket, expires_at, key, bucket - 1],
+                )
+                current, previous = cursor.fetchone()
+        else:
+            current, previous = self.hit_orm(key, bucket, expires_at)
+        return previous, current
+
+    @staticmethod
+    def hit_orm(key, bucket, expires_at):
+        counters = ThrottleCounter.objects.filter(key=key)
+        with transaction.atomic():
+            if not counters.filter(bucket=bucket).update(
+                hits=F("hits") + 1
+            ):
+                try:
+                    with transaction.atomic():
+                        ThrottleCounter.objects.create(
+                            key=key,
+                            bucket=bucket,
+                            hits=1,
+                            expires_at=expires_at,
+                        )
+                except IntegrityError:
+                    counters.filter(bucket=bucket).update(
+                        hits=F("hits") + 1
+                    )
+            hits = dict(
+                counters.filter(bucket__in=(bucket - 1, bucket)).values_list(
+                    "bucket", "hits"
+                )
+            )
+        return hits[bucket], hits.get(bucket - 1, 0)
+
+    def undo(self, key, bucket):
+        ThrottleCounter.objects.filter(key=key, bucket=bucket).update(
+            hits=F("hits") - 1
+        )
+
+
+THROTTLE_STORES = {
+    "cache": CacheWindowStore,
+    "database": DatabaseWindowStore,
+}
+
+
+def get_throttle_store():
+    return THROTTLE_STORES[getattr(settings, "THROTTLE_STORE", "cache")]()
+
+
+class SlidingWindowRateThrottle(throttling.SimpleRateThrottle):
+    """SimpleRateThrottle counting hits in a sliding window"""
+
+    def get_rate(self):
+        # The current rates, not the copy DRF took at import, so that
+        # override_settings(REST_FRAMEWORK=...) applies to them
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.bucket = int(self.now // self.duration)
+        store = get_throttle_store()
+        self.previous, self.current = store.hit(
+            self.key, self.bucket, self.duration
+        )
+        if self.estimate() > self.num_requests:
+            # Refused requests do not use up the budget
+            store.undo(self.key, self.bucket)
+            self.current -= 1
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def elapsed(self):
+        return self.now - self.bucket * self.duration
+
+    def estimate(self):
+        weight = 1 - self.elapsed() / self.duration
+        return self.previous * weight + self.current
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        remaining = self.duration - self.elapsed()
+        if self.current >= self.num_requests or not self.previous:
+            return remaining
+        # Seconds until previous * weight + current + 1 fits the rate
+        fraction = 1 - (self.num_requests - self.current - 1) / self.previous
+        return min(
+            remaining, max(0.0, fraction * self.duration - self.elapsed())
+        )
+
+
+class AnonRateThrottle(
+    SlidingWindowRateThrottle, throttling.AnonRateThrottle
+):
+    pass
+
+
+class UserRateThrottle(
+    SlidingWindowRateThrottle, throttling.UserRateThrottle
+):
+    pass
+
+
+class ScopedRateThrottle(
+    SlidingWindowRateThrottle, throttling.ScopedRateThrottle
+):
+    """Separate budget per view (or action) throttle_scope"""
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -2,6 +2,12 @@ from django.urls import path, include
 
 from rest_framework import routers
 
+from airport.async_views import (
+    AsyncAirportListView,
+    AsyncRouteListView,
+    AsyncFlightListView,
+    AsyncFlightDetailView,
+)
 from airport.views import (
     AirportViewSet,
     RouteViewSet,
@@ -10,7 +16,8 @@ from airport.views import (
     TicketViewSet,
     OrderViewSet,
     CrewViewSet,
-    FlightViewSet
+    FlightViewSet,
+    ItineraryViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -22,8 +29,32 @@ router.register("ticket", TicketViewSet)
 router.register("order", OrderViewSet)
 router.register("crew", CrewViewSet)
 router.register("flight", FlightViewSet)
+router.register("itinerary", ItineraryViewSet, basename="itinerary")
+
 
+# Async (ASGI) read path of the busiest GET endpoints
+async_urlpatterns = [
+    path(
+        "airport/",
+        AsyncAirportListView.as_view(),
+        name="async-airport-list",
+    ),
+    path("route/", AsyncRouteListView.as_view(), name="async-route-list"),
+    path(
+        "flight/",
+        AsyncFlightListView.as_view(),
+        name="async-flight-list",
+    ),
+    path(
+        "flight/<int:pk>/",
+        AsyncFlightDetailView.as_view(),
+        name="async-flight-detail",
+    ),
+]
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("async/", include(async_urlpatterns)),
+    path("", include(router.urls)),
+]
 
 app_name = "airport"
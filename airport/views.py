@@ -1,23 +1,39 @@
-from datetime import datetime
-
-from django.db.models import F, Count
+import base64
+import hashlib
+from datetime import datetime, timedelta
+
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from rest_framework import mixins
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from airport.cache import CachedListMixin, ConditionalGetMixin
+from airport.export import EXPORT_FORMATS, export_lines, filter_manifest
+from airport.itinerary import flight_index
 from airport.models import (
     Airport,
     Route,
     Flight,
+    FlightSearchIndex,
     Crew,
     Airplane,
     AirplaneType,
     Ticket,
     Order,
+    normalize_city,
 )
+from airport.pagination import LimitOffsetOrCursorPagination
+from airport.roster import CrewRoster, crew_schedule
+from airport.rotation import fleet_violations
 from airport.serializers import (
     AirportSerializer,
     RouteSerializer,
@@ -27,16 +43,139 @@ from airport.serializers import (
     TicketSerializer,
     OrderSerializer,
     CrewSerializer,
+    CrewDutySerializer,
+    CrewScheduleQuerySerializer,
+    AvailableCrewQuerySerializer,
     FlightSerializer,
     AirplaneListSerializer,
+    RotationQuerySerializer,
+    RotationViolationSerializer,
     TicketListSerializer,
+    TicketListRowSerializer,
     OrderListSerializer,
+    OrderListRowSerializer,
     FlightListSerializer,
+    FlightListRowSerializer,
     FlightDetailSerializer,
+    FlightSeatMapSerializer,
+    SeatHoldCreateSerializer,
+    SeatHoldSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
+    TicketExportSerializer,
 )
+from airport_api_service.metrics import SerializerTimingMixin
+
+
+def parse_day(date_string):
+    return datetime.strptime(date_string, "%Y-%m-%d").date()
+
+
+def day_range(date_string):
+    """Return [start, end) datetimes of a %Y-%m-%d day for range filters"""
+    start = timezone.make_aware(datetime.strptime(date_string, "%Y-%m-%d"))
+    return start, start + timedelta(days=1)
+
+
+def with_tickets_available(queryset):
+    return (
+        queryset.select_related("airplane").annotate(
+            tickets_available=F("airplane__rows")
+            * F("airplane__seats_in_row")
+            - F("tickets_sold")
+        )
+    ).order_by("id")
+
+
+def search_flights(queryset, query_params):
+    """Apply the flight list date and city filters from query_params"""
+    departure_date = query_params.get("departure_date")
+    arrival_date = query_params.get("arrival_date")
+    source_city = query_params.get("source_city")
+    destination_city = query_params.get("destination_city")
+
+    if departure_date:
+        start, end = day_range(departure_date)
+        queryset = queryset.filter(
+            departure_time__gte=start, departure_time__lt=end
+        )
+
+    if arrival_date:
+        start, end = day_range(arrival_date)
+        queryset = queryset.filter(
+            arrival_time__gte=start, arrival_time__lt=end
+        )
+
+    if source_city:
+        queryset = queryset.filter(
+            route__source__closest_big_city__icontains=source_city
+        )
+
+    if destination_city:
+        queryset = queryset.filter(
+            route__destination__closest_big_city__icontains=destination_city
+        )
+
+    return queryset
+
+
+def search_flight_index(query_params):
+    """search_flights() on FlightSearchIndex, one query without joins"""
+    queryset = FlightSearchIndex.objects.order_by("flight_id")
+    departure_date = query_params.get("departure_date")
+    arrival_date = query_params.get("arrival_date")
+    source_city = query_params.get("source_city")
+    destination_city = query_params.get("destination_city")
+
+    if departure_date:
+        queryset = queryset.filter(departure_date=parse_day(departure_date))
+
+    if arrival_date:
+        queryset = queryset.filter(arrival_date=parse_day(arrival_date))
+
+    if source_city:
+        queryset = queryset.filter(
+            source_city_norm__contains=normalize_city(source_city)
+        )
+
+    if destination_city:
+        queryset = queryset.filter(
+            dest_city_norm__contains=normalize_city(destination_city)
+        )
+
+    return FlightListRowSerializer.rows(queryset)
+
+
+FLIGHT_SEARCH_PARAMETERS = [
+    OpenApiParameter(
+        "departure_date",
+        type=OpenApiTypes.DATE,
+        description="Filter by departure date "
+                    "(ex. ?departure_date=2019-01-10)",
+    ),
+    OpenApiParameter(
+        "arrival_date",
+        type=OpenApiTypes.DATE,
+        description="Filter by arrival date "
+                    "(ex. ?arrival_date=2019-01-10)",
+    ),
+    OpenApiParameter(
+        "source_city",
+        type=OpenApiTypes.STR,
+        description="Filter by source city (ex. ?source_city=Kyiv)",
+    ),
+    OpenApiParameter(
+        "destination_city",
+        type=OpenApiTypes.STR,
+        description="Filter by destination city "
+                    "(ex. ?destination_city=Kyiv)",
+    ),
+]
 
 
 class AirportViewSet(
+    SerializerTimingMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -46,12 +185,15 @@ class AirportViewSet(
 
 
 class RouteViewSet(
+    SerializerTimingMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     queryset = Route.objects.select_related("source", "destination").all()
     serializer_class = RouteSerializer
+    cache_models = (Route, Airport)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -60,6 +202,8 @@ class RouteViewSet(
 
 
 class FlightViewSet(
+    SerializerTimingMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -71,86 +215,163 @@ class FlightViewSet(
         .prefetch_related("crews").all()
     )
     serializer_class = FlightSerializer
+    pagination_class = LimitOffsetOrCursorPagination
+    # Of the FlightSearchIndex rows that list pages through
+    cursor_ordering = ("departure_time", "flight_id")
+    throttle_scope = "flight_search"
 
     def get_queryset(self):
+        if self.action == "list":
+            return search_flight_index(self.request.query_params)
         queryset = self.queryset
-        departure_date = self.request.query_params.get("departure_date")
-        arrival_date = self.request.query_params.get("arrival_date")
-        source_city = self.request.query_params.get("source_city")
-        destination_city = self.request.query_params.get("destination_city")
-
-        if self.action in ("retrieve", "list"):
-            queryset = (
-                queryset.select_related("airplane").annotate(
-                    tickets_available=F("airplane__rows")
-                    * F("airplane__seats_in_row")
-                    - Count("tickets")
-                )
-            ).order_by("id")
-
-        if departure_date:
-            departure_date = (
-                datetime.strptime(departure_date, "%Y-%m-%d").date()
-            )
-            queryset = queryset.filter(departure_time__date=departure_date)
-
-        if arrival_date:
-            arrival_date = (
-                datetime.strptime(arrival_date, "%Y-%m-%d").date()
-            )
-            queryset = queryset.filter(arrival_time__date=arrival_date)
-
-        if source_city:
-            queryset = queryset.filter(
-                route__source__closest_big_city__icontains=source_city
-            )
-
-        if destination_city:
-            queryset = queryset.filter(
-                route__destination__closest_big_city__icontains=destination_city  # noqa: E501
+        if self.action == "retrieve":
+            queryset = with_tickets_available(
+                queryset.select_related("search_index")
             )
+        return search_flights(queryset, self.request.query_params)
 
-        return queryset.distinct()
+    def get_last_modified(self, flight):
+        # The index row follows route, airplane, crew and ticket changes
+        search_index = getattr(flight, "search_index", None)
+        if search_index is None:
+            return flight.updated_at
+        return max(flight.updated_at, search_index.updated_at)
 
     def get_serializer_class(self):
         if self.action == "list":
-            return FlightListSerializer
+            if getattr(self, "swagger_fake_view", False):
+                return FlightListSerializer
+            return FlightListRowSerializer
         if self.action == "retrieve":
             return FlightDetailSerializer
         return self.serializer_class
 
+    @extend_schema(parameters=FLIGHT_SEARCH_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @extend_schema(
-        parameters=[
-            OpenApiParameter(
-                "departure_date",
-                type=OpenApiTypes.DATE,
-                description="Filter by departure date "
-                            "(ex. ?departure_date=2019-01-10)",
-            ),
-            OpenApiParameter(
-                "arrival_date",
-                type=OpenApiTypes.DATE,
-                description="Filter by arrival date "
-                            "(ex. ?arrival_date=2019-01-10)",
-            ),
-            OpenApiParameter(
-                "source_city",
-                type=OpenApiTypes.STR,
-                description="Filter by source city (ex. ?source_city=Kyiv)",
+        responses=FlightSeatMapSerializer,
+        description="Seat occupancy as a base64 bitset of rows x "
+                    "seats_in_row. Bit (row - 1) * seats_in_row + "
+                    "(seat - 1) is set for a taken seat, most "
+                    "significant bit first. Supports If-None-Match.",
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="seatmap",
+        serializer_class=FlightSeatMapSerializer,
+    )
+    def seatmap(self, request, pk=None):
+        """Endpoint for compact seat occupancy of specific flight"""
+        rows, seats_in_row = get_object_or_404(
+            Flight.objects.values_list(
+                "airplane__rows", "airplane__seats_in_row"
             ),
-            OpenApiParameter(
-                "destination_city",
-                type=OpenApiTypes.STR,
-                description="Filter by destination city "
-                            "(ex. ?destination_city=Kyiv)",
+            pk=pk,
+        )
+        bitmap = bytearray((rows * seats_in_row + 7) // 8)
+        for row, seat in Ticket.objects.filter(flight_id=pk).values_list(
+            "row", "seat"
+        ):
+            if not (1 <= row <= rows and 1 <= seat <= seats_in_row):
+                # Sold before the airplane layout shrank
+                continue
+            index = (row - 1) * seats_in_row + seat - 1
+            bitmap[index // 8] |= 0x80 >> index % 8
+
+        etag = quote_etag(
+            hashlib.md5(
+                bytes(bitmap) + f"{rows}x{seats_in_row}".encode()
+            ).hexdigest()
+        )
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
             )
-        ]
+
+        serializer = self.get_serializer(
+            {
+                "rows": rows,
+                "seats_in_row": seats_in_row,
+                "seatmap": base64.b64encode(bitmap).decode(),
+            }
+        )
+        return Response(serializer.data, headers={"ETag": etag})
+
+    @extend_schema(
+        request=SeatHoldCreateSerializer,
+        responses={201: SeatHoldSerializer(many=True)},
+        description="Hold seats for a few minutes before ordering them. "
+                    "Holding a seat again extends the user's own hold.",
     )
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="hold",
+        throttle_scope="order",
+        permission_classes=[IsAuthenticated],
+        serializer_class=SeatHoldCreateSerializer,
+    )
+    def hold(self, request, pk=None):
+        """Endpoint for holding seats of specific flight"""
+        flight = get_object_or_404(
+            Flight.objects.select_related("airplane"), pk=pk
+        )
+        context = self.get_serializer_context()
+        context["flight"] = flight
+        serializer = self.get_serializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        holds = serializer.save(user=request.user)
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ItineraryViewSet(SerializerTimingMixin, GenericViewSet):
+    """Direct and connecting flights between two cities"""
+
+    serializer_class = ItinerarySerializer
+    pagination_class = None
+    throttle_scope = "flight_search"
+
+    @extend_schema(parameters=[ItinerarySearchSerializer])
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        search = ItinerarySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        if "departure_date" in params:
+            departure_from, departure_to = day_range(
+                params["departure_date"].strftime("%Y-%m-%d")
+            )
+        else:
+            departure_from, departure_to = timezone.now(), None
+
+        itineraries = flight_index.search(
+            params["source_city"],
+            params["destination_city"],
+            departure_from,
+            departure_to,
+            min_layover=timedelta(minutes=params["min_layover"]),
+            max_layover=timedelta(minutes=params["max_layover"]),
+            max_legs=params["max_legs"],
+            order_by=params["order_by"],
+            limit=params["limit"],
+        )
+        serializer = self.get_serializer(
+            [itinerary._asdict() for itinerary in itineraries], many=True
+        )
+        return Response(serializer.data)
 
 
 class CrewViewSet(
+    SerializerTimingMixin,
+    CachedListMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -158,23 +379,114 @@ class CrewViewSet(
 ):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
+    # Lists are validated by CachedListMixin
+    conditional_actions = ("retrieve",)
+
+    @extend_schema(
+        parameters=[CrewScheduleQuerySerializer],
+        responses=CrewDutySerializer(many=True),
+        description="Flights of a crew member in departure order, each "
+                    "with the flights it overlaps or leaves too little "
+                    "rest before or after.",
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="schedule",
+        pagination_class=None,
+        serializer_class=CrewDutySerializer,
+    )
+    def schedule(self, request, pk=None):
+        """Endpoint for the duties of specific crew member"""
+        get_object_or_404(Crew.objects.values_list("id"), pk=pk)
+        query = CrewScheduleQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        serializer = self.get_serializer(
+            crew_schedule(
+                int(pk),
+                query.validated_data.get("start", timezone.now()),
+                query.validated_data.get("end"),
+            ),
+            many=True,
+        )
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[AvailableCrewQuerySerializer],
+        responses=CrewSerializer(many=True),
+        description="Crew members with no duty overlapping the flight "
+                    "or too close to it, in id order.",
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="available",
+        pagination_class=None,
+    )
+    def available(self, request):
+        """Endpoint for crew members free to take specific flight"""
+        query = AvailableCrewQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        departure_time, arrival_time = get_object_or_404(
+            Flight.objects.values_list("departure_time", "arrival_time"),
+            pk=query.validated_data["flight"],
+        )
+        busy = CrewRoster.load(departure_time, arrival_time).busy_crews(
+            departure_time, arrival_time
+        )
+        crews = Crew.objects.exclude(id__in=busy).order_by("id")[
+            :query.validated_data["limit"]
+        ]
+        return Response(self.get_serializer(crews, many=True).data)
 
 
 class AirplaneViewSet(
+    SerializerTimingMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     queryset = Airplane.objects.select_related("airplane_type").all()
     serializer_class = AirplaneSerializer
+    cache_models = (Airplane, AirplaneType)
 
     def get_serializer_class(self):
         if self.action == "list":
             return AirplaneListSerializer
         return self.serializer_class
 
+    @extend_schema(
+        parameters=[RotationQuerySerializer],
+        responses=RotationViolationSerializer(many=True),
+        description="Flights across the fleet that double-book their "
+                    "airplane or depart from another airport than the "
+                    "previous flight of the airplane arrived at.",
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="rotation-violations",
+        pagination_class=None,
+        serializer_class=RotationViolationSerializer,
+    )
+    def rotation_violations(self, request):
+        """Endpoint for airplane rotation violations of the fleet"""
+        query = RotationQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        serializer = self.get_serializer(
+            fleet_violations(
+                query.validated_data.get("start", timezone.now()),
+                query.validated_data.get("end"),
+            ),
+            many=True,
+        )
+        return Response(serializer.data)
+
 
 class AirplaneTypeViewSet(
+    SerializerTimingMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -184,6 +496,8 @@ class AirplaneTypeViewSet(
 
 
 class TicketViewSet(
+    SerializerTimingMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -199,6 +513,8 @@ class TicketViewSet(
 
     serializer_class = TicketSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = LimitOffsetOrCursorPagination
+    conditional_models = (Airport, Route, Airplane, Flight)
 
     def get_queryset(self):
         airplane = self.request.query_params.get("airplane")
@@ -223,10 +539,16 @@ class TicketViewSet(
                 )
             )
 
-        return queryset.distinct()
+        if self.action == "list":
+            return TicketListRowSerializer.rows(queryset)
+        return queryset
 
     def get_serializer_class(self):
-        if self.action in ("list", "retrieve"):
+        if self.action == "list":
+            if getattr(self, "swagger_fake_view", False):
+                return TicketListSerializer
+            return TicketListRowSerializer
+        if self.action == "retrieve":
             return TicketListSerializer
         return self.serializer_class
 
@@ -253,29 +575,79 @@ class TicketViewSet(
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[TicketExportSerializer],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+        description="Stream all matching tickets as CSV or NDJSON. "
+                    "Accepts the list filters plus a flight manifest "
+                    "filter by flight ID and departure date range.",
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Endpoint for streaming ticket export and flight manifests"""
+        params = TicketExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        queryset = filter_manifest(
+            self.get_queryset(),
+            flight=params.get("flight"),
+            departure_from=(
+                day_range(str(params["departure_from"]))[0]
+                if "departure_from" in params else None
+            ),
+            departure_to=(
+                day_range(str(params["departure_to"]))[1]
+                if "departure_to" in params else None
+            ),
+        )
+        export_format = params["export_format"]
+        response = StreamingHttpResponse(
+            export_lines(queryset, export_format),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="tickets.{export_format}"'
+        )
+        return response
+
 
 class OrderViewSet(
+    SerializerTimingMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
     GenericViewSet,
 ):
+    # OrderSerializer reads ticket ids only, list pages are built from rows
     queryset = Order.objects.all().select_related("user").prefetch_related(
-        "tickets__flight__route__source",
-        "tickets__flight__route__destination",
-        "tickets__flight__airplane",
+        "tickets"
     )
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
+    throttle_scope = "order"
+    pagination_class = LimitOffsetOrCursorPagination
+    conditional_models = (Airport, Route, Airplane, Flight)
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == "list":
+            return OrderListRowSerializer.rows(queryset)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "list":
-            return OrderListSerializer
+            if getattr(self, "swagger_fake_view", False):
+                return OrderListSerializer
+            return OrderListRowSerializer
         return self.serializer_class
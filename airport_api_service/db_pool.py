@@ -0,0 +1,131 @@
+"""
+Database connection pooling.
+
+With OPTIONS["pool"] set on a PostgreSQL alias (POSTGRES_POOL), Django
+takes its connections from a psycopg 3 pool kept per process: a request
+borrows one on its first query and hands it back when it finishes, so
+only the pool pays for connecting. Without a pool, connections persist
+CONN_MAX_AGE seconds per thread. Either way CONN_HEALTH_CHECKS checks
+a connection before reusing it.
+
+wait_for_database() is the startup check: wait_for_db retries it until
+the database answers, the database system check (run by migrate) tries
+it once. pool_stats() and prometheus() expose the counters of the pools
+open in this process for metrics_view.
+"""
+import time
+from importlib.util import find_spec
+
+from django.db import connections
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db.utils import OperationalError
+
+# get_stats() keys: gauges are always reported, counters from their
+# first increment
+POOL_GAUGES = {
+    "pool_min": "Connections the pool keeps open at least",
+    "pool_max": "Connections the pool opens at most",
+    "pool_size": "Connections open, in use or idle",
+    "pool_available": "Idle connections ready to be borrowed",
+    "requests_waiting": "Requests waiting for a connection",
+}
+POOL_COUNTERS = {
+    "requests_num": "Connections borrowed",
+    "requests_queued": "Borrows that waited for a connection",
+    "requests_wait_ms": "Milliseconds spent waiting for a connection",
+    "requests_errors": "Borrows that timed out",
+    "returns_bad": "Connections returned broken",
+    "connections_num": "Connections opened",
+    "connections_ms": "Milliseconds spent opening connections",
+    "connections_errors": "Failed connection attempts",
+    "connections_lost": "Connections found broken by health checks",
+}
+
+
+def is_pooled(connection):
+    return bool(connection.settings_dict.get("OPTIONS", {}).get("pool"))
+
+
+def pooling_unavailable(connection):
+    """Why connection cannot use a psycopg pool, None if it can"""
+    if connection.vendor != "postgresql":
+        return f"{connection.vendor} connections cannot be pooled"
+    if not is_psycopg3:
+        return "Connection pools need psycopg 3, psycopg2 is in use"
+    if find_spec("psycopg_pool") is None:
+        return "psycopg-pool is not installed"
+    return None
+
+
+def pool_configuration_error(connection):
+    """What is wrong with the pool settings of connection, if anything"""
+    problem = pooling_unavailable(connection)
+    if problem is not None:
+        return problem
+    if connection.settings_dict.get("CONN_MAX_AGE", 0) != 0:
+        return "CONN_MAX_AGE must be 0 with a connection pool"
+    options = connection.settings_dict["OPTIONS"]["pool"]
+    if options is True:
+        options = {}
+    # psycopg_pool defaults
+    min_size = options.get("min_size", 4)
+    if options.get("max_size", min_size) < min_size:
+        return "The pool min_size exceeds its max_size"
+    return None
+
+
+def wait_for_database(connection=None, attempts=None, delay=1,
+                      on_retry=None):
+    """
+    Connect, retrying every delay seconds on OperationalError, at most
+    attempts times (forever when None). A pool must also fill up to its
+    min_size within its timeout. Return the last error, None once the
+    database answered
+    """
+    connection = connection or connections["default"]
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            connection.ensure_connection()
+            if is_pooled(connection):
+                pool = connection.pool
+                with connection.wrap_database_errors:
+                    pool.wait(timeout=pool.timeout)
+            return None
+        except OperationalError as error:
+            if attempts is not None and attempt >= attempts:
+                return error
+            if on_retry is not None:
+                on_retry(error)
+            time.sleep(delay)
+
+
+def pool_stats():
+    """{alias: get_stats()} of the pools of this process"""
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        if is_pooled(connection) and pooling_unavailable(connection) is None:
+            stats[alias] = connection.pool.get_stats()
+    return stats
+
+
+def prometheus():
+    """Prometheus text exposition of pool_stats()"""
+    stats = pool_stats()
+    if not stats:
+        return ""
+    lines = []
+    for metrics, kind in ((POOL_GAUGES, "gauge"), (POOL_COUNTERS, "counter")):
+        for key, description in metrics.items():
+            name = f"airport_db_pool_{key.removeprefix('pool_')}"
+            if kind == "counter":
+                name = f"{name}_total"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for alias, alias_stats in sorted(stats.items()):
+                lines.append(
+                    f'{name}{{alias="{alias}"}} {alias_stats.get(key, 0)}'
+                )
+    return "\n".join(lines) + "\n"
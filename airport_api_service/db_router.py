@@ -0,0 +1,177 @@
+"""
+Read replica routing.
+
+DATABASE_REPLICAS lists the aliases of read replicas of "default". The
+reads of safe (GET, HEAD, OPTIONS) requests, which covers every list and
+retrieve action, go to one replica picked per request. Writes, the reads
+of unsafe requests, reads in transactions and reads outside requests
+stay on the primary.
+
+A user whose unsafe request succeeded (ordering tickets, deleting one)
+is pinned to the primary for REPLICA_PIN_SECONDS, so they read their own
+writes despite replication lag. Pins live in the REPLICA_PIN_CACHE_ALIAS
+cache, which must be shared (Redis) when several workers serve a user.
+The pin of a request is looked up on its first read after
+authentication; earlier reads, like a session user lookup, use the
+primary.
+
+Clients force primary reads with the X-Read-Primary request header, code
+with the read_primary() context manager.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PRIMARY_HEADER = "X-Read-Primary"
+
+current_routing = ContextVar("current_routing", default=None)
+forced_primary = ContextVar("forced_primary", default=False)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", ())
+
+
+def get_pin_cache():
+    return caches[getattr(settings, "REPLICA_PIN_CACHE_ALIAS", "default")]
+
+
+def pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+def pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+
+def authenticated_user(request):
+    """
+    Return (known, user): whether authentication ran for request yet,
+    without running it, and the authenticated user if any
+    """
+    user = request.__dict__.get("user")
+    if user is None or (
+        isinstance(user, SimpleLazyObject) and user._wrapped is empty
+    ):
+        return False, None
+    return True, user if user.is_authenticated else None
+
+
+@contextmanager
+def read_primary():
+    """Send the reads of the block to the primary"""
+    token = forced_primary.set(True)
+    try:
+        yield
+    finally:
+        forced_primary.reset(token)
+
+
+class ReadRouting:
+    """Where the reads of one request go"""
+
+    def __init__(self, request):
+        self.request = request
+        self.primary = request.method not in SAFE_METHODS or (
+            request.headers.get(PRIMARY_HEADER, "").lower()
+            not in ("", "0", "false")
+        )
+        self.replica = None
+
+    def database(self):
+        if self.primary:
+            return DEFAULT_DB_ALIAS
+        if self.replica is None:
+            known, user = authenticated_user(self.request)
+            if not known:
+                return DEFAULT_DB_ALIAS
+            if user is not None and get_pin_cache().get(pin_key(user.pk)):
+                self.primary = True
+                return DEFAULT_DB_ALIAS
+            self.replica = random.choice(get_replicas())
+        return self.replica
+
+
+class ReplicaRouter:
+    """Database router sending the reads of safe requests to replicas"""
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if (
+            routing is None
+            or not get_replicas()
+            or forced_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return routing.database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Route the reads of each request, pin users after their writes"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = current_routing.set(ReadRouting(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            get_pin_cache().set(pin_key(user_id), True, pin_seconds())
+        return response
+
+    async def __acall__(self, request):
+        token = current_routing.set(ReadRouting(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+
+        user_id = self.writer_id(request, response)
+        if user_id is not None:
+            await get_pin_cache().aset(pin_key(user_id), True, pin_seconds())
+        return response
+
+    @staticmethod
+    def writer_id(request, response):
+        """Id of the user to pin after a successful unsafe request"""
+        if (
+            request.method in SAFE_METHODS
+            or response.status_code >= 400
+            or not get_replicas()
+        ):
+            return None
+        _, user = authenticated_user(request)
+        return None if user is None else user.pk
@@ -0,0 +1,250 @@
+"""
+Production-safe request instrumentation.
+
+RequestMetricsMiddleware records, per view and action (for example
+FlightViewSet.list), the number of SQL queries, time spent in the
+database, time spent serializing (the part of a view handler that is
+not SQL, measured by SerializerTimingMixin) and total time. It hooks
+SQL through connection.execute_wrapper, so it works with DEBUG off and
+never keeps the query text beyond the request. Repeated SQL shapes above
+METRICS_N_PLUS_ONE_THRESHOLD are flagged as N+1 suspects. Aggregates
+live in the worker process and are served in Prometheus text format by
+metrics_view.
+
+The query hook is installed on every connection as it is created, so it
+also sees the queries async views run on sync_to_async threads; the
+per-request sample travels there in a context variable.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+from airport_api_service import db_pool
+
+logger = logging.getLogger(__name__)
+
+SQL_LITERALS = re.compile(
+    r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?"
+)
+SQL_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+current_sample = ContextVar("current_sample", default=None)
+
+
+class RequestSample:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.shapes = Counter()
+        self.view = None
+        self.action = ""
+
+
+class MetricsRegistry:
+    fields = (
+        "requests",
+        "queries",
+        "db_seconds",
+        "serializer_seconds",
+        "seconds",
+        "n_plus_one",
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.totals = defaultdict(lambda: dict.fromkeys(self.fields, 0))
+
+    def record(self, sample, total_seconds, n_plus_one):
+        with self.lock:
+            totals = self.totals[sample.view, sample.action]
+            totals["requests"] += 1
+            totals["queries"] += sample.queries
+            totals["db_seconds"] += sample.db_seconds
+            totals["serializer_seconds"] += sample.serializer_seconds
+            totals["seconds"] += total_seconds
+            totals["n_plus_one"] += int(n_plus_one)
+
+    def snapshot(self):
+        with self.lock:
+            return {key: dict(totals) for key, totals in self.totals.items()}
+
+    def prometheus(self):
+        descriptions = {
+            "requests": "Requests handled",
+            "queries": "SQL queries executed",
+            "db_seconds": "Seconds spent executing SQL",
+            "serializer_seconds": "Seconds view handlers spent outside SQL",
+            "seconds": "Seconds spent handling requests",
+            "n_plus_one": "Requests with a repeated SQL shape (N+1 suspect)",
+        }
+        snapshot = self.snapshot()
+        lines = []
+        for field in self.fields:
+            name = f"airport_view_{field}_total"
+            lines.append(f"# HELP {name} {descriptions[field]}")
+            lines.append(f"# TYPE {name} counter")
+            for (view, action), totals in sorted(snapshot.items()):
+                lines.append(
+                    f'{name}{{view="{label_value(view)}",'
+                    f'action="{label_value(action)}"}} {totals[field]}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def label_value(value):
+    """Escape a Prometheus label value"""
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def sql_shape(sql):
+    return SQL_IN_LISTS.sub("(?)", SQL_LITERALS.sub("?", sql))
+
+
+def record_query(execute, sql, params, many, context):
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.db_seconds += time.perf_counter() - started
+        sample.queries += 1
+        sample.shapes[sql_shape(sql)] += 1
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class SerializerTimingMixin:
+    """
+    Count the time a DRF handler spends outside SQL, which for list and
+    detail responses is building serializer.data, as serializer_seconds
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        sample = current_sample.get()
+        if sample is not None:
+            self.handler_started = (time.perf_counter(), sample.db_seconds)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        sample = current_sample.get()
+        started = getattr(self, "handler_started", None)
+        if sample is not None and started is not None:
+            self.handler_started = None
+            started_at, db_seconds = started
+            sample.serializer_seconds += max(
+                time.perf_counter() - started_at
+                - (sample.db_seconds - db_seconds),
+                0.0,
+            )
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def view_action(view_func, request):
+    """The DRF action (or the method, for other views) a request runs"""
+    actions = getattr(view_func, "actions", None) or {}
+    return actions.get(request.method.lower(), request.method.lower())
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_sample.reset(token)
+
+        if sample.view is not None:
+            self.record(request, sample)
+        return response
+
+    async def __acall__(self, request):
+        sample = RequestSample()
+        token = current_sample.set(sample)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_sample.reset(token)
+
+        if sample.view is not None:
+            self.record(request, sample)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sample = current_sample.get()
+        if sample is None or view_func is metrics_view:
+            return
+        match = request.resolver_match
+        # Unnamed URLs fall back to their pattern, not the function path
+        sample.view = match.view_name if match.url_name else match.route
+        sample.action = view_action(view_func, request)
+
+    @staticmethod
+    def record(request, sample):
+        total_seconds = time.perf_counter() - sample.started
+        threshold = getattr(settings, "METRICS_N_PLUS_ONE_THRESHOLD", 10)
+        shape, repeats = (
+            sample.shapes.most_common(1)[0] if sample.shapes else ("", 0)
+        )
+        n_plus_one = repeats > threshold
+        if n_plus_one:
+            logger.warning(
+                "Possible N+1 in %s %s: %d x %s",
+                sample.view, sample.action, repeats, shape,
+            )
+        registry.record(sample, total_seconds, n_plus_one)
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the per-view aggregates and pools"""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        allowed = request.headers.get("Authorization") == f"Bearer {token}"
+    else:
+        allowed = request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.prometheus() + db_pool.prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -29,7 +29,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.environ["SECRET_KEY"]
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("DEBUG", "True").lower() in ("1", "true")
 
 ALLOWED_HOSTS = []
 
@@ -46,7 +46,6 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "rest_framework.authtoken",
-    "debug_toolbar",
     "drf_spectacular",
     "airport",
     "user",
@@ -56,7 +55,8 @@ AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "airport_api_service.metrics.RequestMetricsMiddleware",
+    "airport_api_service.db_router.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -65,6 +65,18 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# The debug toolbar is costly and only useful locally
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(2, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
+# Requests repeating one SQL shape more often are logged as N+1 suspects
+METRICS_N_PLUS_ONE_THRESHOLD = int(
+    os.environ.get("METRICS_N_PLUS_ONE_THRESHOLD", 10)
+)
+# Bearer token for /metrics/, which is limited to INTERNAL_IPS when empty
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 ROOT_URLCONF = "airport_api_service.urls"
 
 TEMPLATES = [
@@ -97,9 +109,100 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("POSTGRES_HOST"),
         "PORT": os.environ.get("POSTGRES_PORT"),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Connections: with POSTGRES_POOL each process keeps a psycopg 3 pool of
+# POSTGRES_POOL_MIN_SIZE to POSTGRES_POOL_MAX_SIZE connections, requests
+# waiting up to POSTGRES_POOL_TIMEOUT seconds for one. Otherwise each
+# thread keeps its connection for POSTGRES_CONN_MAX_AGE seconds. Either
+# way connections are checked before reuse (see
+# airport_api_service.db_pool).
+if os.environ.get("POSTGRES_POOL", "False").lower() in ("1", "true"):
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("POSTGRES_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.environ.get("POSTGRES_POOL_TIMEOUT", 10)),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("POSTGRES_CONN_MAX_AGE", 60)
+    )
+
+# Read replicas: comma-separated host[:port] of streaming replicas of the
+# primary, added as replica_1, replica_2, ... The reads of GET requests go
+# to them, users are pinned to the primary for REPLICA_PIN_SECONDS after a
+# write (see airport_api_service.db_router). Tests read the primary.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")),
+    start=1,
+):
+    host, _, port = replica.strip().partition(":")
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{number}")
+
+DATABASE_ROUTERS = ["airport_api_service.db_router.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+REPLICA_PIN_CACHE_ALIAS = "default"
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# locmem is per process; set REDIS_URL to share cached reference lists
+# and their versions across workers.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+REFERENCE_CACHE_ALIAS = "default"
+REFERENCE_CACHE_TIMEOUT = int(os.environ.get("REFERENCE_CACHE_TIMEOUT", 300))
+REFERENCE_CACHE_MAX_AGE = int(os.environ.get("REFERENCE_CACHE_MAX_AGE", 60))
+
+# Throttle counters: "cache" (THROTTLE_CACHE_ALIAS, shared across workers
+# with Redis, per process with locmem) or "database" (ThrottleCounter
+# table, shared without Redis but written on every request)
+THROTTLE_STORE = os.environ.get("THROTTLE_STORE") or "cache"
+THROTTLE_CACHE_ALIAS = "default"
+
+# Seat holds made through flight/{id}/hold/
+SEAT_HOLD_MINUTES = int(os.environ.get("SEAT_HOLD_MINUTES", 10))
+SEAT_HOLD_MAX_MINUTES = int(os.environ.get("SEAT_HOLD_MAX_MINUTES", 30))
+
+# Crew rosters: rest required between duties, and the longest flight,
+# which bounds interval searches (see airport.roster)
+CREW_MIN_REST_MINUTES = int(os.environ.get("CREW_MIN_REST_MINUTES", 60))
+FLIGHT_MAX_HOURS = int(os.environ.get("FLIGHT_MAX_HOURS", 24))
+
+# Fares: FARE_BASE + FARE_PER_KM * distance, times the multiplier of the
+# highest load factor (share of seats sold) reached, see airport.pricing
+FARE_BASE = os.environ.get("FARE_BASE", "20.00")
+FARE_PER_KM = os.environ.get("FARE_PER_KM", "0.08")
+FARE_LOAD_FACTORS = {0.5: "1.15", 0.7: "1.35", 0.85: "1.6", 0.95: "2.0"}
+FARE_CACHE_ALIAS = "default"
+FARE_QUOTE_TIMEOUT = int(os.environ.get("FARE_QUOTE_TIMEOUT", 60))
+
+# Seconds before the in-memory itinerary flight index is fully rebuilt
+ITINERARY_INDEX_TTL = int(os.environ.get("ITINERARY_INDEX_TTL", 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -128,16 +231,19 @@ REST_FRAMEWORK = {
         "user.permissions.IsAdminOrIfAuthenticatedReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.StatelessJWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle"
+        "airport.throttling.AnonRateThrottle",
+        "airport.throttling.UserRateThrottle",
+        "airport.throttling.ScopedRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "30/day",
-        "user": "1000/day"
+        "user": "1000/day",
+        "flight_search": "300/min",
+        "order": "60/min",
     },
     "DEFAULT_PAGINATION_CLASS": (
         "rest_framework.pagination.LimitOffsetPagination"
@@ -186,4 +292,13 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=20),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=3),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
 }
+
+# Refuse tokens issued before a TokenRevocation of their user, checked
+# against an in-process copy reloaded every JWT_REVOCATION_REFRESH seconds
+JWT_REVOCATION_LIST = os.environ.get(
+    "JWT_REVOCATION_LIST", "False"
+).lower() in ("1", "true")
+JWT_REVOCATION_REFRESH = int(os.environ.get("JWT_REVOCATION_REFRESH", 30))
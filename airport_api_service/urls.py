@@ -14,9 +14,9 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from debug_toolbar.toolbar import debug_toolbar_urls
-
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 
 from drf_spectacular.views import (
@@ -25,6 +25,8 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from airport_api_service.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/airport_service/", include("airport.urls", namespace="airport")),
@@ -40,4 +42,14 @@ urlpatterns = [
         SpectacularRedocView.as_view(url_name="schema"),
         name="redoc",
     ),
-] + debug_toolbar_urls()
+    path("metrics/", metrics_view, name="metrics"),
+]
+
+# runserver serves static files by itself, uvicorn only through these
+# (DEBUG only)
+urlpatterns += staticfiles_urlpatterns()
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()
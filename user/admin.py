@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 from django.utils.translation import gettext as _
 
+from user.authentication import revoke_tokens
 from user.models import User
 
 
@@ -38,3 +39,9 @@ class UserAdmin(DjangoUserAdmin):
     list_display = ("email", "first_name", "last_name", "is_staff")
     search_fields = ("email", "first_name", "last_name")
     ordering = ("email",)
+    actions = ("revoke_user_tokens",)
+
+    @admin.action(description=_("Revoke issued tokens"))
+    def revoke_user_tokens(self, request, queryset):
+        for user in queryset:
+            revoke_tokens(user)
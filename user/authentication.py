@@ -0,0 +1,129 @@
+"""
+JWT authentication without a user query per request.
+
+Access tokens issued by the token endpoints carry is_staff, is_superuser
+and is_active claims (user.tokens.USER_CLAIMS), so the request user is
+built from the token alone: a User instance with only those fields
+loaded and the rest deferred, which works for foreign keys, filters and
+superuser permission checks, and loads other fields on first access.
+Tokens without the claims fall back to the regular user lookup.
+
+Claims are refreshed from the database with every token refresh, at the
+latest after ACCESS_TOKEN_LIFETIME. With JWT_REVOCATION_LIST enabled,
+tokens issued before a TokenRevocation of their user are refused right
+away; revocations are read from an in-process copy reloaded every
+JWT_REVOCATION_REFRESH seconds.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from user.models import TokenRevocation
+from user.tokens import USER_CLAIMS
+
+
+class RevocationList:
+    """In-process {user_id: revoked_at timestamp} of recent revocations"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded_at = None
+        self.revoked = {}
+
+    @property
+    def enabled(self):
+        return getattr(settings, "JWT_REVOCATION_LIST", False)
+
+    @property
+    def is_stale(self):
+        ttl = getattr(settings, "JWT_REVOCATION_REFRESH", 30)
+        return (
+            self.loaded_at is None or time.monotonic() - self.loaded_at > ttl
+        )
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    def load(self):
+        # Older revocations only void tokens that have expired anyway
+        since = timezone.now() - max(
+            api_settings.ACCESS_TOKEN_LIFETIME,
+            api_settings.REFRESH_TOKEN_LIFETIME,
+        )
+        revoked = {}
+        for user_id, revoked_at in TokenRevocation.objects.filter(
+            revoked_at__gte=since
+        ).values_list("user_id", "revoked_at"):
+            # Whole seconds, as iat: tokens of a new login in the
+            # second of the revocation must not be refused
+            revoked[user_id] = max(
+                revoked.get(user_id, 0), int(revoked_at.timestamp())
+            )
+        self.revoked = revoked
+        self.loaded_at = time.monotonic()
+
+    def is_revoked(self, token):
+        if not self.enabled:
+            return False
+        if self.is_stale:
+            with self.lock:
+                if self.is_stale:
+                    self.load()
+        revoked_at = self.revoked.get(token.get(api_settings.USER_ID_CLAIM))
+        return revoked_at is not None and token.get("iat", 0) < revoked_at
+
+
+revocations = RevocationList()
+
+
+def revoke_tokens(user):
+    """Void all tokens issued to user so far"""
+    TokenRevocation.objects.create(user=user)
+    revocations.invalidate()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication building the user from token claims"""
+
+    def get_user(self, validated_token):
+        if revocations.is_revoked(validated_token):
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+        if any(claim not in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        if (
+            api_settings.CHECK_USER_IS_ACTIVE
+            and not validated_token["is_active"]
+        ):
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        claims = {
+            api_settings.USER_ID_FIELD: validated_token.get(
+                api_settings.USER_ID_CLAIM
+            ),
+            **{claim: validated_token[claim] for claim in USER_CLAIMS},
+        }
+        if claims[api_settings.USER_ID_FIELD] is None:
+            return super().get_user(validated_token)
+        fields = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in claims
+        ]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            fields,
+            [claims[field] for field in fields],
+        )
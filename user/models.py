@@ -45,3 +45,15 @@ class User(AbstractUser):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+
+class TokenRevocation(models.Model):
+    """Tokens of user issued before the second of revoked_at are void"""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="token_revocations"
+    )
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.revoked_at.isoformat()}"
@@ -0,0 +1,7 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """Document StatelessJWTAuthentication as the usual Bearer JWT"""
+
+    target_class = "user.authentication.StatelessJWTAuthentication"
@@ -0,0 +1,30 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from user.authentication import revocations, revoke_tokens
+from user.models import User
+
+# Changes that must not wait for issued access tokens to expire
+REVOKING_FIELDS = ("is_active", "is_staff", "is_superuser", "password")
+
+
+@receiver(pre_save, sender=User)
+def revoke_tokens_on_demotion(sender, instance, update_fields=None, **kwargs):
+    if not revocations.enabled or instance._state.adding:
+        return
+    if update_fields is not None and not set(REVOKING_FIELDS) & set(
+        update_fields
+    ):
+        return
+    previous = (
+        User.objects.filter(pk=instance.pk)
+        .values(*REVOKING_FIELDS)
+        .first()
+    )
+    if previous and (
+        (previous["is_active"] and not instance.is_active)
+        or (previous["is_staff"] and not instance.is_staff)
+        or (previous["is_superuser"] and not instance.is_superuser)
+        or previous["password"] != instance.password
+    ):
+        revoke_tokens(instance)
@@ -1,3 +1,237 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from user.authentication import (
+    StatelessJWTAuthentication,
+    revocations,
+    revoke_tokens,
+)
+from user.models import TokenRevocation
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        revocations.invalidate()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+            first_name="Test",
+        )
+
+    def obtain_tokens(self):
+        res = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "email@gmail.com", "password": "<PASSWORD>"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_access_token_has_user_claims(self):
+        token = AccessToken(self.obtain_tokens()["access"])
+
+        self.assertEqual(token["user_id"], self.user.id)
+        self.assertIs(token["is_staff"], False)
+        self.assertIs(token["is_superuser"], False)
+        self.assertIs(token["is_active"], True)
+
+    def test_user_built_without_query(self):
+        access = self.obtain_tokens()["access"]
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(access)
+
+        self.assertIsInstance(user, get_user_model())
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertTrue(user.is_authenticated)
+        self.assertFalse(user.is_staff)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.first_name, "Test")
+
+    def test_superuser_checks_without_query(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        access = self.obtain_tokens()["access"]
+
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(access)
+            self.assertTrue(user.is_superuser)
+            self.assertTrue(user.has_perm("airport.add_airport"))
+
+    def test_token_without_claims_loads_user(self):
+        access = RefreshToken.for_user(self.user).access_token
+
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(access)
+
+        self.assertEqual(user, self.user)
+
+    def test_inactive_claim_refused(self):
+        token = AccessToken.for_user(self.user)
+        token["is_staff"] = False
+        token["is_superuser"] = False
+        token["is_active"] = False
+
+        res = self.client.get(
+            reverse("user:manage"), HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_claim_grants_admin_access(self):
+        self.user.is_staff = True
+        self.user.save()
+        access = self.obtain_tokens()["access"]
+
+        res = self.client.post(
+            reverse("airport:airport-list"),
+            {"name": "Boryspil", "closest_big_city": "Kyiv"},
+            HTTP_AUTHORIZATION=f"Bearer {access}",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_refresh_reloads_claims(self):
+        self.user.is_staff = True
+        self.user.save()
+        refresh = self.obtain_tokens()["refresh"]
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=False
+        )
+
+        res = self.client.post(
+            reverse("user:token_refresh"), {"refresh": refresh}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIs(AccessToken(res.data["access"])["is_staff"], False)
+
+    def test_refresh_refused_for_inactive_user(self):
+        refresh = self.obtain_tokens()["refresh"]
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+
+        res = self.client.post(
+            reverse("user:token_refresh"), {"refresh": refresh}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_manage_returns_full_user(self):
+        access = self.obtain_tokens()["access"]
+
+        res = self.client.get(
+            reverse("user:manage"), HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], "email@gmail.com")
+
+    def test_manage_refuses_deleted_user(self):
+        access = self.obtain_tokens()["access"]
+        self.user.delete()
+
+        res = self.client.get(
+            reverse("user:manage"), HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        revocations.invalidate()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="email@gmail.com",
+            password="<PASSWORD>",
+        )
+        self.tokens = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "email@gmail.com", "password": "<PASSWORD>"},
+        ).data
+
+    def tearDown(self):
+        revocations.invalidate()
+
+    def get_me(self):
+        return self.client.get(
+            reverse("user:manage"),
+            HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}",
+        )
+
+    def revoke_at(self, revoked_at):
+        with mock.patch("django.utils.timezone.now", return_value=revoked_at):
+            revoke_tokens(self.user)
+
+    @override_settings(JWT_REVOCATION_LIST=True)
+    def test_revoked_tokens_refused(self):
+        self.assertEqual(self.get_me().status_code, status.HTTP_200_OK)
+
+        # Revocations only void tokens of earlier seconds
+        self.revoke_at(timezone.now() + timedelta(seconds=1))
+
+        self.assertEqual(
+            self.get_me().status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        res = self.client.post(
+            reverse("user:token_refresh"), {"refresh": self.tokens["refresh"]}
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_REVOCATION_LIST=True)
+    def test_login_in_second_of_revocation_accepted(self):
+        second = timezone.now().replace(microsecond=0)
+        self.revoke_at(second + timedelta(milliseconds=200))
+
+        with mock.patch(
+            "rest_framework_simplejwt.tokens.aware_utcnow",
+            return_value=second + timedelta(milliseconds=700),
+        ):
+            self.tokens = self.client.post(
+                reverse("user:token_obtain_pair"),
+                {"email": "email@gmail.com", "password": "<PASSWORD>"},
+            ).data
+
+        self.assertEqual(self.get_me().status_code, status.HTTP_200_OK)
+
+    @override_settings(JWT_REVOCATION_LIST=True, THROTTLE_STORE="cache")
+    def test_revocations_cached_in_process(self):
+        self.get_me()
+
+        with self.assertNumQueries(1):
+            self.get_me()
+
+    def test_revocation_list_disabled_by_default(self):
+        revoke_tokens(self.user)
+
+        self.assertEqual(self.get_me().status_code, status.HTTP_200_OK)
+
+    @override_settings(JWT_REVOCATION_LIST=True)
+    def test_demotion_revokes_tokens(self):
+        self.user.first_name = "Test"
+        self.user.save()
+        self.assertFalse(TokenRevocation.objects.exists())
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(
+            TokenRevocation.objects.get().user_id, self.user.id
+        )
@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Copied into every access token so requests need no user query
+USER_CLAIMS = ("is_staff", "is_superuser", "is_active")
+
+
+def set_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry USER_CLAIMS"""
+
+    @classmethod
+    def for_user(cls, user):
+        return set_user_claims(super().for_user(user), user)
@@ -1,23 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext as _
 from rest_framework import generics
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import AllowAny
 from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 
+from airport_api_service.metrics import SerializerTimingMixin
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(SerializerTimingMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(SerializerTimingMixin, ObtainAuthToken):
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
     serializer_class = AuthTokenSerializer
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(
+    SerializerTimingMixin, generics.RetrieveUpdateAPIView
+):
     serializer_class = UserSerializer
 
     def get_object(self):
-        return self.request.user
+        # request.user only has the fields of the access token loaded,
+        # and may have been deleted since the token was issued
+        user = get_user_model().objects.filter(
+            pk=self.request.user.pk
+        ).first()
+        if user is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        return user